@@ -8,6 +8,7 @@ from pynput import keyboard
 from pynput.mouse import Button, Controller as MouseController
 from ui_automation import get_text_at_cursor
 from text_processor import extract_letter_sequence
+from letter_index import LetterSequenceIndex
 from db_manager import DatabaseManager
 from config_loader import app_config
 from auto_record_trigger import AutoRecordTrigger
@@ -83,6 +84,9 @@ class AltTriggerListener(threading.Thread):
         self.db_manager = DatabaseManager()
         self.listener = None
 
+        # 近似匹配索引：启动时全量构建，之后每次查询前同步新增、恢复与删除的录音
+        self.letter_index = LetterSequenceIndex()
+
         # 初始化自动补录触发器
         self.auto_record_trigger = AutoRecordTrigger()
 
@@ -95,6 +99,9 @@ class AltTriggerListener(threading.Thread):
 
     def run(self):
         logger.info("[AltTrigger] Starting listener...")
+        if app_config.alt_fuzzy_match_enabled:
+            # 大库构建需要数秒，放到后台线程，不阻塞按键监听
+            threading.Thread(target=self._build_letter_index, daemon=True).start()
         with keyboard.Listener(on_press=self.on_press, on_release=self.on_release) as self.listener:
             self.listener.join()
 
@@ -172,6 +179,8 @@ class AltTriggerListener(threading.Thread):
 
             # 4. 查询数据库
             record = self.db_manager.get_recording_by_letter_sequence(letter_seq)
+            if not record:
+                record = self._find_approximate_match(letter_seq)
 
             if record:
                 # 匹配成功：播放录音
@@ -187,6 +196,41 @@ class AltTriggerListener(threading.Thread):
         except Exception as e:
             print(f"[AltTrigger] Error processing match: {e}")
 
+    def _build_letter_index(self):
+        try:
+            start = time.perf_counter()
+            count = self.letter_index.sync(self.db_manager)
+            logger.info(f"[AltTrigger] Letter index built: {count} sequences in {(time.perf_counter() - start) * 1000:.0f}ms")
+        except Exception as e:
+            logger.error(f"[AltTrigger] Failed to build letter index: {e}")
+
+    def _find_approximate_match(self, letter_seq):
+        """精确匹配失败时，从近似匹配索引中查找包含或重叠的已有录音"""
+        if not app_config.alt_fuzzy_match_enabled or len(letter_seq) < app_config.alt_fuzzy_min_length:
+            return None
+        try:
+            self.letter_index.sync(self.db_manager)
+        except Exception as e:
+            print(f"[AltTrigger] Letter index sync failed: {e}")
+        while True:
+            start = time.perf_counter()
+            match = self.letter_index.best_match(
+                letter_seq,
+                min_containment=app_config.alt_fuzzy_min_containment,
+                min_overlap=app_config.alt_fuzzy_min_overlap
+            )
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if not match:
+                print(f"[AltTrigger] No approximate match ({elapsed_ms:.2f}ms)")
+                return None
+            number, containment, overlap = match
+            record = self.db_manager.get_recording_by_number(number)
+            if record:
+                print(f"[AltTrigger] Approximate match: #{number}, containment={containment:.2f}, overlap={overlap:.2f} ({elapsed_ms:.2f}ms)")
+                return record
+            # 录音已被删除（删除 / 清理发生在 UI 进程），移出索引后重试
+            self.letter_index.remove(number)
+
     def _send_play_command(self, number, count=1):
         """
         发送播放命令到 UI 进程
@@ -0,0 +1,110 @@
+"""
+archive_store.py - 录音冷存储
+包含: archive_zip_path, pack_audio_files, extract_audio_files, archive_date, restore_recording
+
+超出 max_display_dates 的录音不再直接删除，而是按日期归档：
+1. 该日期全部音频（含慢速版本）打包进 {archive_dir}/{date}.zip
+   （先写 .tmp 再原子替换；已有的 zip 会合并旧条目）
+2. 记录在一个事务中复制到 archive.db 并从主库删除
+3. 删除主音频目录中的文件
+每一步都可重复执行，中途退出后下一次清理会从断点继续。
+"""
+import os
+import zipfile
+from datetime import datetime
+from config_loader import app_config
+from audio_files import scan_audio_dir, remove_audio_files, remove_number_files, parse_audio_filename
+
+def archive_zip_path(date_str, archive_dir=None):
+    return os.path.join(archive_dir or app_config.archive_dir, f"{date_str}.zip")
+
+def pack_audio_files(date_str, numbers, index, archive_dir=None):
+    """
+    把 numbers 的音频文件写入该日期的 zip（生成器，每写入一个条目 yield 一次）
+
+    用 yield from 调用，返回写入的文件数。中途被放弃时只留下 .tmp，下次重新打包。
+
+    Args:
+        index: scan_audio_dir() 的结果，避免再次遍历目录
+    """
+    archive_dir = archive_dir or app_config.archive_dir
+    os.makedirs(archive_dir, exist_ok=True)
+    zip_path = archive_zip_path(date_str, archive_dir)
+    tmp_path = zip_path + ".tmp"
+
+    files = {}
+    for number in numbers:
+        for path in index.get(number, {}).get('files', []):
+            files[os.path.basename(path)] = path
+
+    with zipfile.ZipFile(tmp_path, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, path in files.items():
+            zf.write(path, arcname=name)
+            yield
+        # 上次中断时已归档、但主目录中已不存在的文件：保留旧条目
+        if os.path.exists(zip_path):
+            with zipfile.ZipFile(zip_path, 'r') as old:
+                for name in old.namelist():
+                    if name not in files:
+                        zf.writestr(old.getinfo(name), old.read(name))
+                        yield
+    with open(tmp_path, 'rb') as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_path, zip_path)
+    return len(files)
+
+def extract_audio_files(date_str, number, dest_dir=None, archive_dir=None):
+    """从日期 zip 中解出 number 的全部音频文件，返回解出的文件数"""
+    dest_dir = dest_dir or app_config.save_dir
+    zip_path = archive_zip_path(date_str, archive_dir)
+    if not os.path.exists(zip_path):
+        return 0
+    os.makedirs(dest_dir, exist_ok=True)
+    count = 0
+    with zipfile.ZipFile(zip_path, 'r') as zf:
+        for name in zf.namelist():
+            parsed = parse_audio_filename(name)
+            if parsed is not None and parsed[0] == number:
+                zf.extract(name, dest_dir)
+                count += 1
+    return count
+
+def archive_date(db_manager, date_str, index=None):
+    """
+    归档一个日期的全部录音（生成器，每完成一步 yield 一次，供空闲维护调度）
+
+    Returns:
+        (归档的记录数, 打包的文件数)
+    """
+    numbers = [rec['number'] for rec in db_manager.get_recordings_by_date_list([date_str])]
+    if not numbers:
+        return 0, 0
+    if index is None:
+        index = scan_audio_dir()
+    packed = yield from pack_audio_files(date_str, numbers, index)
+    yield
+    archived = db_manager.archive_recordings(numbers)
+    yield
+    remove_audio_files(numbers, index=index)
+    print(f"[Archive] {date_str}: archived {archived} records, packed {packed} files")
+    return archived, packed
+
+def restore_recording(db_manager, number):
+    """
+    按需从冷存储恢复一条录音（先解出音频再移回记录），日期改为今天
+
+    Returns:
+        主库中的 number，找不到归档记录时返回 None
+    """
+    row = db_manager.get_archived_recording(number)
+    if row is None:
+        return None
+    extracted = extract_audio_files(row['date'], number)
+    if extracted == 0:
+        print(f"[Archive] Warning: no archived audio for #{number} in {row['date']}.zip")
+    restored = db_manager.restore_archived_recording(number, datetime.now().strftime("%Y-%m-%d"))
+    if restored is not None and restored != number:
+        # 主库已有相同内容：解出的文件属于归档行，不再需要
+        remove_number_files(number)
+    print(f"[Archive] Restored #{number} as #{restored}")
+    return restored
@@ -0,0 +1,250 @@
+"""
+audio_files.py - 录音文件管理
+包含: parse_audio_filename, scan_audio_dir, remove_audio_files, remove_number_files,
+      audio_path, find_audio_file, write_audio_file, playback_fallback_path, convert_library
+
+音频目录中的文件命名规则（扩展名由 [Audio] storage_format 决定，读取时任意格式均可）：
+- {number}.{ext}          原速录音
+- {number}@{speed}.{ext}  慢速版本（speed 取自 [SlowAudio] slow_speeds）
+
+存储格式：wav / flac 为 16 位 PCM（flac 无损压缩），opus 为 Ogg Opus 有损压缩；
+storage_mono 开启时写入前混为单声道。调用方一律按 number 解析文件，不假定扩展名。
+
+直接运行本文件可把现有音频库批量转换为当前配置的格式：
+    python audio_files.py [wav|flac|opus] [--mono|--stereo]
+"""
+import os
+import tempfile
+from config_loader import app_config
+
+# 格式名 -> (扩展名, soundfile 容器格式, 编码)
+STORAGE_FORMATS = {
+    'wav': ('.wav', 'WAV', 'PCM_16'),
+    'flac': ('.flac', 'FLAC', 'PCM_16'),
+    'opus': ('.opus', 'OGG', 'OPUS'),
+}
+EXT_FORMATS = {ext: (container, subtype) for ext, container, subtype in STORAGE_FORMATS.values()}
+AUDIO_EXTS = tuple(EXT_FORMATS)
+
+def parse_audio_filename(filename, speed_names=None):
+    """
+    解析音频文件名
+
+    Args:
+        filename: 文件名（不含目录）
+        speed_names: 允许的慢速后缀集合（如 {'0.5', '0.75'}），None 表示使用配置
+
+    Returns:
+        (number, speed) 元组，原速文件 speed 为 None；不是录音文件时返回 None
+    """
+    name, ext = os.path.splitext(filename)
+    if ext.lower() not in EXT_FORMATS:
+        return None
+    if speed_names is None:
+        speed_names = {str(s) for s in app_config.slow_speeds}
+    if '@' in name:
+        number_part, speed = name.split('@', 1)
+        if speed not in speed_names:
+            return None
+    else:
+        number_part, speed = name, None
+    if not number_part.isdigit():
+        return None
+    return int(number_part), speed
+
+def storage_extension(storage_format=None):
+    storage_format = storage_format or app_config.storage_format
+    return STORAGE_FORMATS.get(storage_format, STORAGE_FORMATS['wav'])[0]
+
+def audio_path(number, speed=None, save_dir=None, storage_format=None):
+    """按当前存储格式返回写入路径（不检查是否存在）"""
+    save_dir = save_dir or app_config.save_dir
+    suffix = f"@{speed}" if speed is not None else ""
+    return os.path.join(save_dir, f"{number}{suffix}{storage_extension(storage_format)}")
+
+def find_audio_file(number, speed=None, save_dir=None):
+    """
+    按 number（和 speed）查找已存在的音频文件，优先当前存储格式
+
+    Returns:
+        文件路径，不存在时返回 None
+    """
+    save_dir = save_dir or app_config.save_dir
+    suffix = f"@{speed}" if speed is not None else ""
+    preferred = storage_extension()
+    for ext in (preferred,) + tuple(e for e in AUDIO_EXTS if e != preferred):
+        path = os.path.join(save_dir, f"{number}{suffix}{ext}")
+        if os.path.exists(path):
+            return path
+    return None
+
+def write_audio_file(path, data, samplerate, mono=None):
+    """
+    按扩展名对应的格式写入音频（path 可带 .tmp 后缀，格式取自去掉 .tmp 后的扩展名）
+
+    Args:
+        data: (frames, channels) 或一维 float 数组
+        mono: 是否混为单声道，None 表示使用 [Audio] storage_mono
+    """
+    import soundfile as sf
+
+    target = path[:-len('.tmp')] if path.endswith('.tmp') else path
+    container, subtype = EXT_FORMATS.get(os.path.splitext(target)[1].lower(), EXT_FORMATS['.wav'])
+    mono = app_config.storage_mono if mono is None else mono
+    if mono and getattr(data, 'ndim', 1) == 2 and data.shape[1] > 1:
+        data = data.mean(axis=1)
+    sf.write(path, data, samplerate, format=container, subtype=subtype)
+
+def playback_fallback_path(path):
+    """
+    系统解码器不支持该格式时（如未安装 Opus 扩展），解码为临时 WAV 供播放
+
+    临时文件按源文件名缓存，源文件更新后重新解码。失败时返回 None。
+    """
+    import soundfile as sf
+
+    cache_dir = os.path.join(tempfile.gettempdir(), 'enread_playback')
+    fallback = os.path.join(cache_dir, os.path.basename(path) + '.wav')
+    try:
+        if os.path.exists(fallback) and os.path.getmtime(fallback) >= os.path.getmtime(path):
+            return fallback
+        os.makedirs(cache_dir, exist_ok=True)
+        data, samplerate = sf.read(path, dtype='float32')
+        sf.write(fallback, data, samplerate, format='WAV', subtype='PCM_16')
+        return fallback
+    except Exception as e:
+        print(f"[AudioFiles] Warning: failed to decode {os.path.basename(path)} for playback: {e}")
+        return None
+
+def scan_audio_dir(save_dir=None):
+    """
+    单次 os.scandir 遍历音频目录
+
+    Returns:
+        dict: {number: {'main': 原速文件路径或 None, 'files': [该 number 的全部文件路径]}}
+    """
+    save_dir = save_dir or app_config.save_dir
+    speed_names = {str(s) for s in app_config.slow_speeds}
+    index = {}
+    if not os.path.isdir(save_dir):
+        return index
+    with os.scandir(save_dir) as entries:
+        for entry in entries:
+            if not entry.is_file():
+                continue
+            parsed = parse_audio_filename(entry.name, speed_names)
+            if parsed is None:
+                continue
+            number, speed = parsed
+            item = index.setdefault(number, {'main': None, 'files': []})
+            item['files'].append(entry.path)
+            if speed is None:
+                item['main'] = entry.path
+    return index
+
+def remove_audio_files(numbers, save_dir=None, index=None):
+    """
+    删除一批 number 的全部音频文件（原速 + 慢速版本）
+
+    Args:
+        numbers: 要删除的 number 集合
+        save_dir: 音频目录，默认读取配置
+        index: scan_audio_dir 的结果；已扫描过时传入可避免再次遍历目录
+
+    Returns:
+        int: 实际删除的文件数
+    """
+    numbers = set(numbers)
+    if not numbers:
+        return 0
+    if index is None:
+        index = scan_audio_dir(save_dir)
+    removed = 0
+    for number in numbers:
+        item = index.get(number)
+        if not item:
+            continue
+        for path in item['files']:
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                print(f"[AudioFiles] Warning: failed to delete file {os.path.basename(path)}, reason: {e}")
+    return removed
+
+def remove_number_files(number, save_dir=None):
+    """
+    删除单个 number 的全部音频文件（任意格式的原速 + 慢速版本）
+
+    按文件名逐个尝试，不遍历目录；批量删除用 remove_audio_files。
+
+    Returns:
+        int: 实际删除的文件数
+    """
+    save_dir = save_dir or app_config.save_dir
+    removed = 0
+    for speed in [None] + [str(s) for s in app_config.slow_speeds]:
+        suffix = f"@{speed}" if speed is not None else ""
+        for ext in AUDIO_EXTS:
+            path = os.path.join(save_dir, f"{number}{suffix}{ext}")
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                print(f"[AudioFiles] Warning: failed to delete file {os.path.basename(path)}, reason: {e}")
+    return removed
+
+def convert_library(storage_format=None, mono=None, save_dir=None):
+    """
+    把音频目录中的全部录音（含慢速版本）转换为指定格式
+
+    每个文件先写 .tmp 再原子替换，扩展名变化时删除旧文件；已是目标格式的文件跳过。
+    请在 UI 与主程序都退出后运行。
+
+    Returns:
+        (转换的文件数, 转换前总字节数, 转换后总字节数)
+    """
+    import soundfile as sf
+
+    storage_format = storage_format or app_config.storage_format
+    mono = app_config.storage_mono if mono is None else mono
+    target_ext = storage_extension(storage_format)
+    converted = before = after = 0
+    for number, item in sorted(scan_audio_dir(save_dir).items()):
+        for path in item['files']:
+            size = os.path.getsize(path)
+            before += size
+            try:
+                info = sf.info(path)
+                ext = os.path.splitext(path)[1].lower()
+                if ext == target_ext and info.subtype == EXT_FORMATS[ext][1] and (not mono or info.channels == 1):
+                    after += size
+                    continue
+                data, samplerate = sf.read(path, dtype='float32', always_2d=True)
+                target = os.path.splitext(path)[0] + target_ext
+                write_audio_file(target + '.tmp', data, samplerate, mono=mono)
+                os.replace(target + '.tmp', target)
+                if target != path:
+                    os.remove(path)
+                after += os.path.getsize(target)
+                converted += 1
+            except Exception as e:
+                after += size
+                print(f"[AudioFiles] Warning: failed to convert {os.path.basename(path)}: {e}")
+        if converted and converted % 100 == 0:
+            print(f"[AudioFiles] Converted {converted} files...")
+    return converted, before, after
+
+if __name__ == "__main__":
+    import sys
+    args = sys.argv[1:]
+    fmt = next((a for a in args if a in STORAGE_FORMATS), None)
+    mono_arg = True if '--mono' in args else False if '--stereo' in args else None
+    count, size_before, size_after = convert_library(fmt, mono_arg)
+    ratio = size_before / size_after if size_after else 0
+    print(f"[AudioFiles] Converted {count} files: {size_before / 1024 / 1024:.1f} MB -> "
+          f"{size_after / 1024 / 1024:.1f} MB ({ratio:.1f}x smaller)")
@@ -6,9 +6,13 @@ import os
 from PyQt6.QtCore import QObject, QUrl, QTimer, pyqtSignal
 from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput, QMediaDevices
 from config_loader import app_config
+from variant_cache import get_variant_cache
+from audio_files import find_audio_file, playback_fallback_path
 
 class AudioPlayer(QObject):
     state_changed = pyqtSignal(QMediaPlayer.PlaybackState)
+    # 慢速版本缓存在工作线程中生成完成，经信号回到 UI 线程
+    _variants_generated = pyqtSignal(int)
 
     def __init__(self):
         super().__init__()
@@ -24,6 +28,10 @@ class AudioPlayer(QObject):
         self.player.errorOccurred.connect(self._on_error)
         self.playback_queue = []
         self.current_queue_index = 0
+        self._current_file = None
+        # mode1 等待慢速版本生成的播放请求 (number, clear_queue, loop_count)
+        self._deferred_play = None
+        self._variants_generated.connect(self._on_variants_generated)
 
     def _update_audio_output(self):
         default_device = QMediaDevices.defaultAudioOutput()
@@ -49,7 +57,34 @@ class AudioPlayer(QObject):
             loop_count: 可选，覆盖配置的循环次数（用于 Alt 触发播放）
         """
         self._update_audio_output()
+        # 新的播放请求取代仍在等待慢速版本的旧请求
+        self._deferred_play = None
         mode = app_config.play_last_mode
+        if mode == 'mode1' and app_config.slow_generate_versions and app_config.slow_on_demand \
+                and self._request_variants(number, clear_queue, loop_count):
+            return
+        self._play_sequence(number, mode, clear_queue, loop_count)
+
+    def _request_variants(self, number, clear_queue, loop_count):
+        """
+        按需生成慢速版本：缺失时排队生成并推迟播放，返回是否已推迟
+        """
+        cache = get_variant_cache()
+        if cache.is_complete(number) or find_audio_file(number) is None:
+            return False
+        self._deferred_play = (number, clear_queue, loop_count)
+        cache.request(number, self._variants_generated.emit)
+        return True
+
+    def _on_variants_generated(self, number):
+        if self._deferred_play is None or self._deferred_play[0] != number:
+            return
+        _, clear_queue, loop_count = self._deferred_play
+        self._deferred_play = None
+        # 生成失败时播放已有的文件，不再重试
+        self._play_sequence(number, app_config.play_last_mode, clear_queue, loop_count)
+
+    def _play_sequence(self, number, mode, clear_queue, loop_count):
         new_sequence = self._get_sequence_for_number(number, mode, loop_count)
         if clear_queue:
             self.player.stop()
@@ -79,20 +114,15 @@ class AudioPlayer(QObject):
             mode: 播放模式 (mode1 或 mode2)
             loop_count: 可选，覆盖配置的循环次数
         """
-        audio_dir = app_config.save_dir
-        base_path = os.path.join(audio_dir, f"{number}.wav")
+        base_path = find_audio_file(number)
         if mode == 'mode1':
-            speeds = [0.5, 0.75]
-            files = []
-            for s in speeds:
-                fpath = os.path.join(audio_dir, f"{number}@{s}.wav")
-                if os.path.exists(fpath):
-                    files.append(fpath)
-            if os.path.exists(base_path):
+            # 从慢到快播放已有的慢速版本（同时更新缓存的最近使用时间）
+            files = get_variant_cache().get_variants(number)
+            if base_path:
                 files.append(base_path)
             return files
         else:
-            if os.path.exists(base_path):
+            if base_path:
                 count = loop_count if loop_count is not None else app_config.play_mode2_loop_count
                 return [base_path] * count
             return []
@@ -101,11 +131,12 @@ class AudioPlayer(QObject):
         if self.current_queue_index < len(self.playback_queue):
             next_file = self.playback_queue[self.current_queue_index]
             self.current_queue_index += 1
+            self._current_file = next_file
             self.player.setSource(QUrl.fromLocalFile(next_file))
             self.audio_output.setVolume(1.0)
             self.player.play()
         else:
-            self.stop()
+            self._stop_queue()
 
     def toggle_playback(self):
         if self.player.playbackState() == QMediaPlayer.PlaybackState.PlayingState:
@@ -116,6 +147,11 @@ class AudioPlayer(QObject):
             self.play(self.current_number)
 
     def stop(self):
+        self._deferred_play = None
+        self._stop_queue()
+
+    def _stop_queue(self):
+        # 队列播完时只停止当前队列，不取消等待慢速版本的请求
         self.player.stop()
         self.current_number = None
         self.playback_queue = []
@@ -129,6 +165,16 @@ class AudioPlayer(QObject):
 
     def _on_error(self):
         print(f"Player Error: {self.player.errorString()}")
+        # 系统缺少 FLAC/Opus 解码器时，解码为临时 WAV 重新播放当前文件
+        source = self._current_file
+        self._current_file = None
+        if source and not source.lower().endswith('.wav'):
+            fallback = playback_fallback_path(source)
+            if fallback:
+                print(f"Player Retrying with decoded WAV: {os.path.basename(source)}")
+                self.player.setSource(QUrl.fromLocalFile(fallback))
+                self.player.play()
+                return
         self.play_next_in_queue()
 
     def is_playing(self, number):
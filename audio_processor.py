@@ -1,89 +1,192 @@
+"""
+audio_processor.py - 慢速版本生成
+包含: slow_output_paths, generate_slow_audio, probe_ffmpeg, ffmpeg_stretch_files
+
+两个后端（[SlowAudio] backend）：
+- numpy（默认）：进程内 WSOLA（time_stretch.py），可直接使用录音器内存中的缓冲区，
+  一次调用渲染全部速度，不依赖 FFmpeg，也没有子进程启动开销
+- ffmpeg：rubberband 滤镜（高质量），不可用时回退 atempo；需要安装 FFmpeg
+  每个进程只探测一次 FFmpeg 路径和滤镜列表，每条录音只启动一次 FFmpeg（asplit 多路输出）
+"""
 import os
 import subprocess
 import shutil
+import threading
+from config_loader import app_config
+from audio_files import write_audio_file
+
+def slow_output_paths(input_path, speeds):
+    """{number}.{ext} -> {speed: {number}@{speed}.{ext}}，慢速版本与原速文件格式相同"""
+    dirname = os.path.dirname(input_path)
+    name_without_ext, ext = os.path.splitext(os.path.basename(input_path))
+    return {speed: os.path.join(dirname, f"{name_without_ext}@{speed}{ext}") for speed in speeds}
 
-def generate_slow_audio(input_path, speeds=[0.5, 0.75]):
+def generate_slow_audio(input_path, speeds=[0.5, 0.75], samples=None, samplerate=None):
     """
-    Generates slow versions of the input audio file using FFmpeg.
-    Prioritizes 'rubberband' filter for high quality, falls back to 'atempo'.
+    生成慢速版本
 
     Args:
-        input_path (str): Path to the original audio file.
-        speeds (list): List of speed factors (e.g., [0.5, 0.75]).
+        input_path (str): 原速文件路径，输出写到同目录的 {number}@{speed}.{ext}
+        speeds (list): 速度列表（如 [0.5, 0.75]）
+        samples: 可选，原速音频的 float32 数组 (frames, channels)，提供时 numpy 后端不再读文件
+        samplerate: samples 的采样率
+
+    Returns:
+        list: 生成的文件路径
     """
     if not os.path.exists(input_path):
         print(f"[AudioProcessor] Input file not found: {input_path}")
-        return
-
-    ffmpeg_cmd = shutil.which("ffmpeg")
-    if not ffmpeg_cmd:
-        print("[AudioProcessor] FFmpeg not found! Please install FFmpeg to generate slow audio.")
-        return
+        return []
 
+    outputs = slow_output_paths(input_path, speeds)
+    if app_config.slow_backend == 'ffmpeg':
+        return ffmpeg_stretch_files(input_path, outputs)
     try:
-        # Parse filename
-        # New Format: {number}.wav -> {number}@{speed}.wav
-        dirname = os.path.dirname(input_path)
-        filename = os.path.basename(input_path)
-        name_without_ext = os.path.splitext(filename)[0]
-        ext = os.path.splitext(filename)[1]
-
-        generated_files = []
-
-        for speed in speeds:
-            new_filename = f"{name_without_ext}@{speed}{ext}"
-            output_path = os.path.join(dirname, new_filename)
-
-            # 1. Try Rubberband (High Quality)
-            success = False
-            try:
-                # rubberband=tempo=X
-                cmd = [
-                    ffmpeg_cmd, '-y', '-v', 'error',
-                    '-i', input_path,
-                    '-af', f'rubberband=tempo={speed}',
-                    output_path
-                ]
-                # We capture output to check for errors (like "No such filter")
-                result = subprocess.run(cmd, capture_output=True, text=True)
-
-                if result.returncode == 0:
-                    print(f"[AudioProcessor] Generated (Rubberband): {new_filename}")
-                    success = True
-                else:
-                    # If failed (e.g. filter not available), log and fall through
-                    # print(f"[AudioProcessor] Rubberband filter failed: {result.stderr.strip()}")
-                    pass
-
-            except Exception as e:
-                print(f"[AudioProcessor] Error trying rubberband: {e}")
-
-            # 2. Fallback to Atempo (Standard Quality)
-            if not success:
-                try:
-                    # atempo supports 0.5 to 2.0
-                    cmd = [
-                        ffmpeg_cmd, '-y', '-v', 'error',
-                        '-i', input_path,
-                        '-af', f'atempo={speed}',
-                        output_path
-                    ]
-                    subprocess.run(cmd, check=True, capture_output=True)
-                    print(f"[AudioProcessor] Generated (Atempo): {new_filename}")
-                    success = True
+        return _numpy_stretch_files(input_path, outputs, samples, samplerate)
+    except Exception as e:
+        print(f"[AudioProcessor] NumPy time-stretch failed: {e}, falling back to FFmpeg")
+        return ffmpeg_stretch_files(input_path, outputs)
+
+def _numpy_stretch_files(input_path, outputs, samples=None, samplerate=None):
+    import soundfile as sf
+    from time_stretch import stretch_all
+
+    if samples is None:
+        samples, samplerate = sf.read(input_path, dtype='float32', always_2d=True)
+    rendered = stretch_all(samples, list(outputs), samplerate)
+    generated_files = []
+    for speed, output_path in outputs.items():
+        tmp_path = output_path + ".tmp"
+        write_audio_file(tmp_path, rendered[speed], samplerate)
+        os.replace(tmp_path, output_path)
+        generated_files.append(output_path)
+        print(f"[AudioProcessor] Generated (WSOLA): {os.path.basename(output_path)}")
+    return generated_files
+
+_ffmpeg_probe = None
+_ffmpeg_probe_lock = threading.Lock()
 
+def probe_ffmpeg():
+    """
+    查找 FFmpeg 并读取可用滤镜（每个进程只执行一次）
+
+    Returns:
+        (ffmpeg 路径, 滤镜名集合)；未安装时为 (None, 空集合)
+    """
+    global _ffmpeg_probe
+    with _ffmpeg_probe_lock:
+        if _ffmpeg_probe is None:
+            ffmpeg_cmd = shutil.which("ffmpeg")
+            filters = set()
+            if ffmpeg_cmd:
+                try:
+                    result = subprocess.run([ffmpeg_cmd, '-hide_banner', '-filters'],
+                                            capture_output=True, text=True, timeout=10)
+                    for line in result.stdout.splitlines():
+                        # " ..C atempo            A->A       Adjust audio tempo."
+                        parts = line.split()
+                        if len(parts) >= 3 and '->' in parts[2]:
+                            filters.add(parts[1])
                 except Exception as e:
-                    print(f"[AudioProcessor] Failed to generate {speed}x version: {e}")
+                    print(f"[AudioProcessor] FFmpeg filter probe failed: {e}")
+                print(f"[AudioProcessor] FFmpeg: {ffmpeg_cmd}, rubberband={'rubberband' in filters}")
+            _ffmpeg_probe = (ffmpeg_cmd, filters)
+        return _ffmpeg_probe
 
-            if success:
-                generated_files.append(output_path)
+def _mark_filter_unavailable(name):
+    global _ffmpeg_probe
+    with _ffmpeg_probe_lock:
+        if _ffmpeg_probe is not None:
+            _ffmpeg_probe = (_ffmpeg_probe[0], _ffmpeg_probe[1] - {name})
 
-        return generated_files
+def _atempo_chain(speed):
+    """atempo 单级只支持 0.5~2.0，超出范围时串联多级"""
+    stages = []
+    while speed < 0.5:
+        stages.append("atempo=0.5")
+        speed /= 0.5
+    while speed > 2.0:
+        stages.append("atempo=2.0")
+        speed /= 2.0
+    stages.append(f"atempo={speed}")
+    return ",".join(stages)
 
-    except Exception as e:
-        print(f"[AudioProcessor] Error processing {input_path}: {e}")
+def _build_filter_graph(speeds, use_rubberband):
+    """一次解码，asplit 分成 N 路，每路一个变速滤镜，输出标签 [o0]..[oN-1]"""
+    chains = [f"rubberband=tempo={speed}" if use_rubberband else _atempo_chain(speed) for speed in speeds]
+    if len(speeds) == 1:
+        return f"[0:a]{chains[0]}[o0]"
+    split = f"[0:a]asplit={len(speeds)}" + "".join(f"[s{i}]" for i in range(len(speeds)))
+    branches = [f"[s{i}]{chain}[o{i}]" for i, chain in enumerate(chains)]
+    return ";".join([split] + branches)
+
+# 输出扩展名 -> FFmpeg 编码参数（与 audio_files.STORAGE_FORMATS 对应）
+_FFMPEG_OUTPUT_ARGS = {
+    '.wav': ['-c:a', 'pcm_s16le', '-f', 'wav'],
+    '.flac': ['-c:a', 'flac', '-sample_fmt', 's16', '-f', 'flac'],
+    '.opus': ['-c:a', 'libopus', '-f', 'ogg'],
+}
+
+def _ffmpeg_output_args(output_path):
+    ext = os.path.splitext(output_path)[1].lower()
+    args = list(_FFMPEG_OUTPUT_ARGS.get(ext, _FFMPEG_OUTPUT_ARGS['.wav']))
+    if app_config.storage_mono:
+        args = ['-ac', '1'] + args
+    return args
+
+def ffmpeg_stretch_files(input_path, outputs):
+    """
+    用一次 FFmpeg 调用生成全部慢速版本：优先 'rubberband'（按探测结果），否则 'atempo'
+
+    各输出先写 .tmp，成功后原子替换。rubberband 实际运行失败时改用 atempo 重试一次，
+    并在本进程内不再尝试 rubberband。
+
+    Args:
+        outputs: {speed: output_path}
+
+    Returns:
+        list: 生成的文件路径
+    """
+    ffmpeg_cmd, filters = probe_ffmpeg()
+    if not ffmpeg_cmd:
+        print("[AudioProcessor] FFmpeg not found! Please install FFmpeg to generate slow audio.")
         return []
+    if not outputs:
+        return []
+
+    speeds = list(outputs)
+    use_rubberband = 'rubberband' in filters
+    while True:
+        cmd = [ffmpeg_cmd, '-y', '-v', 'error', '-i', input_path,
+               '-filter_complex', _build_filter_graph(speeds, use_rubberband)]
+        for i, speed in enumerate(speeds):
+            cmd += ['-map', f'[o{i}]'] + _ffmpeg_output_args(outputs[speed]) + [outputs[speed] + ".tmp"]
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True)
+        except Exception as e:
+            print(f"[AudioProcessor] Error running FFmpeg: {e}")
+            return []
+        if result.returncode == 0:
+            break
+        if use_rubberband:
+            print(f"[AudioProcessor] Rubberband failed, retrying with atempo: {result.stderr.strip()}")
+            _mark_filter_unavailable('rubberband')
+            use_rubberband = False
+            continue
+        print(f"[AudioProcessor] Failed to generate slow versions of {os.path.basename(input_path)}: {result.stderr.strip()}")
+        for path in outputs.values():
+            if os.path.exists(path + ".tmp"):
+                os.remove(path + ".tmp")
+        return []
+
+    generated_files = []
+    label = "Rubberband" if use_rubberband else "Atempo"
+    for speed in speeds:
+        os.replace(outputs[speed] + ".tmp", outputs[speed])
+        generated_files.append(outputs[speed])
+        print(f"[AudioProcessor] Generated ({label}): {os.path.basename(outputs[speed])}")
+    return generated_files
 
 if __name__ == "__main__":
     # Test
-    pass
\ No newline at end of file
+    pass
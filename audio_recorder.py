@@ -2,40 +2,82 @@ import os
 import threading
 import time
 import numpy as np
-import soundcard as sc
-import soundfile as sf
 import re
 import socket
+import queue
 from datetime import datetime
 from config_loader import app_config
 from db_manager import DatabaseManager
 from audio_processor import generate_slow_audio
-from text_processor import is_valid_word, extract_letter_sequence
+from capture_service import get_capture_service, SAMPLERATE, CHANNELS, BLOCKSIZE
+from capture_spool import CaptureSpool, finalize_spool_audio
+from audio_files import audio_path, write_audio_file, remove_number_files
+from vad import create_detector
 
-def get_loopback_mic():
+# 保存时首尾各补的静音时长（秒）
+PAD_SECONDS = 0.3
+
+def send_ui_message(message):
+    """向 UI 进程的 CommandServer 发送一条消息，UI 未运行时静默失败"""
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            s.settimeout(1.0)
+            s.connect(('127.0.0.1', 65432))
+            s.sendall(message.encode('utf-8'))
+        return True
+    except Exception:
+        return False
+
+class SlowVariantWorker(threading.Thread):
     """
-    获取当前默认输出设备的 Loopback 设备
+    慢速版本后台生成
 
-    Returns:
-        loopback mic 对象，失败时返回 None
+    录音保存流程：提交数据库记录 → 写 1x 文件 → 立即通知 UI（UPDATE:{number}）→
+    在此线程中生成慢速版本，完成后再发送 VARIANTS:{number}。
+    同一 number 在队列中只保留一个任务。
     """
-    try:
-        default_speaker = sc.default_speaker()
-        print(f"[Recorder] Default Speaker: {default_speaker.name}")
-        all_mics = sc.all_microphones(include_loopback=True)
-        physical_mics_ids = [m.id for m in sc.all_microphones(include_loopback=False)]
-        loopback_candidates = [m for m in all_mics if m.id not in physical_mics_ids]
-        for mic in loopback_candidates:
-            if mic.name == default_speaker.name:
-                return mic
-        fallback = sc.get_microphone(id=str(default_speaker.name), include_loopback=True)
-        if fallback.id in [m.id for m in loopback_candidates]:
-            return fallback
-        print("[Recorder] Warning: Could not confirm loopback device identity. Using fallback.")
-        return fallback
-    except Exception as e:
-        print(f"[Recorder] Error finding loopback: {e}")
-        return None
+
+    def __init__(self):
+        super().__init__(name="SlowVariantWorker", daemon=True)
+        self._queue = queue.Queue()
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def submit(self, number, filepath_1x, samples=None, samplerate=None):
+        """
+        Args:
+            samples: 可选，1x 音频在内存中的数组；提供时变速直接使用，不再读文件
+        """
+        with self._lock:
+            if number in self._pending:
+                return
+            self._pending.add(number)
+        self._queue.put((number, filepath_1x, samples, samplerate))
+
+    def run(self):
+        while True:
+            number, filepath_1x, samples, samplerate = self._queue.get()
+            with self._lock:
+                self._pending.discard(number)
+            try:
+                started = time.time()
+                slow_files = generate_slow_audio(filepath_1x, app_config.slow_speeds, samples, samplerate) or []
+                print(f"[Recorder] Slow versions for #{number} ready in {time.time() - started:.2f}s ({len(slow_files)} files)")
+                send_ui_message(f"VARIANTS:{number}")
+            except Exception as e:
+                print(f"[Recorder] Warning: slow version generation failed for #{number}: {e}")
+
+_variant_worker = None
+_variant_worker_lock = threading.Lock()
+
+def get_variant_worker():
+    """进程内唯一的慢速版本生成线程，首次调用时启动"""
+    global _variant_worker
+    with _variant_worker_lock:
+        if _variant_worker is None:
+            _variant_worker = SlowVariantWorker()
+            _variant_worker.start()
+        return _variant_worker
 
 class AudioRecorder(threading.Thread):
     def __init__(self, content, start_silence_duration=None):
@@ -50,67 +92,94 @@ class AudioRecorder(threading.Thread):
         super().__init__()
         self.content = content
         self.running = True
-        self.audio_data = []
-        self.samplerate = 48000
-        self.channels = 2
-        self.blocksize = 4800
+        self.samplerate = SAMPLERATE
+        self.channels = CHANNELS
+        self.blocksize = BLOCKSIZE
+        self.pad_samples = int(PAD_SECONDS * self.samplerate)
         self.start_time = None
         self.has_sound_started = False
-        self.silence_start_time = None
         # 支持自定义超时，若未指定则使用配置值
         self.start_silence_duration = start_silence_duration if start_silence_duration is not None else app_config.start_silence_duration
         self.max_duration = app_config.max_recording_duration
         self.silence_threshold_db = app_config.silence_threshold_db
-        self.end_silence_duration = app_config.end_silence_duration
         self.save_dir = app_config.save_dir
         self.db_manager = DatabaseManager()
+        # 预分配录音缓冲区：[前置静音 | 最长录音 + 两个块（起音前一块、超时判定的一块） | 后置静音]
+        # 录制时按块写入 _frames 位置，保存时在原地裁剪/增益，不再拼接副本
+        max_blocks = int(np.ceil(self.max_duration * self.samplerate / self.blocksize)) + 2
+        self.capacity = max_blocks * self.blocksize
+        # stream_to_disk 时块直接追加到磁盘暂存文件，不分配内存缓冲区
+        self.stream_to_disk = app_config.stream_to_disk
+        self.spool = None
+        self.buffer = None
+        if not self.stream_to_disk:
+            self.buffer = np.zeros((self.pad_samples * 2 + self.capacity, self.channels), dtype=np.float32)
+        self._frames = 0
+        # 裁剪边界：逐块包络中首个 / 最后一个超过阈值的帧（相对录音起点），None 表示尚无声音
+        # 自适应 VAD 可用时，保存前改用其语音帧范围（与分段同一噪声底）
+        self._first_loud = None
+        self._last_loud = None
+        self._thresh_linear = 10 ** (self.silence_threshold_db / 20)
+        self.detector = None
+        # 录音起点（缓冲区第 0 帧）对应检测器输入中的样本位置
+        self._vad_origin = 0
 
     def run(self):
+        # 录音开始 / 结束通知 UI 进程，空闲维护在此期间暂停
+        self._send_ui_message("RECORDING_START")
+        try:
+            self._record()
+        finally:
+            self._send_ui_message("RECORDING_END")
+
+    def _record(self):
         print("[Recorder] Starting recording process...")
         try:
-            mic = get_loopback_mic()
-            if not mic:
-                print("[Recorder] Error: Could not find loopback device.")
-                return
-            print(f"[Recorder] Recording from Loopback: {mic.name}")
-            with mic.recorder(samplerate=self.samplerate) as recorder:
+            # 订阅共享采集流；预录缓冲让录音可以从启动前几百毫秒开始
+            with get_capture_service().subscribe(preroll=True) as subscription:
                 self.start_time = time.time()
+                previous = None
+                # 语音检测与结束静音计时都按读取到的音频时长（队列中的块可能集中到达，墙钟不准确）
+                detector = self.detector = create_detector(self.samplerate)
+                fed = 0
                 while self.running:
-                    data = recorder.record(numframes=self.blocksize)
-                    rms = np.sqrt(np.mean(data**2))
-                    db = 20 * np.log10(rms + 1e-9)
-                    current_time = time.time()
-                    elapsed = current_time - self.start_time
+                    data = subscription.read(timeout=0.5)
+                    elapsed = time.time() - self.start_time
+                    if data is None:
+                        if not self.has_sound_started and elapsed > self.start_silence_duration:
+                            print("[Recorder] Timeout: No sound detected.")
+                            return
+                        continue
+                    speech = detector.update(data)
+                    fed += len(data)
                     if not self.has_sound_started:
-                        if db > self.silence_threshold_db:
+                        if speech:
                             self.has_sound_started = True
                             print("[Recorder] Sound detected! Recording...")
-                            self.audio_data.append(data)
-                            self.silence_start_time = None
+                            self._vad_origin = fed - len(data)
+                            # 声音可能始于上一块的末尾（整块未判定为语音），一并保留，保存时再裁剪
+                            if previous is not None:
+                                self._vad_origin -= len(previous)
+                                self._append_block(previous)
+                            self._append_block(data)
                         else:
                             if elapsed > self.start_silence_duration:
                                 print("[Recorder] Timeout: No sound detected.")
                                 return
-                            pass
+                            previous = data
                     else:
-                        self.audio_data.append(data)
-                        recorded_duration = (len(self.audio_data) * self.blocksize) / self.samplerate
-                        if recorded_duration > self.max_duration:
+                        self._append_block(data)
+                        recorded_duration = self._frames / self.samplerate
+                        if recorded_duration > self.max_duration or self._frames + self.blocksize > self.capacity:
                             print("[Recorder] Max duration reached.")
                             break
-                        if db < self.silence_threshold_db:
-                            if self.silence_start_time is None:
-                                self.silence_start_time = current_time
-
-                            elif (current_time - self.silence_start_time) >= self.end_silence_duration:
-                                print("[Recorder] End silence detected.")
-                                break
-                        else:
-                            self.silence_start_time = None
+                        if detector.utterance_ended():
+                            print(f"[Recorder] End silence detected ({detector.silence_time:.2f}s).")
+                            break
         except Exception as e:
             print(f"[Recorder] Error: {e}")
             return
-        if self.audio_data:
+        if self._frames:
             self.save_file()
         else:
             print("[Recorder] No audio data captured.")
@@ -118,117 +187,138 @@ class AudioRecorder(threading.Thread):
     def stop(self):
         self.running = False
 
+    def _append_block(self, data):
+        """
+        把一个块写入预分配缓冲区，并用该块的包络更新裁剪边界
+
+        包络与原先的整段裁剪一致：各声道绝对值的均值超过阈值的帧视为有声。
+        """
+        n = min(len(data), self.capacity - self._frames)
+        if n <= 0:
+            return
+        if self.stream_to_disk:
+            if self.spool is None:
+                self.spool = CaptureSpool(self.content, self.samplerate, self.channels, self.save_dir)
+            block = data[:n]
+            self.spool.write(block)
+        else:
+            start = self.pad_samples + self._frames
+            block = self.buffer[start:start + n]
+            block[:] = data[:n]
+        loud = np.flatnonzero(np.abs(block).mean(axis=1) > self._thresh_linear)
+        if loud.size:
+            if self._first_loud is None:
+                self._first_loud = self._frames + int(loud[0])
+            self._last_loud = self._frames + int(loud[-1])
+        self._frames += n
+
+    def _apply_vad_bounds(self):
+        """用检测器的语音帧范围替换包络裁剪边界（固定阈值模式下检测器返回 None，保持包络结果）"""
+        bounds = self.detector.speech_bounds() if self.detector is not None else None
+        if bounds is None:
+            return
+        first = max(0, bounds[0] - self._vad_origin)
+        end = min(self._frames, bounds[1] - self._vad_origin)
+        if end > first:
+            self._first_loud, self._last_loud = first, end - 1
+
     def save_file(self):
-        full_data = np.concatenate(self.audio_data, axis=0)
-        thresh_linear = 10**(self.silence_threshold_db / 20)
-        mono = np.mean(np.abs(full_data), axis=1)
-        mask = mono > thresh_linear
-        if not np.any(mask):
+        if self._first_loud is not None:
+            self._apply_vad_bounds()
+        if self._first_loud is None:
             print("[Recorder] Warning: Audio seems silent after capture.")
+            if self.spool is not None:
+                self.spool.discard()
             return
-        indices = np.where(mask)[0]
-        start_idx = indices[0]
-        end_idx = indices[-1]
-        trimmed = full_data[start_idx:end_idx+1]
-        max_val = np.max(np.abs(trimmed))
+        if self.spool is not None:
+            self._save_spool()
+            return
+        pad = self.pad_samples
+        start = pad + self._first_loud
+        end = pad + self._last_loud + 1
+        trimmed = self.buffer[start:end]
+        max_val = max(float(trimmed.max()), -float(trimmed.min()))
         if max_val > 0.01:
             target_peak = 0.9
             gain = target_peak / max_val
-            trimmed = trimmed * gain
+            trimmed *= gain
             print(f"[Recorder] Normalized audio (Gain: {gain:.2f}x)")
-        pad_samples = int(0.3 * self.samplerate)
-        silence_pad = np.zeros((pad_samples, self.channels), dtype=np.float32)
-        final_data = np.concatenate([silence_pad, trimmed, silence_pad], axis=0)
+        # 裁掉的首尾区域原地清零作为 0.3 秒静音填充，写文件用同一缓冲区的视图
+        self.buffer[start - pad:start] = 0
+        self.buffer[end:end + pad] = 0
+        final_data = self.buffer[start - pad:end + pad]
         try:
-            self._save_transaction_with_retry(final_data)
+            self._save_recording(lambda path: write_audio_file(path, final_data, self.samplerate), final_data)
         except Exception as e:
             print(f"[Recorder] Final save failed: {e}")
 
-    def _save_transaction_with_retry(self, final_data):
-        for attempt in range(app_config.db_retry_count):
-            try:
-                self._execute_save_transaction(final_data)
-                return
-            except Exception as e:
-                if "locked" in str(e).lower() and attempt < app_config.db_retry_count - 1:
-                    print(f"[Recorder] Transaction locked, retrying ({attempt+1})...")
-                    time.sleep(0.5)
-                    continue
-                raise e
-
-    def _execute_save_transaction(self, final_data):
-        conn = self.db_manager.get_connection()
-        generated_files = []
-        number = None  # 用于存储录音记录的 number
-        try:
-            cursor = conn.cursor()
-            date_str = datetime.now().strftime("%Y-%m-%d")
-
-            # Phase 1: Calculate letter sequence
-            letter_seq = extract_letter_sequence(self.content)
-
-            # ==================== 内容去重检测 ====================
-            existing_record = self.db_manager.get_recording_by_content(self.content)
-
-            if existing_record:
-                # 内容已存在，执行覆盖逻辑
-                number = existing_record['number']
-                print(f"[Recorder] 检测到重复内容，覆盖旧录音 #{number}")
-
-                # 删除旧的音频文件（1x 和变速版本）
-                self._delete_old_audio_files(number)
-
-                # 更新 date 字段为当天
-                cursor.execute(
-                    "UPDATE recordings SET date = ?, letter_sequence = ? WHERE number = ?",
-                    (date_str, letter_seq, number)
-                )
-                print(f"[Recorder] 已更新录音 #{number} 的日期为 {date_str}")
-
-            else:
-                # 内容不存在，插入新记录
-                cursor.execute(
-                    "INSERT INTO recordings (content, date, letter_sequence) VALUES (?, ?, ?)",
-                    (self.content, date_str, letter_seq)
-                )
-                number = cursor.lastrowid
-                print(f"[Recorder] 创建新录音记录 #{number}")
-
-                # 新记录：初始化单词复习字段
-                if is_valid_word(self.content):
-                    self._initialize_word_review_fields(cursor, number, date_str)
-            # ==================== 内容去重检测结束 ====================
+    def _save_spool(self):
+        """磁盘暂存的收尾：内存映射第二遍裁剪 / 归一化，原子替换为 {number}.{ext}"""
+        spool = self.spool
+        spool.close()
 
-            if not os.path.exists(self.save_dir):
-                os.makedirs(self.save_dir)
+        def write_audio(path):
+            # 内存映射只在写文件期间存在，返回后即释放（Windows 上才能删除 .part）
+            finalize_spool_audio(spool.view(), path, self.samplerate,
+                                 self._first_loud, self._last_loud, self.pad_samples)
 
-            filename_1x = f"{number}.wav"
-            filepath_1x = os.path.join(self.save_dir, filename_1x)
-            sf.write(filepath_1x, final_data, self.samplerate)
-            generated_files.append(filepath_1x)
+        try:
+            self._save_recording(write_audio)
+        except Exception as e:
+            # 暂存文件保留，下次启动时由 recover_spools 重试
+            print(f"[Recorder] Final save failed: {e}, spool kept for recovery")
+            return
+        spool.discard()
 
-            if app_config.slow_generate_versions:
-                slow_files = generate_slow_audio(filepath_1x, app_config.slow_speeds)
-                generated_files.extend(slow_files)
+    def _save_recording(self, write_audio, samples=None):
+        """
+        保存录音：先写入数据库记录（内容去重在写操作内完成），再写音频文件
 
-            conn.commit()
-            print(f"[Recorder] Successfully saved recording #{number}")
+        Args:
+            write_audio: write_audio(path) 把最终音频写入 path
+            samples: 可选，最终音频在内存中的数组，交给慢速版本生成避免重新读文件
 
-            # 通知 UI 并传递 number
-            self.notify_ui(number)
+        数据库写入走 DatabaseManager 的写通道（写服务或本地直连重试），
+        不再在文件写入和变速处理期间持有写事务。1x 文件写好后立即通知 UI，
+        慢速版本交给 SlowVariantWorker 在后台生成。1x 文件写入失败时回滚新建的记录。
+        """
+        date_str = datetime.now().strftime("%Y-%m-%d")
+        number, is_new = self.db_manager.save_recording(self.content, date_str)
+        if is_new:
+            print(f"[Recorder] 创建新录音记录 #{number}")
+        else:
+            # 内容已存在，执行覆盖逻辑：删除旧的音频文件（1x 和变速版本）
+            print(f"[Recorder] 检测到重复内容，覆盖旧录音 #{number}，日期更新为 {date_str}")
+            self._delete_old_audio_files(number)
 
+        filepath_1x = audio_path(number, save_dir=self.save_dir)
+        try:
+            if not os.path.exists(self.save_dir):
+                os.makedirs(self.save_dir)
+            write_audio(filepath_1x)
         except Exception as e:
-            conn.rollback()
-            print(f"Recording save failed: {e}, transaction rolled back")
-            for f in generated_files:
+            print(f"Recording save failed: {e}, cleaning up")
+            try:
+                if os.path.exists(filepath_1x):
+                    os.remove(filepath_1x)
+                    print(f"Rollback cleanup: deleted {filepath_1x}")
+            except Exception as cleanup_error:
+                print(f"Rollback cleanup warning: failed to delete {filepath_1x}, reason: {cleanup_error}")
+            if is_new:
                 try:
-                    if os.path.exists(f):
-                        os.remove(f)
-                        print(f"Rollback cleanup: deleted {f}")
-                except Exception as cleanup_error:
-                    print(f"Rollback cleanup warning: failed to delete {f}, reason: {cleanup_error}")
+                    self.db_manager.delete_recording(number)
+                except Exception as db_error:
+                    print(f"Rollback cleanup warning: failed to remove record #{number}, reason: {db_error}")
             raise e
 
+        print(f"[Recorder] Successfully saved recording #{number}")
+
+        # 通知 UI 并传递 number（mode2 只需 1x 文件即可开始播放）
+        self.notify_ui(number)
+
+        if app_config.slow_generate_versions and not app_config.slow_on_demand:
+            get_variant_worker().submit(number, filepath_1x, samples, self.samplerate)
+
     def _delete_old_audio_files(self, number):
         """
         删除指定 number 的旧音频文件（1x 和所有变速版本）
@@ -236,49 +326,10 @@ class AudioRecorder(threading.Thread):
         Args:
             number: 录音记录的 number
         """
-        # 1x 版本
-        filepath_1x = os.path.join(self.save_dir, f"{number}.wav")
-        if os.path.exists(filepath_1x):
-            try:
-                os.remove(filepath_1x)
-                print(f"[Recorder] 删除旧文件: {filepath_1x}")
-            except Exception as e:
-                print(f"[Recorder] Warning: 删除旧文件失败 {filepath_1x}: {e}")
-
-        # 变速版本
-        if app_config.slow_generate_versions:
-            for speed in app_config.slow_speeds:
-                slow_filepath = os.path.join(self.save_dir, f"{number}@{speed}.wav")
-                if os.path.exists(slow_filepath):
-                    try:
-                        os.remove(slow_filepath)
-                        print(f"[Recorder] 删除旧文件: {slow_filepath}")
-                    except Exception as e:
-                        print(f"[Recorder] Warning: 删除旧文件失败 {slow_filepath}: {e}")
-
-    def _initialize_word_review_fields(self, cursor, number, date_str):
-        """
-        初始化单词的复习相关字段
-
-        Args:
-            cursor: 数据库游标
-            number: 录音记录的 number
-            date_str: 当前日期字符串 (YYYY-MM-DD)
-        """
-        try:
-            cursor.execute("""
-                UPDATE recordings 
-                SET box_level = 1,
-                    next_review_date = ?,
-                    remember = 0,
-                    forget = 0,
-                    last_review_date = NULL
-                WHERE number = ?
-            """, (date_str, number))
-            print(f"[Recorder] 单词 '{self.content}' 已初始化复习字段 (box_level=1, next_review_date={date_str})")
-        except Exception as e:
-            # 初始化失败不影响录音保存，仅打印警告
-            print(f"[Recorder] Warning: 初始化单词复习字段失败: {e}")
+        # 1x 和变速版本，任意存储格式
+        removed = remove_number_files(number, self.save_dir)
+        if removed:
+            print(f"[Recorder] 删除旧文件: #{number} 共 {removed} 个")
 
     def notify_ui(self, number=None):
         """
@@ -287,16 +338,13 @@ class AudioRecorder(threading.Thread):
         Args:
             number: 录音记录的 number，用于指定自动播放的录音
         """
-        try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                s.settimeout(1.0)
-                s.connect(('127.0.0.1', 65432))
-                # 发送 UPDATE:{number} 格式的消息，让 UI 知道应该播放哪条录音
-                if number is not None:
-                    message = f"UPDATE:{number}"
-                else:
-                    message = "UPDATE"
-                s.sendall(message.encode('utf-8'))
-                print(f"[Recorder] Notified UI with message: {message}")
-        except Exception as e:
-            pass
\ No newline at end of file
+        # 发送 UPDATE:{number} 格式的消息，让 UI 知道应该播放哪条录音
+        if number is not None:
+            message = f"UPDATE:{number}"
+        else:
+            message = "UPDATE"
+        if self._send_ui_message(message):
+            print(f"[Recorder] Notified UI with message: {message}")
+
+    def _send_ui_message(self, message):
+        return send_ui_message(message)
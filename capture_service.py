@@ -0,0 +1,172 @@
+"""
+capture_service.py - 共享的系统声音（Loopback）采集服务
+包含: CaptureSubscription, LoopbackCaptureService, get_capture_service
+
+录音器（AudioRecorder）和 CtrlTrigger 的声音检测不再各自枚举设备、打开录音流，
+而是订阅同一条长期运行的 loopback 流：
+- 采集线程按 0.1 秒一块读取，分发给所有订阅者
+- 始终保留最近 preroll_ms 的音频（预录缓冲），订阅时可以从"过去"开始，
+  快速 TTS 的第一个音节不会因为设备打开延迟而被截掉
+- 默认输出设备变化（由 device_resolver 轮询发现）或设备出错时，重新获取 loopback 并重开
+"""
+import threading
+import queue
+import time
+from collections import deque
+import numpy as np
+from config_loader import app_config
+from device_resolver import get_device_resolver
+
+SAMPLERATE = 48000
+CHANNELS = 2
+BLOCKSIZE = 4800  # 0.1 秒
+
+class CaptureSubscription:
+    """
+    一个订阅者的块队列
+
+    块是只读共享的 float32 数组 (BLOCKSIZE, CHANNELS)，订阅者需要修改时自行复制。
+    """
+
+    def __init__(self, service, max_blocks):
+        self.service = service
+        self.samplerate = SAMPLERATE
+        self.channels = CHANNELS
+        self.blocksize = BLOCKSIZE
+        self._queue = queue.Queue(maxsize=max_blocks)
+        self.dropped = 0
+
+    def _put(self, block):
+        try:
+            self._queue.put_nowait(block)
+        except queue.Full:
+            # 订阅者处理不过来：丢弃最旧的块，保证采集线程不被阻塞
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                pass
+            self._queue.put_nowait(block)
+            self.dropped += 1
+
+    def read(self, timeout=1.0):
+        """读取下一块，超时或服务已停止时返回 None"""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.service.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+class LoopbackCaptureService(threading.Thread):
+    """
+    长期运行的 loopback 采集线程
+
+    capture_always_on 为 False 时只在有订阅者期间打开录音流（没有预录音频）。
+    """
+
+    def __init__(self, preroll_ms=None, always_on=None, retry_delay=2.0):
+        super().__init__(name="LoopbackCapture", daemon=True)
+        preroll_ms = app_config.capture_preroll_ms if preroll_ms is None else preroll_ms
+        self.always_on = app_config.capture_always_on if always_on is None else always_on
+        self.retry_delay = retry_delay
+        self._preroll = deque(maxlen=max(0, int(np.ceil(preroll_ms * SAMPLERATE / 1000 / BLOCKSIZE))))
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self.running = True
+        self.device_name = None
+        self.resolver = get_device_resolver()
+        self._device_changed = threading.Event()
+        self.resolver.add_listener(lambda mic: self._device_changed.set())
+
+    def subscribe(self, preroll=True, max_seconds=10.0):
+        """
+        订阅采集块
+
+        Args:
+            preroll: 是否先收到预录缓冲中的最近几块
+            max_seconds: 队列最多缓存的时长，超出后丢弃最旧的块
+        """
+        subscription = CaptureSubscription(self, max(1, int(max_seconds * SAMPLERATE / BLOCKSIZE)))
+        with self._lock:
+            if preroll:
+                for block in self._preroll:
+                    subscription._put(block)
+            self._subscribers.append(subscription)
+        self._wakeup.set()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    def stop(self):
+        self.running = False
+        self._wakeup.set()
+
+    def _has_subscribers(self):
+        with self._lock:
+            return bool(self._subscribers)
+
+    def run(self):
+        while self.running:
+            if not self.always_on and not self._has_subscribers():
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+            mic = self.resolver.get_loopback_mic()
+            if not mic:
+                print("[Capture] Error: Could not find loopback device.")
+                time.sleep(self.retry_delay)
+                continue
+            try:
+                self._capture(mic)
+            except Exception as e:
+                print(f"[Capture] Stream error on {self.device_name}: {e}, reopening")
+                time.sleep(self.retry_delay)
+
+    def _capture(self, mic):
+        self.device_name = mic.name
+        print(f"[Capture] Capturing from Loopback: {mic.name}")
+        self._device_changed.clear()
+        last_poll = time.monotonic()
+        with mic.recorder(samplerate=SAMPLERATE, channels=CHANNELS, blocksize=BLOCKSIZE) as recorder:
+            while self.running:
+                if time.monotonic() - last_poll >= self.resolver.poll_interval:
+                    last_poll = time.monotonic()
+                    self.resolver.check_default_changed()
+                if self._device_changed.is_set():
+                    print("[Capture] Default output changed, reopening stream")
+                    return
+                block = np.asarray(recorder.record(numframes=BLOCKSIZE), dtype=np.float32)
+                block.flags.writeable = False
+                with self._lock:
+                    self._preroll.append(block)
+                    subscribers = list(self._subscribers)
+                for subscription in subscribers:
+                    subscription._put(block)
+                if not subscribers and not self.always_on:
+                    self._preroll.clear()
+                    print("[Capture] No subscribers, closing stream")
+                    return
+
+_service = None
+_service_lock = threading.Lock()
+
+def get_capture_service():
+    """进程内唯一的采集服务，首次调用时启动"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = LoopbackCaptureService()
+            _service.start()
+        return _service
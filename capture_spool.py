@@ -0,0 +1,195 @@
+"""
+capture_spool.py - 录音边录边写（崩溃安全）
+包含: CaptureSpool, find_loud_bounds, finalize_spool_audio, recover_spools
+
+开启 [Audio] stream_to_disk 后，AudioRecorder 不再把整段录音留在内存里：
+1. 声音开始时在 {save_dir}/.capture/ 下创建 {id}.json（文本、采样率、声道）和 {id}.part
+2. 每个采集块直接追加到 .part（原始 float32 交错采样，无文件头，可直接内存映射）
+3. 录音结束后对 .part 做一次内存映射的第二遍处理：裁剪、归一化、首尾补静音，
+   分块写入 {number}.{ext}.tmp，再原子替换为 {number}.{ext}（格式见 [Audio] storage_format）
+4. 进程崩溃或 os._exit 留下的 .part 在下次启动时由 recover_spools 补完
+"""
+import os
+import json
+import time
+import uuid
+import numpy as np
+import soundfile as sf
+from datetime import datetime
+from config_loader import app_config
+from audio_processor import generate_slow_audio
+from audio_files import EXT_FORMATS, audio_path, storage_extension, remove_number_files
+from vad import detect_speech_bounds
+
+# 第二遍处理每次读取的帧数（1 秒）
+CHUNK_FRAMES = 48000
+
+def spool_dir(save_dir=None):
+    return os.path.join(save_dir or app_config.save_dir, '.capture')
+
+class CaptureSpool:
+    """一次录音的磁盘暂存文件"""
+
+    def __init__(self, content, samplerate, channels, save_dir=None):
+        self.samplerate = samplerate
+        self.channels = channels
+        directory = spool_dir(save_dir)
+        os.makedirs(directory, exist_ok=True)
+        spool_id = f"{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}"
+        self.meta_path = os.path.join(directory, f"{spool_id}.json")
+        self.part_path = os.path.join(directory, f"{spool_id}.part")
+        with open(self.meta_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'content': content,
+                'samplerate': samplerate,
+                'channels': channels,
+                'date': datetime.now().strftime("%Y-%m-%d"),
+            }, f, ensure_ascii=False)
+        self._file = open(self.part_path, 'wb')
+        self.frames = 0
+
+    def write(self, block):
+        self._file.write(np.ascontiguousarray(block, dtype=np.float32).tobytes())
+        self.frames += len(block)
+
+    def close(self):
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+
+    def view(self):
+        """只读内存映射视图 (frames, channels)"""
+        return open_part(self.part_path, self.channels)
+
+    def discard(self):
+        self.close()
+        for path in (self.part_path, self.meta_path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+def open_part(part_path, channels):
+    frames = os.path.getsize(part_path) // (4 * channels)
+    if frames == 0:
+        return np.zeros((0, channels), dtype=np.float32)
+    return np.memmap(part_path, dtype=np.float32, mode='r', shape=(frames, channels))
+
+def find_loud_bounds(frames, thresh_linear):
+    """
+    分块扫描，返回首个 / 最后一个有声帧 (first, last)，全部静音时返回 None
+
+    有声判定与 AudioRecorder 一致：各声道绝对值的均值超过阈值。
+    """
+    first = last = None
+    for start in range(0, len(frames), CHUNK_FRAMES):
+        loud = np.flatnonzero(np.abs(frames[start:start + CHUNK_FRAMES]).mean(axis=1) > thresh_linear)
+        if loud.size:
+            if first is None:
+                first = start + int(loud[0])
+            last = start + int(loud[-1])
+    return None if first is None else (first, last)
+
+def finalize_spool_audio(frames, dest_path, samplerate, first, last, pad_samples, target_peak=0.9):
+    """
+    把 frames[first:last+1] 归一化并首尾补静音，写入 dest_path（先写 .tmp 再原子替换）
+
+    格式由 dest_path 的扩展名决定，storage_mono 开启时逐块混为单声道。
+    frames 可以是内存映射视图，逐块读取，内存占用与录音长度无关。
+    """
+    trimmed = frames[first:last + 1]
+    peak = 0.0
+    for start in range(0, len(trimmed), CHUNK_FRAMES):
+        chunk = trimmed[start:start + CHUNK_FRAMES]
+        peak = max(peak, float(chunk.max()), -float(chunk.min()))
+    gain = target_peak / peak if peak > 0.01 else 1.0
+    if gain != 1.0:
+        print(f"[Recorder] Normalized audio (Gain: {gain:.2f}x)")
+
+    mono = app_config.storage_mono
+    channels = 1 if mono else frames.shape[1]
+    container, subtype = EXT_FORMATS.get(os.path.splitext(dest_path)[1].lower(), EXT_FORMATS['.wav'])
+    silence = np.zeros((pad_samples, channels), dtype=np.float32)
+    tmp_path = dest_path + ".tmp"
+    with sf.SoundFile(tmp_path, 'w', samplerate=samplerate, channels=channels,
+                      format=container, subtype=subtype) as out:
+        out.write(silence)
+        for start in range(0, len(trimmed), CHUNK_FRAMES):
+            chunk = np.array(trimmed[start:start + CHUNK_FRAMES], dtype=np.float32)
+            chunk *= gain
+            out.write(chunk.mean(axis=1, keepdims=True) if mono else chunk)
+        out.write(silence)
+    with open(tmp_path, 'rb') as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_path, dest_path)
+
+def recover_spools(db_manager, save_dir=None, pad_seconds=0.3):
+    """
+    补完上次异常退出留下的暂存录音，返回恢复的 number 列表
+
+    只处理 .json 与 .part 都存在的暂存；全部静音的暂存直接删除。
+    先在暂存目录渲染出 {id}.{ext}，再写数据库记录并移入音频目录：任一步失败都保留暂存，
+    下次重试时复用已渲染的文件，内容去重使 save_recording 返回同一个 number。
+    每恢复一条即与实时录音一样发送 UPDATE:{number}，UI 运行时立即刷新列表。
+    """
+    # audio_recorder 导入本模块，延迟导入避免循环
+    from audio_recorder import send_ui_message
+
+    directory = spool_dir(save_dir)
+    if not os.path.isdir(directory):
+        return []
+    recovered = []
+    thresh_linear = 10 ** (app_config.silence_threshold_db / 20)
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith('.json'):
+            continue
+        meta_path = os.path.join(directory, name)
+        part_path = meta_path[:-len('.json')] + '.part'
+        staged_path = meta_path[:-len('.json')] + storage_extension()
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if not os.path.exists(part_path):
+                os.remove(meta_path)
+                continue
+            if not os.path.exists(staged_path) and not _render_spool(part_path, staged_path, meta,
+                                                                      thresh_linear, pad_seconds):
+                os.remove(part_path)
+                os.remove(meta_path)
+                continue
+            number, is_new = db_manager.save_recording(meta['content'], meta['date'])
+            if not is_new:
+                # 内容已存在（或上次恢复已写入记录）：清掉该 number 任意格式的旧文件
+                remove_number_files(number, save_dir)
+            dest = audio_path(number, save_dir=save_dir)
+            os.replace(staged_path, dest)
+            if app_config.slow_generate_versions and not app_config.slow_on_demand:
+                generate_slow_audio(dest, app_config.slow_speeds)
+            os.remove(part_path)
+            os.remove(meta_path)
+            recovered.append(number)
+            print(f"[Recorder] Recovered interrupted recording #{number}")
+            send_ui_message(f"UPDATE:{number}")
+        except Exception as e:
+            print(f"[Recorder] Warning: failed to recover {name}: {e}")
+    return recovered
+
+def _render_spool(part_path, staged_path, meta, thresh_linear, pad_seconds):
+    """把暂存渲染为 staged_path，全部静音时返回 False；内存映射在返回前释放"""
+    frames = open_part(part_path, meta['channels'])
+    try:
+        bounds = find_loud_bounds(frames, thresh_linear)
+        if bounds is None:
+            return False
+        if app_config.vad_enabled:
+            # 与实时录音一致：按自适应噪声底的语音帧裁剪
+            speech = detect_speech_bounds(frames, meta['samplerate'])
+            if speech is not None:
+                bounds = (speech[0], speech[1] - 1)
+        finalize_spool_audio(frames, staged_path, meta['samplerate'], bounds[0], bounds[1],
+                             int(pad_seconds * meta['samplerate']))
+        return True
+    finally:
+        del frames
@@ -45,6 +45,47 @@ class Config:
     def end_silence_duration(self):
         return self.config.getfloat('Audio', 'end_silence_duration', fallback=1.5)
 
+    @property
+    def capture_always_on(self):
+        return self.config.getboolean('Audio', 'capture_always_on', fallback=True)
+
+    @property
+    def capture_preroll_ms(self):
+        return self.config.getint('Audio', 'preroll_ms', fallback=300)
+
+    @property
+    def device_poll_seconds(self):
+        return self.config.getfloat('Audio', 'device_poll_seconds', fallback=2.0)
+
+    @property
+    def stream_to_disk(self):
+        return self.config.getboolean('Audio', 'stream_to_disk', fallback=False)
+
+    @property
+    def storage_format(self):
+        value = self.config.get('Audio', 'storage_format', fallback='wav').strip().lower()
+        return value if value in ('wav', 'flac', 'opus') else 'wav'
+
+    @property
+    def storage_mono(self):
+        return self.config.getboolean('Audio', 'storage_mono', fallback=False)
+
+    @property
+    def vad_enabled(self):
+        return self.config.getboolean('Audio', 'vad_enabled', fallback=True)
+
+    @property
+    def vad_snr_db(self):
+        return self.config.getfloat('Audio', 'vad_snr_db', fallback=10.0)
+
+    @property
+    def vad_hangover_ms(self):
+        return self.config.getint('Audio', 'vad_hangover_ms', fallback=200)
+
+    @property
+    def vad_min_end_silence(self):
+        return self.config.getfloat('Audio', 'vad_min_end_silence', fallback=0.4)
+
     @property
     def save_dir(self):
         return self.config.get('Paths', 'save_dir', fallback='audio')
@@ -189,10 +230,34 @@ class Config:
         self.config.set('PlayMode', 'auto_enabled', str(value))
         self.save()
 
+    @property
+    def play_variant_wait_ms(self):
+        return self.config.getint('PlayMode', 'variant_wait_ms', fallback=8000)
+
     @property
     def slow_generate_versions(self):
         return self.config.getboolean('SlowAudio', 'generate_slow_versions', fallback=True)
 
+    @property
+    def slow_backend(self):
+        return self.config.get('SlowAudio', 'backend', fallback='numpy').strip().lower()
+
+    @property
+    def slow_on_demand(self):
+        return self.config.getboolean('SlowAudio', 'on_demand', fallback=True)
+
+    @property
+    def slow_cache_budget_mb(self):
+        return self.config.getint('SlowAudio', 'cache_budget_mb', fallback=300)
+
+    @property
+    def slow_prefetch_recent(self):
+        return self.config.getint('SlowAudio', 'prefetch_recent', fallback=5)
+
+    @property
+    def slow_prefetch_interval_minutes(self):
+        return self.config.getfloat('SlowAudio', 'prefetch_interval_minutes', fallback=10)
+
     @property
     def slow_speeds(self):
         speeds_str = self.config.get('SlowAudio', 'slow_speeds', fallback='0.5, 0.75')
@@ -265,10 +330,98 @@ class Config:
     def max_display_dates(self):
         return self.config.getint('DateFilter', 'max_display_dates', fallback=15)
 
+    @property
+    def search_box_width(self):
+        return self.config.getint('DateFilter', 'search_box_width', fallback=120)
+
+    @property
+    def search_debounce_ms(self):
+        return self.config.getint('DateFilter', 'search_debounce_ms', fallback=200)
+
+    @property
+    def search_result_limit(self):
+        return self.config.getint('DateFilter', 'search_result_limit', fallback=50)
+
+    @property
+    def search_empty_hint_text(self):
+        return self.config.get('DateFilter', 'search_empty_hint_text', fallback='没有匹配的记录')
+
+    @property
+    def list_page_size(self):
+        return self.config.getint('DateFilter', 'page_size', fallback=50)
+
+    @property
+    def list_load_more_threshold(self):
+        return self.config.getint('DateFilter', 'load_more_threshold', fallback=100)
+
     @property
     def cleanup_delay_seconds(self):
         return self.config.getint('Cleanup', 'cleanup_delay_seconds', fallback=60)
 
+    @property
+    def archive_enabled(self):
+        return self.config.getboolean('Cleanup', 'archive_enabled', fallback=True)
+
+    @property
+    def archive_db_path(self):
+        return self.config.get('Cleanup', 'archive_db_path', fallback='archive.db')
+
+    @property
+    def archive_dir(self):
+        return self.config.get('Cleanup', 'archive_dir', fallback='audio_archive')
+
+    @property
+    def maintenance_idle_seconds(self):
+        return self.config.getfloat('Maintenance', 'idle_seconds', fallback=30)
+
+    @property
+    def maintenance_poll_seconds(self):
+        return self.config.getfloat('Maintenance', 'poll_seconds', fallback=5)
+
+    @property
+    def maintenance_job_budget_ms(self):
+        return self.config.getint('Maintenance', 'job_budget_ms', fallback=200)
+
+    @property
+    def maintenance_cleanup_interval_hours(self):
+        return self.config.getfloat('Maintenance', 'cleanup_interval_hours', fallback=6)
+
+    @property
+    def maintenance_consistency_interval_hours(self):
+        return self.config.getfloat('Maintenance', 'consistency_interval_hours', fallback=24)
+
+    @property
+    def maintenance_checkpoint_interval_minutes(self):
+        return self.config.getfloat('Maintenance', 'checkpoint_interval_minutes', fallback=10)
+
+    @property
+    def maintenance_optimize_interval_hours(self):
+        return self.config.getfloat('Maintenance', 'optimize_interval_hours', fallback=6)
+
+    @property
+    def maintenance_vacuum_enabled(self):
+        return self.config.getboolean('Maintenance', 'vacuum_enabled', fallback=True)
+
+    @property
+    def maintenance_vacuum_min_free_pages(self):
+        return self.config.getint('Maintenance', 'vacuum_min_free_pages', fallback=256)
+
+    @property
+    def maintenance_vacuum_pages_per_step(self):
+        return self.config.getint('Maintenance', 'vacuum_pages_per_step', fallback=200)
+
+    @property
+    def maintenance_vacuum_interval_hours(self):
+        return self.config.getfloat('Maintenance', 'vacuum_interval_hours', fallback=24)
+
+    @property
+    def maintenance_question_retention_days(self):
+        return self.config.getint('Maintenance', 'question_retention_days', fallback=90)
+
+    @property
+    def maintenance_question_archive_interval_hours(self):
+        return self.config.getfloat('Maintenance', 'question_archive_interval_hours', fallback=24)
+
     @property
     def db_path(self):
         return self.config.get('Database', 'db_path', fallback='data.db')
@@ -285,6 +438,26 @@ class Config:
     def db_retry_count(self):
         return self.config.getint('Database', 'retry_count', fallback=3)
 
+    @property
+    def db_pool_size(self):
+        return self.config.getint('Database', 'pool_size', fallback=4)
+
+    @property
+    def db_cached_statements(self):
+        return self.config.getint('Database', 'cached_statements', fallback=256)
+
+    @property
+    def db_cache_size(self):
+        return self.config.getint('Database', 'cache_size', fallback=512)
+
+    @property
+    def db_write_server(self):
+        return self.config.getboolean('Database', 'write_server', fallback=False)
+
+    @property
+    def db_write_server_port(self):
+        return self.config.getint('Database', 'write_server_port', fallback=65434)
+
     # ==================== ClickTrigger 配置 ====================
     @property
     def click_triple_click_to_alt_enabled(self) -> bool:
@@ -331,6 +504,26 @@ class Config:
         """Alt 键触发匹配成功后的播放次数"""
         return self.config.getint('AltTrigger', 'play_count', fallback=1)
 
+    @property
+    def alt_fuzzy_match_enabled(self) -> bool:
+        """精确匹配失败时是否使用近似匹配索引"""
+        return self.config.getboolean('AltTrigger', 'fuzzy_match_enabled', fallback=True)
+
+    @property
+    def alt_fuzzy_min_length(self) -> int:
+        """参与近似匹配的最短字母序列长度"""
+        return self.config.getint('AltTrigger', 'fuzzy_min_length', fallback=20)
+
+    @property
+    def alt_fuzzy_min_containment(self) -> float:
+        """近似匹配：较短序列被较长序列包含的比例下限"""
+        return self.config.getfloat('AltTrigger', 'fuzzy_min_containment', fallback=0.85)
+
+    @property
+    def alt_fuzzy_min_overlap(self) -> float:
+        """近似匹配：两序列重叠部分占较长序列的比例下限"""
+        return self.config.getfloat('AltTrigger', 'fuzzy_min_overlap', fallback=0.5)
+
     # ==================== AutoRecord 自动补录配置 ====================
     @property
     def auto_record_wait_for_toolbar(self) -> float:
@@ -25,6 +25,8 @@ from winocr import recognize_pil
 from config_loader import app_config
 from db_manager import DatabaseManager
 from audio_recorder import AudioRecorder
+from capture_service import get_capture_service
+from vad import create_detector
 
 # 可清洗的标点（只在开头和结尾）
 STRIP_CHARS = "!?.,"
@@ -78,31 +80,6 @@ def point_in_rect(px, py, x, y, w, h):
     """检查点是否在矩形内（包含边框）"""
     return x <= px <= x + w and y <= py <= y + h
 
-def get_loopback_mic():
-    """获取当前默认输出设备的 Loopback（与 audio_recorder.py 保持一致）"""
-    import soundcard as sc
-    try:
-        default_speaker = sc.default_speaker()
-        print(f"[CtrlTrigger] Default Speaker: {default_speaker.name}")
-        
-        all_mics = sc.all_microphones(include_loopback=True)
-        physical_mics_ids = [m.id for m in sc.all_microphones(include_loopback=False)]
-        loopback_candidates = [m for m in all_mics if m.id not in physical_mics_ids]
-        
-        for mic in loopback_candidates:
-            if mic.name == default_speaker.name:
-                print(f"[CtrlTrigger] Found matching loopback: {mic.name}")
-                return mic
-        
-        # 回退方案
-        fallback = sc.get_microphone(id=str(default_speaker.name), include_loopback=True)
-        print(f"[CtrlTrigger] Using fallback loopback: {fallback.name}")
-        return fallback
-    except Exception as e:
-        print(f"[CtrlTrigger] Error finding loopback: {e}")
-        return None
-
-
 def get_word_at_cursor():
     """
     使用 winocr 获取鼠标位置的单词
@@ -423,17 +400,21 @@ class CtrlTriggerListener:
         # 等待系统声音（使用 AudioRecorder 的声音检测逻辑）
         print(f"[CtrlTrigger] Waiting for system sound (timeout={self.sound_detect_timeout}s)")
 
-        sound_detected = self._wait_for_sound()
+        # 两个等待阶段共用一个共享采集流订阅（带预录缓冲，触发前刚开始的声音也能检测到）
+        # 同一个检测器贯穿两个阶段，噪声底与停顿学习保持连续
+        with get_capture_service().subscribe(preroll=True) as subscription:
+            detector = create_detector(subscription.samplerate)
+            sound_detected = self._wait_for_sound(subscription, detector)
 
-        if not sound_detected:
-            print("[CtrlTrigger] No sound detected or cancelled, aborting")
-            return
+            if not sound_detected:
+                print("[CtrlTrigger] No sound detected or cancelled, aborting")
+                return
 
-        # 等待声音结束
-        print("[CtrlTrigger] Sound detected, waiting for it to end")
-        if not self._wait_for_sound_end():
-            print("[CtrlTrigger] Cancelled while waiting for sound end")
-            return
+            # 等待声音结束
+            print("[CtrlTrigger] Sound detected, waiting for it to end")
+            if not self._wait_for_sound_end(subscription, detector):
+                print("[CtrlTrigger] Cancelled while waiting for sound end")
+                return
 
         # 检查取消标志
         if self.cancel_event.is_set():
@@ -477,88 +458,59 @@ class CtrlTriggerListener:
         recorder = AudioRecorder(text, start_silence_duration=self.sound_detect_timeout)
         recorder.start()
 
-    def _wait_for_sound(self):
+    def _wait_for_sound(self, subscription, detector):
         """
         等待系统声音出现
 
+        Args:
+            subscription: 共享采集服务的订阅
+            detector: vad.create_detector() 创建的语音检测器
+
         Returns:
             bool: 是否检测到声音（False 也可能表示被取消）
         """
-        import numpy as np
-
         start_time = time.time()
-        silence_threshold = app_config.silence_threshold_db
 
         try:
-            # 使用统一的 loopback 获取方法
-            loopback = get_loopback_mic()
-            if not loopback:
-                print("[CtrlTrigger] Failed to get loopback device")
-                return False
-
-            with loopback.recorder(samplerate=44100, channels=2) as recorder:
-                while time.time() - start_time < self.sound_detect_timeout:
-                    # 检查取消标志
-                    if self.cancel_event.is_set():
-                        print("[CtrlTrigger] _wait_for_sound cancelled")
-                        return False
-
-                    # 读取一小段音频
-                    data = recorder.record(numframes=4410)  # 0.1秒
-
-                    # 计算音量（dB）
-                    if len(data) > 0:
-                        rms = np.sqrt(np.mean(data ** 2))
-                        if rms > 0:
-                            db = 20 * np.log10(rms)
-                            if db > silence_threshold:
-                                return True
+            while time.time() - start_time < self.sound_detect_timeout:
+                # 检查取消标志
+                if self.cancel_event.is_set():
+                    print("[CtrlTrigger] _wait_for_sound cancelled")
+                    return False
+
+                # 读取一块音频（0.1秒）
+                data = subscription.read(timeout=0.5)
+                if data is not None and len(data) > 0 and detector.update(data):
+                    return True
 
         except Exception as e:
             print(f"[CtrlTrigger] Error detecting sound: {e}")
 
         return False
 
-    def _wait_for_sound_end(self):
+    def _wait_for_sound_end(self, subscription, detector):
         """
-        等待系统声音结束（静音持续一段时间）
+        等待系统声音结束（静音持续到检测器的结束超时）
+
+        Args:
+            subscription: 共享采集服务的订阅
+            detector: 与 _wait_for_sound 共用的语音检测器
 
         Returns:
             bool: True 表示正常结束，False 表示被取消
         """
-        import numpy as np
-
-        silence_threshold = app_config.silence_threshold_db
-        end_silence_duration = app_config.end_silence_duration
-        silence_start = None
-
         try:
-            # 使用统一的 loopback 获取方法
-            loopback = get_loopback_mic()
-            if not loopback:
-                print("[CtrlTrigger] Failed to get loopback device")
-                return False
-
-            with loopback.recorder(samplerate=44100, channels=2) as recorder:
-                while True:
-                    # 检查取消标志
-                    if self.cancel_event.is_set():
-                        print("[CtrlTrigger] _wait_for_sound_end cancelled")
-                        return False
-
-                    data = recorder.record(numframes=4410)  # 0.1秒
-
-                    if len(data) > 0:
-                        rms = np.sqrt(np.mean(data ** 2))
-                        db = 20 * np.log10(rms) if rms > 0 else -100
-
-                        if db <= silence_threshold:
-                            if silence_start is None:
-                                silence_start = time.time()
-                            elif time.time() - silence_start >= end_silence_duration:
-                                return True
-                        else:
-                            silence_start = None
+            while True:
+                # 检查取消标志
+                if self.cancel_event.is_set():
+                    print("[CtrlTrigger] _wait_for_sound_end cancelled")
+                    return False
+
+                data = subscription.read(timeout=0.5)
+                if data is not None and len(data) > 0:
+                    detector.update(data)
+                    if detector.utterance_ended():
+                        return True
 
         except Exception as e:
             print(f"[CtrlTrigger] Error waiting for sound end: {e}")
@@ -3,38 +3,488 @@ import os
 import time
 import logging
 import threading
+import hashlib
+import re
+import json
+import socket
+import struct
+import functools
+from collections import OrderedDict
 from config_loader import app_config
 
+def text_hash(text):
+    """
+    计算文本的 64 位稳定哈希（有符号，可直接存入 SQLite INTEGER）
+
+    用于 content / letter_sequence 的整数索引探测，命中后仍需比对原文。
+    """
+    if text is None:
+        return None
+    digest = hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+class ConnectionPool:
+    """
+    进程级 SQLite 连接池
+
+    连接在创建时一次性完成 PRAGMA 配置（busy_timeout / WAL），之后在各个
+    DatabaseManager 实例与线程之间复用，避免每次触发都重新打开和配置连接。
+    """
+
+    def __init__(self, db_path, size, busy_timeout, wal_mode, cached_statements):
+        self.db_path = db_path
+        self.size = max(1, size)
+        self.busy_timeout = busy_timeout
+        self.wal_mode = wal_mode
+        self.cached_statements = cached_statements
+        self._idle = []
+        self._created = 0
+        self._cond = threading.Condition()
+        # 统计计数
+        self.acquire_count = 0
+        self.hit_count = 0
+        self.miss_count = 0
+        self.overflow_count = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def _open(self):
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=5.0,
+            check_same_thread=False,
+            cached_statements=self.cached_statements
+        )
+        conn.execute(f"PRAGMA busy_timeout = {self.busy_timeout}")
+        if self.wal_mode:
+            conn.execute("PRAGMA journal_mode=WAL")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def acquire(self):
+        start = time.perf_counter()
+        overflow = False
+        with self._cond:
+            self.acquire_count += 1
+            conn = None
+            if self._idle:
+                conn = self._idle.pop()
+                self.hit_count += 1
+            elif self._created < self.size:
+                self._created += 1
+                self.miss_count += 1
+            else:
+                # 池已耗尽：立即创建临时溢出连接（归还时关闭），不让调用方（包括 UI 线程）等待
+                overflow = True
+                self.overflow_count += 1
+            waited = time.perf_counter() - start
+            self.wait_time_total += waited
+            self.wait_time_max = max(self.wait_time_max, waited)
+        if conn is not None:
+            return conn
+        try:
+            return self._open()
+        except sqlite3.Error:
+            if not overflow:
+                with self._cond:
+                    self._created -= 1
+            raise
+
+    def release(self, conn):
+        if conn is None:
+            return
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            pass
+        with self._cond:
+            if len(self._idle) < self.size:
+                self._idle.append(conn)
+                self._cond.notify()
+                return
+        # 溢出连接直接关闭
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def stats(self):
+        with self._cond:
+            return {
+                'size': self.size,
+                'created': self._created,
+                'idle': len(self._idle),
+                'acquires': self.acquire_count,
+                'hits': self.hit_count,
+                'misses': self.miss_count,
+                'overflows': self.overflow_count,
+                'wait_total_ms': self.wait_time_total * 1000,
+                'wait_max_ms': self.wait_time_max * 1000,
+            }
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_pool(db_path=None):
+    """获取（必要时创建）指定数据库文件的进程级连接池"""
+    db_path = db_path or app_config.db_path
+    key = os.path.abspath(db_path)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(
+                db_path,
+                size=app_config.db_pool_size,
+                busy_timeout=app_config.db_busy_timeout,
+                wal_mode=app_config.db_wal_mode,
+                cached_statements=app_config.db_cached_statements,
+            )
+            _pools[key] = pool
+        return pool
+
+class _PooledConnection:
+    """线程局部的连接租约；线程结束（thread-local 被回收）时自动归还连接"""
+    __slots__ = ('pool', 'conn')
+
+    def __init__(self, pool, conn):
+        self.pool = pool
+        self.conn = conn
+
+    def release(self):
+        conn, self.conn = self.conn, None
+        if conn is not None and self.pool is not None:
+            self.pool.release(conn)
+
+    def __del__(self):
+        try:
+            self.release()
+        except Exception:
+            pass
+
+class RecordingCache:
+    """
+    进程级 LRU 读缓存
+
+    每次读取前在专用探测连接上执行 PRAGMA data_version：任何其他连接（包括本进程
+    连接池中的写连接和其他进程）提交后该值都会变化，此时整个缓存失效。
+    data_version 只读共享内存中的计数，不会产生查询或磁盘 I/O。
+    """
+
+    def __init__(self, db_path, capacity, busy_timeout=5000):
+        self.capacity = capacity
+        self._conn = sqlite3.connect(db_path, timeout=5.0, check_same_thread=False)
+        self._conn.execute(f"PRAGMA busy_timeout = {busy_timeout}")
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._version = None
+        self.hit_count = 0
+        self.miss_count = 0
+        self.invalidation_count = 0
+
+    def _check_version(self):
+        version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if version != self._version:
+            if self._entries:
+                self.invalidation_count += 1
+                self._entries.clear()
+            self._version = version
+        return version
+
+    def get_or_load(self, key, loader, related=None):
+        """
+        命中直接返回，否则调用 loader() 读库并缓存
+
+        related(value) 可返回额外的 (key, value) 对一并缓存（如按日期读取时
+        顺便缓存每条记录的 number 键）。
+        """
+        with self._lock:
+            version = self._check_version()
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hit_count += 1
+                return self._entries[key]
+            self.miss_count += 1
+        value = loader()
+        with self._lock:
+            # 读取期间若有提交，版本已变化，下次访问时会整体失效
+            if self._version == version:
+                self._entries[key] = value
+                if related is not None:
+                    for extra_key, extra_value in related(value):
+                        self._entries[extra_key] = extra_value
+                while len(self._entries) > self.capacity:
+                    self._entries.popitem(last=False)
+        return value
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'capacity': self.capacity,
+                'hits': self.hit_count,
+                'misses': self.miss_count,
+                'invalidations': self.invalidation_count,
+            }
+
+_caches = {}
+
+def get_cache(db_path=None):
+    """获取进程级读缓存；cache_size 为 0 时返回 None"""
+    if app_config.db_cache_size <= 0:
+        return None
+    db_path = db_path or app_config.db_path
+    key = os.path.abspath(db_path)
+    with _pools_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = RecordingCache(db_path, app_config.db_cache_size, app_config.db_busy_timeout)
+            _caches[key] = cache
+        return cache
+
+# ==================== 跨进程单写服务 ====================
+# 开启 [Database] write_server 后，UI 进程（floating_ui.py）独占全部写操作；
+# main.py、quiz_card.py 等其他进程的写方法通过本地 TCP 发送请求并等待确认。
+# 帧格式：4 字节大端长度 + UTF-8 JSON。
+# 请求 {"method": 名称, "args": [...], "kwargs": {...}}
+# 响应 {"ok": true, "result": ...} 或 {"ok": false, "error": 类型, "message": 文本}
+
+class RemoteWriteError(sqlite3.DatabaseError):
+    """写服务端执行失败（原异常类型与信息见 message），或请求已发出但未收到响应"""
+
+class WriteServerUnavailable(ConnectionError):
+    """请求发出前无法连接写服务，调用方可安全退回本地写入"""
+
+def _send_frame(sock, obj):
+    payload = json.dumps(obj, ensure_ascii=False, default=list).encode('utf-8')
+    sock.sendall(struct.pack('>I', len(payload)) + payload)
+
+def _recv_exact(sock, size):
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = sock.recv(size - len(buf))
+        if not chunk:
+            raise ConnectionError("connection closed")
+        buf.extend(chunk)
+    return bytes(buf)
+
+def _recv_frame(sock):
+    (size,) = struct.unpack('>I', _recv_exact(sock, 4))
+    return json.loads(_recv_exact(sock, size).decode('utf-8'))
+
+def _socket_alive(sock):
+    """复用长连接前检查对端是否已关闭（非阻塞 peek，不消耗数据）"""
+    try:
+        sock.setblocking(False)
+        try:
+            return sock.recv(1, socket.MSG_PEEK) != b''
+        finally:
+            sock.setblocking(True)
+    except BlockingIOError:
+        return True
+    except OSError:
+        return False
+
+# 允许远程调用的 DatabaseManager 写方法，由 @remote_write 注册
+REMOTE_WRITE_METHODS = set()
+
+def remote_write(method):
+    """
+    写方法装饰器：非写服务进程中转发给写服务
+
+    只有在请求发出前连接失败（WriteServerUnavailable）时才退回本地写入；
+    请求发出后的任何失败都抛出 RemoteWriteError，避免非幂等写入执行两次。
+    """
+    name = method.__name__
+    REMOTE_WRITE_METHODS.add(name)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        client = self.write_client
+        if client is not None:
+            try:
+                return client.call(name, args, kwargs)
+            except WriteServerUnavailable as e:
+                client.mark_unavailable(e)
+        return method(self, *args, **kwargs)
+    return wrapper
+
+class WriteServer(threading.Thread):
+    """UI 进程内的写服务：每个客户端连接一个处理线程，请求按到达顺序串行执行"""
+
+    def __init__(self, port):
+        super().__init__(name="DBWriteServer", daemon=True)
+        self.port = port
+        self.db_manager = DatabaseManager()
+        self.db_manager.local_writes = True
+        self._exec_lock = threading.Lock()
+        self.request_count = 0
+
+    def run(self):
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            server.bind(('127.0.0.1', self.port))
+            server.listen(8)
+            print(f"[DBWriteServer] Listening on 127.0.0.1:{self.port}")
+            while True:
+                conn, _ = server.accept()
+                threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+        except Exception as e:
+            print(f"[DBWriteServer] Server error: {e}")
+
+    def _serve(self, conn):
+        with conn:
+            while True:
+                try:
+                    request = _recv_frame(conn)
+                except (ConnectionError, OSError):
+                    break
+                except ValueError as e:
+                    print(f"[DBWriteServer] Bad frame: {e}")
+                    break
+                response = self._execute(request)
+                try:
+                    _send_frame(conn, response)
+                except (TypeError, ValueError) as e:
+                    # 结果无法序列化：写入已执行，只返回错误说明
+                    _send_frame(conn, {'ok': False, 'error': 'TypeError',
+                                       'message': f"result not serializable: {e}"})
+                except (ConnectionError, OSError):
+                    break
+        self.db_manager.close()
+
+    def _execute(self, request):
+        method = request.get('method')
+        if method not in REMOTE_WRITE_METHODS:
+            return {'ok': False, 'error': 'ValueError', 'message': f"method not allowed: {method}"}
+        kwargs = request.get('kwargs', {})
+        try:
+            with self._exec_lock:
+                result = getattr(self.db_manager, method)(*request.get('args', []), **kwargs)
+            self.request_count += 1
+            return {'ok': True, 'result': result}
+        except Exception as e:
+            return {'ok': False, 'error': type(e).__name__, 'message': str(e)}
+
+class WriteClient:
+    """
+    写服务客户端：进程内共享一条长连接，断开后自动重连
+
+    连接使用很短的超时（本机回环，写服务正常时毫秒级），连不上立即退回本地写入，
+    不会让录音保存等调用方等待；请求发出后按 timeout 等待响应。
+    """
+
+    CONNECT_TIMEOUT = 0.2
+
+    def __init__(self, port, timeout=10.0, retry_interval=5.0):
+        self.port = port
+        self.timeout = timeout
+        self.retry_interval = retry_interval
+        self._sock = None
+        self._lock = threading.Lock()
+        self._unavailable_until = 0.0
+
+    def _ensure_connected(self):
+        if self._sock is not None and not _socket_alive(self._sock):
+            self._close()
+        if self._sock is None:
+            try:
+                sock = socket.create_connection(('127.0.0.1', self.port), timeout=self.CONNECT_TIMEOUT)
+            except OSError as e:
+                raise WriteServerUnavailable(str(e)) from e
+            sock.settimeout(self.timeout)
+            self._sock = sock
+
+    def call(self, method, args, kwargs):
+        if time.monotonic() < self._unavailable_until:
+            raise WriteServerUnavailable("write server unavailable")
+        with self._lock:
+            self._ensure_connected()
+            try:
+                _send_frame(self._sock, {'method': method, 'args': args, 'kwargs': kwargs})
+                response = _recv_frame(self._sock)
+            except (OSError, ConnectionError, ValueError) as e:
+                # 请求可能已被执行，不能退回本地重复写入
+                self._close()
+                raise RemoteWriteError(f"write server did not respond to {method}: {e}") from e
+        if not response.get('ok'):
+            raise RemoteWriteError(f"{response.get('error')}: {response.get('message')}")
+        return response.get('result')
+
+    def mark_unavailable(self, error):
+        """服务不可达：退回本地写入，retry_interval 秒内不再尝试连接"""
+        if time.monotonic() < self._unavailable_until:
+            return
+        with self._lock:
+            self._close()
+        print(f"[DBWriteClient] Write server unavailable ({error}), writing locally")
+        self._unavailable_until = time.monotonic() + self.retry_interval
+
+    def _close(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+
+_write_server = None
+_write_client = None
+_write_service_lock = threading.Lock()
+
+def start_write_server():
+    """在当前进程启动写服务（UI 进程调用），本进程的写操作不再转发"""
+    global _write_server
+    with _write_service_lock:
+        if _write_server is None:
+            _write_server = WriteServer(app_config.db_write_server_port)
+            _write_server.start()
+        return _write_server
+
+def get_write_client():
+    """未开启 write_server 或当前进程即写服务进程时返回 None"""
+    global _write_client
+    if not app_config.db_write_server or _write_server is not None:
+        return None
+    with _write_service_lock:
+        if _write_client is None:
+            _write_client = WriteClient(app_config.db_write_server_port)
+        return _write_client
+
 class DatabaseManager:
     def __init__(self):
         self.db_path = app_config.db_path
         self.wal_mode = app_config.db_wal_mode
         self.busy_timeout = app_config.db_busy_timeout
         self.retry_count = app_config.db_retry_count
+        self.pool = get_pool(self.db_path)
+        self.cache = get_cache(self.db_path)
         self._local = threading.local()
+        self.local_writes = False
+
+    @property
+    def write_client(self):
+        """写服务客户端；local_writes 为 True（写服务自身使用的实例）时始终本地写入"""
+        if self.local_writes:
+            return None
+        return get_write_client()
 
     def connect(self):
         try:
-            conn = getattr(self._local, "connection", None)
-            if conn is not None:
-                return conn
-
-            conn = sqlite3.connect(self.db_path, timeout=5.0)
-            conn.execute(f"PRAGMA busy_timeout = {self.busy_timeout}")
-            if self.wal_mode:
-                conn.execute("PRAGMA journal_mode=WAL")
-            conn.row_factory = sqlite3.Row
-            self._local.connection = conn
+            lease = getattr(self._local, "lease", None)
+            if lease is not None and lease.conn is not None:
+                return lease.conn
+
+            conn = self.pool.acquire()
+            self._local.lease = _PooledConnection(self.pool, conn)
             return conn
         except sqlite3.Error as e:
             print(f"Database connection error: {e}")
             raise
 
     def get_connection(self):
-        conn = getattr(self._local, "connection", None)
-        if conn is None:
-            conn = self.connect()
-        return conn
+        return self.connect()
 
     @property
     def connection(self):
@@ -42,43 +492,422 @@ class DatabaseManager:
 
     @connection.setter
     def connection(self, value):
-        self._local.connection = value
+        lease = getattr(self._local, "lease", None)
+        if lease is not None:
+            lease.release()
+        # 外部传入的连接不归还连接池
+        self._local.lease = _PooledConnection(None, value) if value is not None else None
 
     def close(self):
-        conn = getattr(self._local, "connection", None)
-        if conn:
-            conn.close()
-            self._local.connection = None
+        """归还当前线程持有的连接到连接池"""
+        lease = getattr(self._local, "lease", None)
+        if lease:
+            lease.release()
+            self._local.lease = None
+
+    def get_pool_stats(self):
+        """连接池统计：获取次数、命中次数、等待耗时等"""
+        return self.pool.stats()
+
+    def get_cache_stats(self):
+        """读缓存统计：命中、未命中、失效次数；缓存关闭时返回 None"""
+        return self.cache.stats() if self.cache else None
+
+    # ==================== Schema 迁移（PRAGMA user_version） ====================
+    # (版本号, 迁移方法名)：只允许追加，已发布的版本号不可修改
+    SCHEMA_MIGRATIONS = [
+        (1, "_migrate_v1_create_recordings"),
+        (2, "_migrate_v2_review_fields"),
+        (3, "_migrate_v3_letter_sequence"),
+        (4, "_migrate_v4_hash_columns"),
+        (5, "_migrate_v5_is_word"),
+        (6, "_migrate_v6_recording_days"),
+        (7, "_migrate_v7_review_questions"),
+        (8, "_migrate_v8_full_text_search"),
+        (9, "_migrate_v9_maintenance_state"),
+        (10, "_migrate_v10_question_indexes"),
+        (11, "_migrate_v11_question_archive_fts"),
+    ]
+    MIGRATION_CHUNK_SIZE = 500
 
     def init_db(self):
+        """
+        执行尚未应用的 schema 迁移
+
+        已应用的版本记录在 PRAGMA user_version 中；数据库已是最新版本时
+        只读取一次版本号即返回。每个迁移在独立的 BEGIN IMMEDIATE 事务中
+        执行，并在同一事务内写入新版本号。
+
+        全新的空库在建表前切换为增量 vacuum 模式（空库的 VACUUM 立即完成）；
+        旧库的转换见 enable_incremental_vacuum。
+        """
         if not self.connection:
             self.connect()
-        create_table_sql = """
-        CREATE TABLE IF NOT EXISTS recordings (
-            number INTEGER PRIMARY KEY AUTOINCREMENT,
-            content TEXT NOT NULL,
-            remember INTEGER DEFAULT 0,
-            forget INTEGER DEFAULT 0,
-            date DATE NOT NULL
-        );
-        """
-        create_index_sql = "CREATE INDEX IF NOT EXISTS idx_date ON recordings(date);"
+        conn = self.connection
         try:
-            with self.connection:
-                self.connection.execute(create_table_sql)
-                self.connection.execute(create_index_sql)
-            # 阶段三：执行字段迁移
-            self.migrate_add_review_fields()
-
-            # Phase 1: Letter Sequence Migration
-            self.migrate_add_letter_sequence()
-
-            # Quiz: review_questions 表迁移
-            self.migrate_create_review_questions()
+            current = conn.execute("PRAGMA user_version").fetchone()[0]
+            if current == 0 and conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()[0] == 0:
+                conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                conn.execute("VACUUM")
+            for version, method_name in self.SCHEMA_MIGRATIONS:
+                if version <= current:
+                    continue
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    # 另一进程可能在等待写锁期间已完成同一迁移
+                    current = conn.execute("PRAGMA user_version").fetchone()[0]
+                    if version > current:
+                        getattr(self, method_name)(conn)
+                        conn.execute(f"PRAGMA user_version = {version}")
+                        current = version
+                        print(f"[Migration] Schema upgraded to v{version} ({method_name})")
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
         except sqlite3.Error as e:
             print(f"Database initialization error: {e}")
             raise
 
+    @staticmethod
+    def _table_columns(conn, table):
+        return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+    def _add_columns(self, conn, table, columns):
+        """按 PRAGMA table_info 判断缺失的列再 ALTER，兼容 user_version 为 0 的旧库"""
+        existing = self._table_columns(conn, table)
+        for field_name, field_type in columns:
+            if field_name not in existing:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {field_name} {field_type}")
+                print(f"[Migration] Added {table} column: {field_name}")
+
+    def _backfill_recordings(self, conn, columns, where, update_sql, make_params):
+        """
+        按 number 分块读取 recordings，并用 executemany 批量回填
+
+        make_params(row) 返回 None 表示该行无需更新。返回更新的行数。
+        """
+        last_number = 0
+        total = 0
+        while True:
+            rows = conn.execute(
+                f"""SELECT number, {columns} FROM recordings
+                    WHERE number > ? AND ({where})
+                    ORDER BY number LIMIT ?""",
+                (last_number, self.MIGRATION_CHUNK_SIZE)
+            ).fetchall()
+            if not rows:
+                return total
+            last_number = rows[-1]['number']
+            params = [p for p in (make_params(row) for row in rows) if p is not None]
+            if params:
+                conn.executemany(update_sql, params)
+                total += len(params)
+
+    def _migrate_v1_create_recordings(self, conn):
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS recordings (
+                number INTEGER PRIMARY KEY AUTOINCREMENT,
+                content TEXT NOT NULL,
+                remember INTEGER DEFAULT 0,
+                forget INTEGER DEFAULT 0,
+                date DATE NOT NULL
+            );"""
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_date ON recordings(date);")
+
+    def _migrate_v2_review_fields(self, conn):
+        """阶段三：Leitner 盒子系统所需的字段"""
+        from datetime import date
+        self._add_columns(conn, "recordings", [
+            ("box_level", "INTEGER DEFAULT 1"),
+            ("next_review_date", "DATE"),
+            ("last_review_date", "DATE"),
+        ])
+        cursor = conn.execute(
+            "UPDATE recordings SET box_level = 1, next_review_date = ? WHERE box_level IS NULL",
+            (date.today().isoformat(),)
+        )
+        if cursor.rowcount > 0:
+            print(f"[Migration] Initialized {cursor.rowcount} existing records")
+
+    def _migrate_v3_letter_sequence(self, conn):
+        """Phase 1: letter_sequence column for Alt-trigger matching."""
+        from text_processor import extract_letter_sequence
+        self._add_columns(conn, "recordings", [("letter_sequence", "TEXT")])
+        count = self._backfill_recordings(
+            conn, "content", "letter_sequence IS NULL",
+            "UPDATE recordings SET letter_sequence = ? WHERE number = ?",
+            lambda row: (extract_letter_sequence(row['content']), row['number'])
+        )
+        if count:
+            print(f"[Migration] Populated letter_sequence for {count} records")
+
+    def _migrate_v4_hash_columns(self, conn):
+        """content_hash / letter_seq_hash 列及索引"""
+        self._add_columns(conn, "recordings", [
+            ("content_hash", "INTEGER"),
+            ("letter_seq_hash", "INTEGER"),
+        ])
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_content_hash ON recordings(content_hash);")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_letter_seq_hash ON recordings(letter_seq_hash);")
+        # 长字符串 B-tree 已由哈希索引取代
+        conn.execute("DROP INDEX IF EXISTS idx_letter_sequence;")
+        count = self._backfill_recordings(
+            conn, "content, letter_sequence", "content_hash IS NULL OR letter_seq_hash IS NULL",
+            "UPDATE recordings SET content_hash = ?, letter_seq_hash = ? WHERE number = ?",
+            lambda row: (text_hash(row['content']), text_hash(row['letter_sequence']), row['number'])
+        )
+        if count:
+            print(f"[Migration] Populated hash columns for {count} records")
+
+    def _migrate_v5_is_word(self, conn):
+        """is_word 标记（合法单词）及复习查询的部分索引"""
+        from text_processor import is_valid_word
+        self._add_columns(conn, "recordings", [("is_word", "INTEGER DEFAULT 0")])
+        conn.execute(
+            """CREATE INDEX IF NOT EXISTS idx_review_words
+               ON recordings(next_review_date, box_level) WHERE is_word = 1;"""
+        )
+        conn.execute(
+            """CREATE INDEX IF NOT EXISTS idx_reviewed_words
+               ON recordings(last_review_date) WHERE is_word = 1;"""
+        )
+        count = self._backfill_recordings(
+            conn, "content", "is_word IS NOT 1",
+            "UPDATE recordings SET is_word = 1 WHERE number = ?",
+            lambda row: (row['number'],) if is_valid_word(row['content']) else None
+        )
+        print(f"[Migration] Populated is_word, {count} words found")
+
+    def _migrate_v6_recording_days(self, conn):
+        """
+        按日期汇总的 recording_days 表，由 recordings 上的触发器维护
+
+        日期下拉框、空列表判断和清理截止日期都只读这张小表，不再扫描 recordings。
+        """
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS recording_days (
+                date DATE PRIMARY KEY,
+                count INTEGER NOT NULL DEFAULT 0,
+                first_number INTEGER,
+                last_number INTEGER
+            );"""
+        )
+        conn.execute(
+            """CREATE TRIGGER IF NOT EXISTS trg_recording_days_insert
+               AFTER INSERT ON recordings
+               BEGIN
+                   INSERT INTO recording_days (date, count, first_number, last_number)
+                   VALUES (NEW.date, 1, NEW.number, NEW.number)
+                   ON CONFLICT(date) DO UPDATE SET
+                       count = count + 1,
+                       first_number = MIN(first_number, NEW.number),
+                       last_number = MAX(last_number, NEW.number);
+               END;"""
+        )
+        conn.execute(
+            """CREATE TRIGGER IF NOT EXISTS trg_recording_days_delete
+               AFTER DELETE ON recordings
+               BEGIN
+                   UPDATE recording_days SET
+                       count = count - 1,
+                       first_number = (SELECT MIN(number) FROM recordings WHERE date = OLD.date),
+                       last_number = (SELECT MAX(number) FROM recordings WHERE date = OLD.date)
+                   WHERE date = OLD.date;
+                   DELETE FROM recording_days WHERE date = OLD.date AND count <= 0;
+               END;"""
+        )
+        conn.execute(
+            """CREATE TRIGGER IF NOT EXISTS trg_recording_days_update
+               AFTER UPDATE OF date ON recordings
+               WHEN OLD.date IS NOT NEW.date
+               BEGIN
+                   UPDATE recording_days SET
+                       count = count - 1,
+                       first_number = (SELECT MIN(number) FROM recordings WHERE date = OLD.date),
+                       last_number = (SELECT MAX(number) FROM recordings WHERE date = OLD.date)
+                   WHERE date = OLD.date;
+                   DELETE FROM recording_days WHERE date = OLD.date AND count <= 0;
+                   INSERT INTO recording_days (date, count, first_number, last_number)
+                   VALUES (NEW.date, 1, NEW.number, NEW.number)
+                   ON CONFLICT(date) DO UPDATE SET
+                       count = count + 1,
+                       first_number = MIN(first_number, NEW.number),
+                       last_number = MAX(last_number, NEW.number);
+               END;"""
+        )
+        # 与触发器同一事务内从现有记录重建，旧库上重复执行也保持一致
+        conn.execute("DELETE FROM recording_days")
+        cursor = conn.execute(
+            """INSERT INTO recording_days (date, count, first_number, last_number)
+               SELECT date, COUNT(*), MIN(number), MAX(number) FROM recordings GROUP BY date"""
+        )
+        print(f"[Migration] recording_days populated with {cursor.rowcount} days")
+
+    def _migrate_v7_review_questions(self, conn):
+        """Quiz: review_questions 表"""
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS review_questions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                save_time TEXT NOT NULL,
+                content TEXT NOT NULL,
+                sentence_content TEXT,
+                ai_status TEXT DEFAULT NULL,
+                ai_question TEXT,
+                user_answer TEXT,
+                is_correct INTEGER,
+                ai_feedback TEXT,
+                answered_time TEXT
+            );"""
+        )
+        self._add_columns(conn, "review_questions", [("ai_status", "TEXT DEFAULT NULL")])
+
+    def _migrate_v8_full_text_search(self, conn):
+        """
+        FTS5 全文索引：recordings_fts / questions_fts（external content，由触发器同步）
+
+        SQLite 未编译 FTS5 时跳过，search() 会退回 LIKE 扫描。
+        """
+        try:
+            conn.execute(
+                """CREATE VIRTUAL TABLE IF NOT EXISTS recordings_fts USING fts5(
+                    content, content='recordings', content_rowid='number'
+                );"""
+            )
+        except sqlite3.OperationalError as e:
+            if "fts5" not in str(e).lower():
+                raise
+            print(f"[Migration] FTS5 unavailable, search falls back to LIKE: {e}")
+            return
+        conn.execute(
+            """CREATE VIRTUAL TABLE IF NOT EXISTS questions_fts USING fts5(
+                content, sentence_content, content='review_questions', content_rowid='id'
+            );"""
+        )
+        triggers = [
+            """CREATE TRIGGER IF NOT EXISTS trg_recordings_fts_insert
+               AFTER INSERT ON recordings
+               BEGIN
+                   INSERT INTO recordings_fts (rowid, content) VALUES (NEW.number, NEW.content);
+               END;""",
+            """CREATE TRIGGER IF NOT EXISTS trg_recordings_fts_delete
+               AFTER DELETE ON recordings
+               BEGIN
+                   INSERT INTO recordings_fts (recordings_fts, rowid, content)
+                   VALUES ('delete', OLD.number, OLD.content);
+               END;""",
+            """CREATE TRIGGER IF NOT EXISTS trg_recordings_fts_update
+               AFTER UPDATE OF content ON recordings
+               BEGIN
+                   INSERT INTO recordings_fts (recordings_fts, rowid, content)
+                   VALUES ('delete', OLD.number, OLD.content);
+                   INSERT INTO recordings_fts (rowid, content) VALUES (NEW.number, NEW.content);
+               END;""",
+            """CREATE TRIGGER IF NOT EXISTS trg_questions_fts_insert
+               AFTER INSERT ON review_questions
+               BEGIN
+                   INSERT INTO questions_fts (rowid, content, sentence_content)
+                   VALUES (NEW.id, NEW.content, NEW.sentence_content);
+               END;""",
+            """CREATE TRIGGER IF NOT EXISTS trg_questions_fts_delete
+               AFTER DELETE ON review_questions
+               BEGIN
+                   INSERT INTO questions_fts (questions_fts, rowid, content, sentence_content)
+                   VALUES ('delete', OLD.id, OLD.content, OLD.sentence_content);
+               END;""",
+            """CREATE TRIGGER IF NOT EXISTS trg_questions_fts_update
+               AFTER UPDATE OF content, sentence_content ON review_questions
+               BEGIN
+                   INSERT INTO questions_fts (questions_fts, rowid, content, sentence_content)
+                   VALUES ('delete', OLD.id, OLD.content, OLD.sentence_content);
+                   INSERT INTO questions_fts (rowid, content, sentence_content)
+                   VALUES (NEW.id, NEW.content, NEW.sentence_content);
+               END;""",
+        ]
+        for sql in triggers:
+            conn.execute(sql)
+        conn.execute("INSERT INTO recordings_fts (recordings_fts) VALUES ('rebuild');")
+        conn.execute("INSERT INTO questions_fts (questions_fts) VALUES ('rebuild');")
+        print("[Migration] Full-text index built")
+
+    def _migrate_v9_maintenance_state(self, conn):
+        """空闲维护任务的上次执行时间，跨进程重启保留"""
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS maintenance_state (
+                job TEXT PRIMARY KEY,
+                last_run REAL NOT NULL
+            );"""
+        )
+
+    QUESTION_COLUMNS = (
+        "id, save_time, content, sentence_content, ai_status, ai_question, "
+        "user_answer, is_correct, ai_feedback, answered_time"
+    )
+
+    def _migrate_v10_question_indexes(self, conn):
+        """review_questions 部分索引（待答 / 失败 / 已答）、content 索引及冷数据归档表"""
+        conn.execute(
+            """CREATE INDEX IF NOT EXISTS idx_questions_pending
+               ON review_questions(id) WHERE is_correct IS NULL;"""
+        )
+        conn.execute(
+            """CREATE INDEX IF NOT EXISTS idx_questions_failed
+               ON review_questions(id) WHERE ai_status = 'failed';"""
+        )
+        conn.execute(
+            """CREATE INDEX IF NOT EXISTS idx_questions_answered
+               ON review_questions(answered_time) WHERE is_correct IS NOT NULL;"""
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_questions_content ON review_questions(content);")
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS review_questions_archive (
+                id INTEGER PRIMARY KEY,
+                save_time TEXT NOT NULL,
+                content TEXT NOT NULL,
+                sentence_content TEXT,
+                ai_status TEXT DEFAULT NULL,
+                ai_question TEXT,
+                user_answer TEXT,
+                is_correct INTEGER,
+                ai_feedback TEXT,
+                answered_time TEXT
+            );"""
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_questions_archive_content ON review_questions_archive(content);"
+        )
+
+    def _migrate_v11_question_archive_fts(self, conn):
+        """归档的 Quiz 记录同样建立全文索引，search() 可检索超出保留期的历史"""
+        has_fts = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'recordings_fts'"
+        ).fetchone() is not None
+        if not has_fts:
+            return
+        conn.execute(
+            """CREATE VIRTUAL TABLE IF NOT EXISTS questions_archive_fts USING fts5(
+                content, sentence_content, content='review_questions_archive', content_rowid='id'
+            );"""
+        )
+        conn.execute(
+            """CREATE TRIGGER IF NOT EXISTS trg_questions_archive_fts_insert
+               AFTER INSERT ON review_questions_archive
+               BEGIN
+                   INSERT INTO questions_archive_fts (rowid, content, sentence_content)
+                   VALUES (NEW.id, NEW.content, NEW.sentence_content);
+               END;"""
+        )
+        conn.execute(
+            """CREATE TRIGGER IF NOT EXISTS trg_questions_archive_fts_delete
+               AFTER DELETE ON review_questions_archive
+               BEGIN
+                   INSERT INTO questions_archive_fts (questions_archive_fts, rowid, content, sentence_content)
+                   VALUES ('delete', OLD.id, OLD.content, OLD.sentence_content);
+               END;"""
+        )
+        conn.execute("INSERT INTO questions_archive_fts (questions_archive_fts) VALUES ('rebuild');")
+
     def _execute_with_retry(self, operation_func):
         if not self.connection:
             self.connect()
@@ -94,23 +923,121 @@ class DatabaseManager:
             except Exception as e:
                 raise
 
+    def _cached_read(self, key, operation, related=None):
+        """经由进程级读缓存执行只读查询 operation()"""
+        if self.cache is None:
+            return self._execute_with_retry(operation)
+        return self.cache.get_or_load(key, lambda: self._execute_with_retry(operation), related)
+
+    def _write(self, operation):
+        """
+        在当前线程的连接上执行写操作 operation(conn) 并提交，遇到 locked 时重试
+
+        Args:
+            operation: 接收连接对象的写函数，函数内不要 commit
+
+        Returns:
+            operation 的返回值
+        """
+        def run():
+            conn = self.connection
+            try:
+                result = operation(conn)
+                conn.commit()
+                return result
+            except Exception:
+                conn.rollback()
+                raise
+        return self._execute_with_retry(run)
+
+    @remote_write
+    def save_recording(self, content, date_str):
+        """
+        保存录音记录：内容已存在则更新日期，否则插入新记录（单词初始化复习字段）
+
+        Returns:
+            (number, is_new)
+        """
+        def operation(conn):
+            from text_processor import extract_letter_sequence, is_valid_word
+            letter_seq = extract_letter_sequence(content)
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT number FROM recordings WHERE content_hash = ? AND content = ?",
+                (text_hash(content), content)
+            )
+            row = cursor.fetchone()
+            if row:
+                number = row['number']
+                cursor.execute(
+                    "UPDATE recordings SET date = ?, letter_sequence = ?, letter_seq_hash = ? WHERE number = ?",
+                    (date_str, letter_seq, text_hash(letter_seq), number)
+                )
+                return number, False
+            is_word = is_valid_word(content)
+            cursor.execute(
+                """INSERT INTO recordings (content, date, letter_sequence, content_hash, letter_seq_hash, is_word)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                (content, date_str, letter_seq, text_hash(content), text_hash(letter_seq), int(is_word))
+            )
+            number = cursor.lastrowid
+            if is_word:
+                cursor.execute(
+                    """UPDATE recordings
+                       SET box_level = 1, next_review_date = ?, remember = 0, forget = 0, last_review_date = NULL
+                       WHERE number = ?""",
+                    (date_str, number)
+                )
+            return number, True
+        return self._write(operation)
+
+    @remote_write
     def insert_recording(self, content, date_str):
-        def operation():
-            cursor = self.connection.cursor()
+        def operation(conn):
+            from text_processor import extract_letter_sequence, is_valid_word
+            letter_seq = extract_letter_sequence(content)
+            cursor = conn.cursor()
             cursor.execute(
-                "INSERT INTO recordings (content, date) VALUES (?, ?)",
-                (content, date_str)
+                """INSERT INTO recordings (content, date, letter_sequence, content_hash, letter_seq_hash, is_word)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                (content, date_str, letter_seq, text_hash(content), text_hash(letter_seq),
+                 int(is_valid_word(content)))
             )
-            self.connection.commit()
             return cursor.lastrowid
-        return self._execute_with_retry(operation)
+        return self._write(operation)
 
+    @remote_write
     def delete_recording(self, number):
-        def operation():
-            cursor = self.connection.cursor()
+        def operation(conn):
+            cursor = conn.cursor()
             cursor.execute("DELETE FROM recordings WHERE number = ?", (number,))
-            self.connection.commit()
-        return self._execute_with_retry(operation)
+        return self._write(operation)
+
+    @remote_write
+    def delete_recordings(self, numbers):
+        """
+        批量删除录音记录：临时表 + 连接删除，整批在一个事务内完成
+
+        Returns:
+            int: 删除的记录数
+        """
+        numbers = list(numbers)
+        def operation(conn):
+            if not numbers:
+                return 0
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS delete_numbers (number INTEGER PRIMARY KEY)")
+            conn.execute("DELETE FROM temp.delete_numbers")
+            conn.executemany(
+                "INSERT OR IGNORE INTO temp.delete_numbers (number) VALUES (?)",
+                ((n,) for n in numbers)
+            )
+            cursor = conn.execute(
+                "DELETE FROM recordings WHERE number IN (SELECT number FROM temp.delete_numbers)"
+            )
+            deleted = cursor.rowcount
+            conn.execute("DELETE FROM temp.delete_numbers")
+            return deleted
+        return self._write(operation)
 
     def get_recordings_by_date(self, date_str):
         def operation():
@@ -119,18 +1046,55 @@ class DatabaseManager:
                 "SELECT number, content, date FROM recordings WHERE date = ? ORDER BY number DESC",
                 (date_str,)
             )
-            return cursor.fetchall()
-        return self._execute_with_retry(operation)
+            return tuple(cursor.fetchall())
+        return list(self._cached_read(('date', date_str), operation))
+
+    def get_recordings_page(self, date_str, before_number=None, limit=50):
+        """
+        按日期分页读取录音（keyset 分页，number 倒序）
+
+        Args:
+            before_number: 上一页最后一条的 number；None 表示第一页
+            limit: 每页条数
+
+        走 idx_date（索引隐含 rowid），翻页代价与页码无关。
+        """
+        def operation():
+            cursor = self.connection.cursor()
+            if before_number is None:
+                cursor.execute(
+                    """SELECT number, content, date FROM recordings
+                       WHERE date = ? ORDER BY number DESC LIMIT ?""",
+                    (date_str, limit)
+                )
+            else:
+                cursor.execute(
+                    """SELECT number, content, date FROM recordings
+                       WHERE date = ? AND number < ? ORDER BY number DESC LIMIT ?""",
+                    (date_str, before_number, limit)
+                )
+            return tuple(cursor.fetchall())
+        return list(self._cached_read(('page', date_str, before_number, limit), operation))
 
     def get_all_dates(self, limit=15):
         def operation():
             cursor = self.connection.cursor()
             cursor.execute(
-                f"SELECT DISTINCT date FROM recordings ORDER BY date DESC LIMIT {limit}"
+                "SELECT date FROM recording_days ORDER BY date DESC LIMIT ?",
+                (limit,)
             )
             return [row['date'] for row in cursor.fetchall()]
         return self._execute_with_retry(operation)
 
+    def get_day_count(self, date_str):
+        """获取指定日期的录音数量（读取 recording_days 汇总表）"""
+        def operation():
+            cursor = self.connection.cursor()
+            cursor.execute("SELECT count FROM recording_days WHERE date = ?", (date_str,))
+            row = cursor.fetchone()
+            return row['count'] if row else 0
+        return self._execute_with_retry(operation)
+
     def get_content(self, number):
         def operation():
             cursor = self.connection.cursor()
@@ -139,14 +1103,275 @@ class DatabaseManager:
             return row['content'] if row else None
         return self._execute_with_retry(operation)
 
-    def get_dates_exceeding_limit(self, limit=15):
+    # ==================== 空闲维护：WAL / 统计信息 / 空间回收 ====================
+    def get_maintenance_last_run(self, job):
+        """维护任务上次完成的时间戳（time.time()），从未执行返回 None"""
         def operation():
             cursor = self.connection.cursor()
-            cursor.execute("SELECT DISTINCT date FROM recordings ORDER BY date DESC")
-            all_dates = [row['date'] for row in cursor.fetchall()]
-            if len(all_dates) > limit:
-                return sorted(all_dates[limit:])
+            cursor.execute("SELECT last_run FROM maintenance_state WHERE job = ?", (job,))
+            row = cursor.fetchone()
+            return row['last_run'] if row else None
+        return self._execute_with_retry(operation)
+
+    @remote_write
+    def set_maintenance_last_run(self, job, timestamp):
+        def operation(conn):
+            conn.execute(
+                """INSERT INTO maintenance_state (job, last_run) VALUES (?, ?)
+                   ON CONFLICT(job) DO UPDATE SET last_run = excluded.last_run""",
+                (job, timestamp)
+            )
+        return self._write(operation)
+
+    def wal_checkpoint(self, mode="PASSIVE"):
+        """
+        执行 WAL checkpoint
+
+        Returns:
+            (busy, log_frames, checkpointed_frames)
+        """
+        if mode not in ("PASSIVE", "FULL", "RESTART", "TRUNCATE"):
+            raise ValueError(f"Invalid checkpoint mode: {mode}")
+        def operation():
+            row = self.connection.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+            return tuple(row)
+        return self._execute_with_retry(operation)
+
+    def optimize(self):
+        """PRAGMA optimize：只对统计信息过期的表执行 ANALYZE"""
+        def operation():
+            self.connection.execute("PRAGMA optimize").fetchall()
+        return self._execute_with_retry(operation)
+
+    def get_freelist_count(self):
+        def operation():
+            return self.connection.execute("PRAGMA freelist_count").fetchone()[0]
+        return self._execute_with_retry(operation)
+
+    def get_auto_vacuum(self):
+        """0 = NONE, 1 = FULL, 2 = INCREMENTAL"""
+        def operation():
+            return self.connection.execute("PRAGMA auto_vacuum").fetchone()[0]
+        return self._execute_with_retry(operation)
+
+    def enable_incremental_vacuum(self):
+        """
+        旧库切换为增量 vacuum 模式
+
+        需要一次完整 VACUUM：不可中断并在重建期间持有写锁，因此不放在空闲维护中，
+        只由命令行 python db_manager.py vacuum 在 UI 与主程序退出后执行。
+        """
+        def operation():
+            conn = self.connection
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+        return self._execute_with_retry(operation)
+
+    def incremental_vacuum(self, pages):
+        """回收最多 pages 个空闲页，返回剩余空闲页数"""
+        def operation():
+            conn = self.connection
+            conn.execute(f"PRAGMA incremental_vacuum({int(pages)})").fetchall()
+            return conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return self._execute_with_retry(operation)
+
+    # ==================== 冷存储：archive.db ====================
+    RECORDING_COLUMNS = (
+        "number, content, remember, forget, date, box_level, next_review_date, "
+        "last_review_date, letter_sequence, content_hash, letter_seq_hash, is_word"
+    )
+
+    def _attach_archive(self, conn):
+        """
+        在连接上 ATTACH archive.db（每个连接只需一次），并确保归档表结构存在
+
+        ATTACH 不能在事务中执行，因此归档读写不经过 _write，直接使用当前线程的连接。
+        """
+        if any(row[1] == "archive" for row in conn.execute("PRAGMA database_list")):
+            return
+        conn.execute("ATTACH DATABASE ? AS archive", (app_config.archive_db_path,))
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS archive.recordings (
+                number INTEGER PRIMARY KEY,
+                content TEXT NOT NULL,
+                remember INTEGER DEFAULT 0,
+                forget INTEGER DEFAULT 0,
+                date DATE NOT NULL,
+                box_level INTEGER DEFAULT 1,
+                next_review_date DATE,
+                last_review_date DATE,
+                letter_sequence TEXT,
+                content_hash INTEGER,
+                letter_seq_hash INTEGER,
+                is_word INTEGER DEFAULT 0,
+                archived_time TEXT
+            );"""
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS archive.idx_archive_date ON recordings(date);")
+        conn.execute("CREATE INDEX IF NOT EXISTS archive.idx_archive_content_hash ON recordings(content_hash);")
+        try:
+            conn.execute(
+                """CREATE VIRTUAL TABLE IF NOT EXISTS archive.recordings_fts USING fts5(
+                    content, content='recordings', content_rowid='number'
+                );"""
+            )
+            conn.execute(
+                """CREATE TRIGGER IF NOT EXISTS archive.trg_archive_fts_insert
+                   AFTER INSERT ON recordings
+                   BEGIN
+                       INSERT INTO recordings_fts (rowid, content) VALUES (NEW.number, NEW.content);
+                   END;"""
+            )
+            conn.execute(
+                """CREATE TRIGGER IF NOT EXISTS archive.trg_archive_fts_delete
+                   AFTER DELETE ON recordings
+                   BEGIN
+                       INSERT INTO recordings_fts (recordings_fts, rowid, content)
+                       VALUES ('delete', OLD.number, OLD.content);
+                   END;"""
+            )
+        except sqlite3.OperationalError as e:
+            if "fts5" not in str(e).lower():
+                raise
+        if conn.in_transaction:
+            conn.commit()
+
+    def archive_recordings(self, numbers):
+        """
+        在一个事务中把 numbers 对应的记录复制到 archive.db 并从主库删除
+
+        归档库中已有同 number 的行时先删后插，中断后重复执行是安全的，
+        且全文索引的删除触发器同样会执行。返回主库删除的条数。
+        """
+        numbers = list(numbers)
+        if not numbers:
+            return 0
+
+        def operation():
+            conn = self.connection
+            self._attach_archive(conn)
+            cols = self.RECORDING_COLUMNS
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("CREATE TEMP TABLE IF NOT EXISTS archive_numbers (number INTEGER PRIMARY KEY)")
+                conn.execute("DELETE FROM temp.archive_numbers")
+                conn.executemany(
+                    "INSERT OR IGNORE INTO temp.archive_numbers (number) VALUES (?)",
+                    [(n,) for n in numbers]
+                )
+                # 先删后插（而非 INSERT OR REPLACE），REPLACE 不会触发全文索引的删除触发器
+                conn.execute(
+                    """DELETE FROM archive.recordings
+                       WHERE number IN (SELECT number FROM temp.archive_numbers)
+                         AND number IN (SELECT number FROM main.recordings)"""
+                )
+                conn.execute(
+                    f"""INSERT INTO archive.recordings ({cols}, archived_time)
+                        SELECT {cols}, datetime('now', 'localtime') FROM main.recordings
+                        WHERE number IN (SELECT number FROM temp.archive_numbers)"""
+                )
+                cursor = conn.execute(
+                    "DELETE FROM main.recordings WHERE number IN (SELECT number FROM temp.archive_numbers)"
+                )
+                conn.execute("DELETE FROM temp.archive_numbers")
+                conn.commit()
+                return cursor.rowcount
+            except Exception:
+                conn.rollback()
+                raise
+        return self._execute_with_retry(operation)
+
+    def get_archived_recording(self, number):
+        if not os.path.exists(app_config.archive_db_path):
+            return None
+
+        def operation():
+            conn = self.connection
+            self._attach_archive(conn)
+            cursor = conn.execute("SELECT * FROM archive.recordings WHERE number = ?", (number,))
+            return cursor.fetchone()
+        return self._execute_with_retry(operation)
+
+    def restore_archived_recording(self, number, date_str):
+        """
+        把归档记录移回主库并改为 date_str（通常为今天），保留复习进度
+
+        主库中已有相同内容时不再插入，直接删除归档行并返回已有记录的 number。
+        """
+        def operation():
+            conn = self.connection
+            self._attach_archive(conn)
+            cols = self.RECORDING_COLUMNS
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT * FROM archive.recordings WHERE number = ?", (number,)).fetchone()
+                if row is None:
+                    conn.rollback()
+                    return None
+                existing = conn.execute(
+                    "SELECT number FROM main.recordings WHERE content_hash = ? AND content = ?",
+                    (row['content_hash'], row['content'])
+                ).fetchone()
+                if existing:
+                    restored = existing['number']
+                else:
+                    conn.execute(
+                        f"""INSERT INTO main.recordings ({cols})
+                            SELECT {cols} FROM archive.recordings WHERE number = ?""",
+                        (number,)
+                    )
+                    conn.execute("UPDATE main.recordings SET date = ? WHERE number = ?", (date_str, number))
+                    restored = number
+                conn.execute("DELETE FROM archive.recordings WHERE number = ?", (number,))
+                conn.commit()
+                return restored
+            except Exception:
+                conn.rollback()
+                raise
+        return self._execute_with_retry(operation)
+
+    def search_archive(self, query, limit=50):
+        """在 archive.db 中按相关度搜索录音内容，结果格式同 search()，source 为 'archive'"""
+        fts_query = self._fts_query(query)
+        if not fts_query or not os.path.exists(app_config.archive_db_path):
             return []
+
+        def operation():
+            conn = self.connection
+            self._attach_archive(conn)
+            has_fts = conn.execute(
+                "SELECT 1 FROM archive.sqlite_master WHERE type = 'table' AND name = 'recordings_fts'"
+            ).fetchone() is not None
+            if has_fts:
+                cursor = conn.execute(
+                    """SELECT r.number, r.content, r.date, f.rank AS rank
+                       FROM archive.recordings_fts AS f JOIN archive.recordings AS r ON r.number = f.rowid
+                       WHERE f.recordings_fts MATCH ?
+                       ORDER BY f.rank LIMIT ?""",
+                    (fts_query, limit)
+                )
+            else:
+                pattern = "%" + re.sub(r"([\\%_])", r"\\\1", query.strip()) + "%"
+                cursor = conn.execute(
+                    """SELECT number, content, date, 0 AS rank FROM archive.recordings
+                       WHERE content LIKE ? ESCAPE '\\' ORDER BY number DESC LIMIT ?""",
+                    (pattern, limit)
+                )
+            return [
+                {'source': 'archive', 'number': row['number'], 'content': row['content'],
+                 'date': row['date'], 'rank': row['rank']}
+                for row in cursor.fetchall()
+            ]
+        return self._execute_with_retry(operation)
+
+    def get_dates_exceeding_limit(self, limit=15):
+        def operation():
+            cursor = self.connection.cursor()
+            cursor.execute(
+                "SELECT date FROM recording_days ORDER BY date DESC LIMIT -1 OFFSET ?",
+                (limit,)
+            )
+            return sorted(row['date'] for row in cursor.fetchall())
         return self._execute_with_retry(operation)
 
     def get_recordings_by_date_list(self, date_list):
@@ -172,7 +1397,7 @@ class DatabaseManager:
             cursor = self.connection.cursor()
             cursor.execute("SELECT * FROM recordings WHERE number = ?", (number,))
             return cursor.fetchone()
-        return self._execute_with_retry(operation)
+        return self._cached_read(('number', number), operation)
 
     # ==================== 新增：内容去重相关方法 ====================
     def get_recording_by_content(self, content):
@@ -187,13 +1412,15 @@ class DatabaseManager:
         """
         def operation():
             cursor = self.connection.cursor()
+            # 先按整数哈希探测索引，再比对原文排除哈希碰撞
             cursor.execute(
-                "SELECT * FROM recordings WHERE content = ?",
-                (content,)
+                "SELECT * FROM recordings WHERE content_hash = ? AND content = ?",
+                (text_hash(content), content)
             )
             return cursor.fetchone()
         return self._execute_with_retry(operation)
 
+    @remote_write
     def update_recording_date(self, number, date_str):
         """
         更新记录的 date 字段（最近一次录音时间）
@@ -202,152 +1429,103 @@ class DatabaseManager:
             number: 录音记录的 number
             date_str: 新的日期字符串 (YYYY-MM-DD)
         """
-        def operation():
-            cursor = self.connection.cursor()
+        def operation(conn):
+            cursor = conn.cursor()
             cursor.execute(
                 "UPDATE recordings SET date = ? WHERE number = ?",
                 (date_str, number)
             )
-            self.connection.commit()
-        return self._execute_with_retry(operation)
-
-    # ==================== 阶段三：数据库字段扩展 + 迁移 ====================
-    def migrate_add_review_fields(self):
-        """迁移：添加 Leitner 盒子系统所需的字段"""
-        if not self.connection:
-            self.connect()
-
-        from datetime import date
-        today = date.today().isoformat()
-
-        migrations = [
-            ("box_level", "INTEGER DEFAULT 1"),
-            ("next_review_date", "DATE"),
-            ("last_review_date", "DATE")
-        ]
-
-        for field_name, field_type in migrations:
-            try:
-                self.connection.execute(f"ALTER TABLE recordings ADD COLUMN {field_name} {field_type}")
-                print(f"[Migration] Added column: {field_name}")
-            except sqlite3.OperationalError as e:
-                if "duplicate column name" in str(e).lower():
-                    print(f"[Migration] Column already exists: {field_name}")
-                else:
-                    raise
-
-        # 为现有记录设置初始值
-        try:
-            cursor = self.connection.cursor()
-            cursor.execute(
-                "UPDATE recordings SET box_level = 1, next_review_date = ? WHERE box_level IS NULL",
-                (today,)
-            )
-            if cursor.rowcount > 0:
-                print(f"[Migration] Initialized {cursor.rowcount} existing records")
-            self.connection.commit()
-        except sqlite3.Error as e:
-            print(f"[Migration] Error initializing records: {e}")
+        return self._write(operation)
 
     # ==================== 阶段四：复习相关查询方法 ====================
     def get_words_to_review(self):
-        """获取待复习的单词列表（next_review_date <= 今天）"""
+        """
+        获取待复习的单词列表（next_review_date <= 今天）
+
+        已归档但到期的单词一并返回（archived = 1），复习前需先用 archive_store.restore_recording 恢复；
+        主库已有相同内容的归档行不重复返回。
+        """
+        include_archive = os.path.exists(app_config.archive_db_path)
+
         def operation():
             from datetime import date
             today = date.today().isoformat()
-            cursor = self.connection.cursor()
-            cursor.execute(
-                """SELECT number, content, box_level, next_review_date, last_review_date, remember, forget
-                   FROM recordings
-                   WHERE next_review_date <= ?
-                   ORDER BY box_level ASC, next_review_date ASC""",
-                (today,)
-            )
-            return cursor.fetchall()
+            conn = self.connection
+            columns = "number, content, box_level, next_review_date, last_review_date, remember, forget"
+            if not include_archive:
+                return conn.execute(
+                    f"""SELECT {columns}, 0 AS archived
+                        FROM recordings
+                        WHERE is_word = 1 AND next_review_date <= ?
+                        ORDER BY box_level ASC, next_review_date ASC""",
+                    (today,)
+                ).fetchall()
+            self._attach_archive(conn)
+            return conn.execute(
+                f"""SELECT {columns}, 0 AS archived
+                    FROM main.recordings
+                    WHERE is_word = 1 AND next_review_date <= ?
+                    UNION ALL
+                    SELECT {columns}, 1 AS archived
+                    FROM archive.recordings AS a
+                    WHERE is_word = 1 AND next_review_date <= ?
+                      AND NOT EXISTS (SELECT 1 FROM main.recordings AS m
+                                      WHERE m.content_hash = a.content_hash AND m.content = a.content)
+                    ORDER BY box_level ASC, next_review_date ASC""",
+                (today, today)
+            ).fetchall()
         return self._execute_with_retry(operation)
 
+    @remote_write
     def update_word_box(self, number, box_level, next_review_date, remember, forget, last_review_date):
         """更新单词的复习状态"""
-        def operation():
-            cursor = self.connection.cursor()
+        def operation(conn):
+            cursor = conn.cursor()
             cursor.execute(
                 """UPDATE recordings
                    SET box_level = ?, next_review_date = ?, remember = ?, forget = ?, last_review_date = ?
                    WHERE number = ?""",
                 (box_level, next_review_date, remember, forget, last_review_date, number)
             )
-            self.connection.commit()
-        return self._execute_with_retry(operation)
+        return self._write(operation)
 
     def get_review_stats(self):
-        """获取复习统计信息"""
+        """获取复习统计信息（待复习数量含已归档的到期单词）"""
+        include_archive = os.path.exists(app_config.archive_db_path)
+
         def operation():
             from datetime import date
-            from text_processor import is_valid_word
             today = date.today().isoformat()
             cursor = self.connection.cursor()
 
-            # 待复习数量（仅合法单词）
+            # 待复习数量（仅合法单词，走 is_word 部分索引）
             cursor.execute(
-                "SELECT content FROM recordings WHERE next_review_date <= ?",
+                "SELECT COUNT(*) FROM recordings WHERE is_word = 1 AND next_review_date <= ?",
                 (today,)
             )
-            pending = sum(1 for row in cursor.fetchall() if is_valid_word(row['content']))
+            pending = cursor.fetchone()[0]
+            if include_archive:
+                self._attach_archive(self.connection)
+                cursor.execute(
+                    """SELECT COUNT(*) FROM archive.recordings AS a
+                       WHERE is_word = 1 AND next_review_date <= ?
+                         AND NOT EXISTS (SELECT 1 FROM main.recordings AS m
+                                         WHERE m.content_hash = a.content_hash AND m.content = a.content)""",
+                    (today,)
+                )
+                pending += cursor.fetchone()[0]
 
             # 今日已完成数量（仅合法单词）
             cursor.execute(
-                "SELECT content FROM recordings WHERE last_review_date = ?",
+                "SELECT COUNT(*) FROM recordings WHERE is_word = 1 AND last_review_date = ?",
                 (today,)
             )
-            completed = sum(1 for row in cursor.fetchall() if is_valid_word(row['content']))
+            completed = cursor.fetchone()[0]
 
             return {'pending': pending, 'completed': completed}
         return self._execute_with_retry(operation)
 
     # ==================== Phase 1: Letter Sequence Matching ====================
-    def migrate_add_letter_sequence(self):
-        """Migration: Add letter_sequence column and populate it."""
-        if not self.connection:
-            self.connect()
-
-        try:
-            self.connection.execute("ALTER TABLE recordings ADD COLUMN letter_sequence TEXT")
-            print("[Migration] Added column: letter_sequence")
-        except sqlite3.OperationalError as e:
-            if "duplicate column name" in str(e).lower():
-                print("[Migration] Column already exists: letter_sequence")
-            else:
-                raise
-
-        # Create index
-        try:
-            self.connection.execute("CREATE INDEX IF NOT EXISTS idx_letter_sequence ON recordings(letter_sequence);")
-        except sqlite3.Error as e:
-            print(f"[Migration] Error creating index: {e}")
-
-        # Populate existing records
-        try:
-            from text_processor import extract_letter_sequence
-            cursor = self.connection.cursor()
-            cursor.execute("SELECT number, content FROM recordings WHERE letter_sequence IS NULL")
-            rows = cursor.fetchall()
-
-            count = 0
-            for row in rows:
-                seq = extract_letter_sequence(row['content'])
-                cursor.execute(
-                    "UPDATE recordings SET letter_sequence = ? WHERE number = ?",
-                    (seq, row['number'])
-                )
-                count += 1
-
-            self.connection.commit()
-            if count > 0:
-                print(f"[Migration] Populated letter_sequence for {count} records")
-
-        except Exception as e:
-            print(f"[Migration] Error populating letter_sequence: {e}")
-
     def get_recording_by_letter_sequence(self, letter_seq):
         """
         Query recording by exact letter sequence match.
@@ -361,66 +1539,177 @@ class DatabaseManager:
         def operation():
             cursor = self.connection.cursor()
             cursor.execute(
-                "SELECT * FROM recordings WHERE letter_sequence = ?",
-                (letter_seq,)
+                "SELECT * FROM recordings WHERE letter_seq_hash = ? AND letter_sequence = ?",
+                (seq_hash, letter_seq)
             )
             return cursor.fetchone()
+
+        def related(row):
+            return [(('number', row['number']), row)] if row is not None else []
+
+        seq_hash = text_hash(letter_seq)
+        return self._cached_read(('letter_seq', seq_hash, letter_seq), operation, related)
+
+    def get_letter_sequences_since(self, last_number=0):
+        """
+        Fetch (number, letter_sequence) rows with number > last_number,
+        used to build and incrementally refresh the approximate-match index.
+        """
+        def operation():
+            cursor = self.connection.cursor()
+            cursor.execute(
+                """SELECT number, letter_sequence FROM recordings
+                   WHERE number > ? AND letter_sequence IS NOT NULL AND letter_sequence != ''
+                   ORDER BY number""",
+                (last_number,)
+            )
+            return cursor.fetchall()
         return self._execute_with_retry(operation)
 
-    # ==================== Quiz: review_questions 表 ====================
-    def migrate_create_review_questions(self):
-        """创建 review_questions 表"""
-        if not self.connection:
-            self.connect()
-        create_sql = """
-        CREATE TABLE IF NOT EXISTS review_questions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            save_time TEXT NOT NULL,
-            content TEXT NOT NULL,
-            sentence_content TEXT,
-            ai_status TEXT DEFAULT NULL,
-            ai_question TEXT,
-            user_answer TEXT,
-            is_correct INTEGER,
-            ai_feedback TEXT,
-            answered_time TEXT
-        );
+    def get_letter_sequence_numbers(self):
+        """letter_sequence 非空的全部 number，用于核对近似匹配索引中已删除 / 归档 / 恢复的记录"""
+        def operation():
+            cursor = self.connection.cursor()
+            cursor.execute(
+                "SELECT number FROM recordings WHERE letter_sequence IS NOT NULL AND letter_sequence != ''"
+            )
+            return {row[0] for row in cursor.fetchall()}
+        return self._execute_with_retry(operation)
+
+    def get_letter_sequences(self, numbers):
+        """按 number 批量获取 (number, letter_sequence) 行"""
+        numbers = list(numbers)
+
+        def operation():
+            cursor = self.connection.cursor()
+            rows = []
+            for i in range(0, len(numbers), 500):
+                chunk = numbers[i:i + 500]
+                placeholders = ','.join(['?'] * len(chunk))
+                cursor.execute(
+                    f"""SELECT number, letter_sequence FROM recordings
+                        WHERE number IN ({placeholders})
+                          AND letter_sequence IS NOT NULL AND letter_sequence != ''""",
+                    chunk
+                )
+                rows.extend(cursor.fetchall())
+            return rows
+        return self._execute_with_retry(operation)
+
+    def get_data_version(self):
         """
-        try:
-            with self.connection:
-                self.connection.execute(create_sql)
-            self._migrate_add_question_columns()
-            print("[Migration] review_questions table ready")
-        except sqlite3.Error as e:
-            print(f"[Migration] Error creating review_questions: {e}")
+        当前线程连接的 PRAGMA data_version
 
-    def _migrate_add_question_columns(self):
-        migrations = [
-            ("ai_status", "TEXT DEFAULT NULL"),
-        ]
-        for field_name, field_type in migrations:
-            try:
-                self.connection.execute(
-                    f"ALTER TABLE review_questions ADD COLUMN {field_name} {field_type}"
+        其他连接（包括其他进程）提交写入后该值变化；只能与同一线程先前取得的值比较。
+        """
+        def operation():
+            return self.connection.execute("PRAGMA data_version").fetchone()[0]
+        return self._execute_with_retry(operation)
+
+    # ==================== 全文搜索 ====================
+    def _has_fts(self):
+        if not hasattr(self, "_fts_available"):
+            cursor = self.connection.cursor()
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'recordings_fts'"
+            )
+            self._fts_available = cursor.fetchone() is not None
+        return self._fts_available
+
+    @staticmethod
+    def _fts_query(query):
+        """把用户输入转成 FTS5 查询：每个词做前缀匹配，词之间为 AND"""
+        tokens = re.findall(r"\w+", query or "")
+        return " ".join(f'"{token}"*' for token in tokens)
+
+    def search(self, query, limit=50):
+        """
+        按相关度搜索录音内容与 Quiz 历史
+
+        Returns:
+            list[dict]: 按 rank 升序（越小越相关）。每项包含 source
+            ('recording' / 'question')、content、date；录音项带 number，
+            Quiz 项带 id、sentence_content 与 archived（已移入 review_questions_archive）。
+        """
+        fts_query = self._fts_query(query)
+        if not fts_query:
+            return []
+
+        def operation():
+            cursor = self.connection.cursor()
+            if self._has_fts():
+                cursor.execute(
+                    """SELECT r.number, r.content, r.date, recordings_fts.rank AS rank
+                       FROM recordings_fts JOIN recordings r ON r.number = recordings_fts.rowid
+                       WHERE recordings_fts MATCH ?
+                       ORDER BY recordings_fts.rank LIMIT ?""",
+                    (fts_query, limit)
                 )
-                print(f"[Migration] Added review_questions column: {field_name}")
-            except sqlite3.OperationalError as e:
-                if "duplicate column name" in str(e).lower():
-                    pass
-                else:
-                    raise
+                recordings = cursor.fetchall()
+                cursor.execute(
+                    """SELECT q.id, q.content, q.sentence_content, q.save_time, f.rank AS rank, 0 AS archived
+                       FROM questions_fts AS f JOIN review_questions q ON q.id = f.rowid
+                       WHERE f.questions_fts MATCH ?
+                       UNION ALL
+                       SELECT q.id, q.content, q.sentence_content, q.save_time, f.rank AS rank, 1 AS archived
+                       FROM questions_archive_fts AS f JOIN review_questions_archive q ON q.id = f.rowid
+                       WHERE f.questions_archive_fts MATCH ?
+                       ORDER BY rank LIMIT ?""",
+                    (fts_query, fts_query, limit)
+                )
+                questions = cursor.fetchall()
+            else:
+                pattern = "%" + re.sub(r"([\\%_])", r"\\\1", query.strip()) + "%"
+                cursor.execute(
+                    """SELECT number, content, date, 0 AS rank FROM recordings
+                       WHERE content LIKE ? ESCAPE '\\' ORDER BY number DESC LIMIT ?""",
+                    (pattern, limit)
+                )
+                recordings = cursor.fetchall()
+                cursor.execute(
+                    """SELECT id, content, sentence_content, save_time, 0 AS rank, 0 AS archived
+                       FROM review_questions
+                       WHERE content LIKE ? ESCAPE '\\' OR sentence_content LIKE ? ESCAPE '\\'
+                       UNION ALL
+                       SELECT id, content, sentence_content, save_time, 0 AS rank, 1 AS archived
+                       FROM review_questions_archive
+                       WHERE content LIKE ? ESCAPE '\\' OR sentence_content LIKE ? ESCAPE '\\'
+                       ORDER BY id DESC LIMIT ?""",
+                    (pattern, pattern, pattern, pattern, limit)
+                )
+                questions = cursor.fetchall()
+
+            results = [
+                {'source': 'recording', 'number': row['number'], 'content': row['content'],
+                 'date': row['date'], 'rank': row['rank']}
+                for row in recordings
+            ]
+            for row in questions:
+                # save_time 格式为 %Y%m%d%H%M%S
+                save_time = row['save_time'] or ''
+                results.append({
+                    'source': 'question', 'id': row['id'], 'content': row['content'],
+                    'sentence_content': row['sentence_content'],
+                    'date': f"{save_time[:4]}-{save_time[4:6]}-{save_time[6:8]}",
+                    'rank': row['rank'],
+                    'archived': bool(row['archived']),
+                })
+            results.sort(key=lambda item: item['rank'])
+            return results[:limit]
+        return self._execute_with_retry(operation)
 
+    # ==================== Quiz: review_questions 表 ====================
+    @remote_write
     def insert_question(self, save_time, content, sentence_content, ai_question=None, ai_status=None):
         """插入一条出题记录"""
-        def operation():
-            cursor = self.connection.cursor()
+        def operation(conn):
+            cursor = conn.cursor()
             cursor.execute(
                 "INSERT INTO review_questions (save_time, content, sentence_content, ai_status, ai_question) VALUES (?, ?, ?, ?, ?)",
                 (save_time, content, sentence_content, ai_status, ai_question)
             )
-            self.connection.commit()
             return cursor.lastrowid
-        return self._execute_with_retry(operation)
+        return self._write(operation)
 
     def get_pending_questions(self):
         """获取未答题的记录"""
@@ -432,40 +1721,132 @@ class DatabaseManager:
             return cursor.fetchall()
         return self._execute_with_retry(operation)
 
+    def get_next_pending_questions(self, n=1):
+        """按 id 顺序取前 n 条未答题记录（走 idx_questions_pending 部分索引）"""
+        def operation():
+            cursor = self.connection.cursor()
+            cursor.execute(
+                "SELECT * FROM review_questions WHERE is_correct IS NULL ORDER BY id ASC LIMIT ?",
+                (n,)
+            )
+            return cursor.fetchall()
+        return self._execute_with_retry(operation)
+
+    def get_failed_questions(self, limit=50):
+        """AI 出题失败的记录（走 idx_questions_failed 部分索引）"""
+        def operation():
+            cursor = self.connection.cursor()
+            cursor.execute(
+                "SELECT * FROM review_questions WHERE ai_status = 'failed' ORDER BY id ASC LIMIT ?",
+                (limit,)
+            )
+            return cursor.fetchall()
+        return self._execute_with_retry(operation)
+
+    def get_questions_by_content(self, content, include_archive=False):
+        """按单词查出题记录，可选包含已归档记录"""
+        def operation():
+            cursor = self.connection.cursor()
+            cols = self.QUESTION_COLUMNS
+            sql = f"SELECT {cols} FROM review_questions WHERE content = ?"
+            params = [content]
+            if include_archive:
+                sql += f" UNION ALL SELECT {cols} FROM review_questions_archive WHERE content = ?"
+                params.append(content)
+            cursor.execute(sql + " ORDER BY id ASC", params)
+            return cursor.fetchall()
+        return self._execute_with_retry(operation)
+
     def get_question(self, question_id):
         def operation():
             cursor = self.connection.cursor()
             cursor.execute("SELECT * FROM review_questions WHERE id = ?", (question_id,))
-            return cursor.fetchone()
+            row = cursor.fetchone()
+            if row is None:
+                cursor.execute("SELECT * FROM review_questions_archive WHERE id = ?", (question_id,))
+                row = cursor.fetchone()
+            return row
         return self._execute_with_retry(operation)
 
+    @remote_write
+    def archive_answered_questions(self, retention_days, batch_size=500):
+        """
+        将 answered_time 早于保留期的已答记录移入 review_questions_archive
+
+        每次调用在一个事务中最多移动 batch_size 条，返回移动的条数。
+        """
+        from datetime import datetime, timedelta
+        cutoff = (datetime.now() - timedelta(days=retention_days)).strftime("%Y%m%d%H%M%S")
+
+        def operation(conn):
+            cols = self.QUESTION_COLUMNS
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS archive_ids (id INTEGER PRIMARY KEY)")
+            conn.execute("DELETE FROM temp.archive_ids")
+            conn.execute(
+                """INSERT INTO temp.archive_ids (id)
+                   SELECT id FROM review_questions
+                   WHERE is_correct IS NOT NULL AND answered_time < ?
+                   ORDER BY answered_time LIMIT ?""",
+                (cutoff, batch_size)
+            )
+            # 先删后插（而非 INSERT OR REPLACE），重试时全文索引的删除触发器也会执行
+            conn.execute("DELETE FROM review_questions_archive WHERE id IN (SELECT id FROM temp.archive_ids)")
+            conn.execute(
+                f"""INSERT INTO review_questions_archive ({cols})
+                    SELECT {cols} FROM review_questions
+                    WHERE id IN (SELECT id FROM temp.archive_ids)"""
+            )
+            cursor = conn.execute(
+                "DELETE FROM review_questions WHERE id IN (SELECT id FROM temp.archive_ids)"
+            )
+            conn.execute("DELETE FROM temp.archive_ids")
+            return cursor.rowcount
+        return self._write(operation)
+
+    @remote_write
     def update_question_status(self, question_id, ai_status):
-        def operation():
-            cursor = self.connection.cursor()
+        def operation(conn):
+            cursor = conn.cursor()
             cursor.execute(
                 "UPDATE review_questions SET ai_status = ? WHERE id = ?",
                 (ai_status, question_id)
             )
-            self.connection.commit()
-        return self._execute_with_retry(operation)
+        return self._write(operation)
 
+    @remote_write
     def update_question_ai_result(self, question_id, ai_question, ai_status):
-        def operation():
-            cursor = self.connection.cursor()
+        def operation(conn):
+            cursor = conn.cursor()
             cursor.execute(
                 "UPDATE review_questions SET ai_question = ?, ai_status = ? WHERE id = ?",
                 (ai_question, ai_status, question_id)
             )
-            self.connection.commit()
-        return self._execute_with_retry(operation)
+        return self._write(operation)
 
+    @remote_write
     def update_answer(self, question_id, user_answer, is_correct, ai_feedback, answered_time):
         """更新用户答案和批改结果"""
-        def operation():
-            cursor = self.connection.cursor()
+        def operation(conn):
+            cursor = conn.cursor()
             cursor.execute(
                 "UPDATE review_questions SET user_answer = ?, is_correct = ?, ai_feedback = ?, answered_time = ? WHERE id = ?",
                 (user_answer, is_correct, ai_feedback, answered_time, question_id)
             )
-            self.connection.commit()
-        return self._execute_with_retry(operation)
\ No newline at end of file
+        return self._write(operation)
+
+if __name__ == "__main__":
+    import sys
+    if sys.argv[1:] == ['vacuum']:
+        manager = DatabaseManager()
+        manager.local_writes = True
+        manager.init_db()
+        if manager.get_auto_vacuum() == 2:
+            print("[Database] Already in incremental vacuum mode")
+        else:
+            print("[Database] Converting to incremental vacuum (full VACUUM, close the UI and main.py first)...")
+            started = time.time()
+            manager.enable_incremental_vacuum()
+            print(f"[Database] Done in {time.time() - started:.1f}s")
+        manager.close()
+    else:
+        print("Usage: python db_manager.py vacuum")
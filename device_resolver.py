@@ -0,0 +1,132 @@
+"""
+device_resolver.py - Loopback 设备解析与缓存
+包含: DeviceResolver, get_device_resolver, get_loopback_mic
+
+完整解析需要 sc.default_speaker() 加两次 sc.all_microphones() 枚举，
+音频端点多的机器上很慢。解析结果按默认输出设备缓存：
+- 只用 sc.default_speaker()（廉价）轮询默认输出设备是否变化
+- 变化时才重新枚举，并通知已注册的监听者（如采集服务重开录音流）
+"""
+import threading
+import time
+import soundcard as sc
+from config_loader import app_config
+
+class DeviceResolver:
+    def __init__(self, poll_interval=None):
+        self.poll_interval = app_config.device_poll_seconds if poll_interval is None else poll_interval
+        self._lock = threading.Lock()
+        self._mic = None
+        self._speaker_id = None
+        self._last_check = 0.0
+        self._listeners = []
+        self.last_resolve_ms = None
+        self.resolve_count = 0
+
+    def add_listener(self, callback):
+        """注册默认输出设备变化回调 callback(new_mic)，在检测到变化的线程中调用"""
+        with self._lock:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def get_loopback_mic(self):
+        """
+        返回当前默认输出设备的 Loopback 设备（缓存），失败时返回 None
+
+        距上次检查不足 poll_interval 秒时直接返回缓存，不访问设备。
+        """
+        with self._lock:
+            mic = self._mic
+            fresh = time.monotonic() - self._last_check < self.poll_interval
+        if mic is not None and fresh:
+            return mic
+        self.check_default_changed()
+        with self._lock:
+            if self._mic is not None:
+                return self._mic
+        return self._resolve()
+
+    def invalidate(self):
+        with self._lock:
+            self._mic = None
+            self._speaker_id = None
+
+    def check_default_changed(self):
+        """
+        廉价检查默认输出设备是否变化；变化时重新解析并通知监听者
+
+        Returns:
+            bool: 是否发生了变化（首次解析不算变化）
+        """
+        try:
+            speaker = sc.default_speaker()
+        except Exception as e:
+            print(f"[Device] Error reading default speaker: {e}")
+            return False
+        with self._lock:
+            self._last_check = time.monotonic()
+            previous = self._speaker_id
+            if previous == speaker.id and self._mic is not None:
+                return False
+        mic = self._resolve(speaker)
+        if previous is None or mic is None:
+            return False
+        print(f"[Device] Default output changed to {speaker.name}")
+        with self._lock:
+            listeners = list(self._listeners)
+        for callback in listeners:
+            try:
+                callback(mic)
+            except Exception as e:
+                print(f"[Device] Listener error: {e}")
+        return True
+
+    def _resolve(self, default_speaker=None):
+        """完整枚举设备，找到与默认输出设备对应的 Loopback"""
+        started = time.perf_counter()
+        try:
+            if default_speaker is None:
+                default_speaker = sc.default_speaker()
+            all_mics = sc.all_microphones(include_loopback=True)
+            physical_mics_ids = {m.id for m in sc.all_microphones(include_loopback=False)}
+            loopback_candidates = [m for m in all_mics if m.id not in physical_mics_ids]
+            mic = None
+            for candidate in loopback_candidates:
+                if candidate.name == default_speaker.name:
+                    mic = candidate
+                    break
+            if mic is None:
+                mic = sc.get_microphone(id=str(default_speaker.name), include_loopback=True)
+                if mic.id not in {m.id for m in loopback_candidates}:
+                    print("[Device] Warning: Could not confirm loopback device identity. Using fallback.")
+        except Exception as e:
+            print(f"[Device] Error finding loopback: {e}")
+            return None
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self._mic = mic
+            self._speaker_id = default_speaker.id
+            self._last_check = time.monotonic()
+            self.last_resolve_ms = elapsed_ms
+            self.resolve_count += 1
+        print(f"[Device] Resolved loopback {mic.name} in {elapsed_ms:.0f} ms")
+        return mic
+
+_resolver = None
+_resolver_lock = threading.Lock()
+
+def get_device_resolver():
+    """进程内唯一的设备解析器"""
+    global _resolver
+    with _resolver_lock:
+        if _resolver is None:
+            _resolver = DeviceResolver()
+        return _resolver
+
+def get_loopback_mic():
+    """获取当前默认输出设备的 Loopback 设备（缓存），失败时返回 None"""
+    return get_device_resolver().get_loopback_mic()
@@ -12,9 +12,9 @@ from PyQt6.QtWidgets import QApplication, QWidget, QMenu
 from PyQt6.QtCore import Qt, QPoint, QPropertyAnimation, QEasingCurve, QRect
 from PyQt6.QtGui import QPainter, QColor, QBrush, QPen, QLinearGradient, QPainterPath, QAction, QCursor
 from config_loader import app_config
-from db_manager import DatabaseManager
+from db_manager import DatabaseManager, start_write_server
 from audio_player import AudioPlayer
-from ui_services import CommandServer, ConsistencyChecker
+from ui_services import CommandServer, MaintenanceScheduler
 from list_panel import ListPanel
 from word_game import WordGameWindow
 
@@ -25,8 +25,9 @@ class FloatingBall(QWidget):
         print("[Startup] FloatingBall initializing...")
         self.db_manager = DatabaseManager()
         self.db_manager.init_db()
-        self.consistency_checker = ConsistencyChecker(self.db_manager)
-        self.consistency_checker.start()
+        if app_config.db_write_server:
+            # 本进程独占写入，其他进程的写请求经写服务串行执行
+            start_write_server()
         self.setWindowFlags(Qt.WindowType.FramelessWindowHint | Qt.WindowType.WindowStaysOnTopHint | Qt.WindowType.Tool)
         self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
         self.diameter = app_config.ui_ball_diameter
@@ -51,9 +52,21 @@ class FloatingBall(QWidget):
         self.cmd_server.stop_playback_signal.connect(self.player.stop)
         self.cmd_server.play_request_signal.connect(lambda n, c: self.player.play(n, clear_queue=True, loop_count=c))
         self.cmd_server.silent_record_signal.connect(self.panel.on_silent_record_start)
+        self.cmd_server.variants_ready_signal.connect(self.panel.on_variants_ready)
         self.cmd_server.start()
+        # 空闲维护：一致性检查、过期清理、WAL checkpoint、optimize、空间回收
+        self.maintenance = MaintenanceScheduler(self.db_manager)
+        self.player.state_changed.connect(self.maintenance.on_playback_state)
+        self.cmd_server.activity_signal.connect(self.maintenance.note_activity)
+        self.cmd_server.recording_signal.connect(self.maintenance.on_recording)
+        self.maintenance.job_finished.connect(self._on_maintenance_job_finished)
+        self.maintenance.start()
         print(f"[Startup] FloatingBall init done in {time.time() - start_t:.4f}s")
 
+    def _on_maintenance_job_finished(self, name):
+        if name in ("consistency_check", "cleanup"):
+            self.panel.refresh_list(force_ui_update=True)
+
     def open_game_window(self, text):
         if self.game_window:
             self.game_window.close()
@@ -143,6 +156,8 @@ class FloatingBall(QWidget):
             client.close()
         except Exception as e:
             print(f"Failed to send exit signal to main app: {e}")
+        self.maintenance.stop()
+        self.maintenance.wait(2000)
         QApplication.instance().quit()
 
     def expand_panel(self):
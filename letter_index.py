@@ -0,0 +1,138 @@
+"""
+letter_index.py - 字母序列近似匹配索引
+包含: LetterSequenceIndex
+
+AltTrigger 精确匹配失败时，用内存中的 4-gram 倒排索引查找"包含或重叠"的
+已有录音（UIA 返回的文本常多出标签文字或尾部被截断），避免不必要的补录。
+
+评分方式：
+- containment = 共同 gram 数 / 较短序列的 gram 数（一方包含另一方时接近 1）
+- overlap     = 共同 gram 数 / 较长序列的 gram 数（防止短录音匹配到长句）
+"""
+import threading
+from collections import Counter
+
+GRAM_SIZE = 4
+
+def letter_grams(seq, n=GRAM_SIZE):
+    """字母序列的 n-gram 集合"""
+    if not seq:
+        return frozenset()
+    if len(seq) <= n:
+        return frozenset((seq,))
+    return frozenset(seq[i:i + n] for i in range(len(seq) - n + 1))
+
+class LetterSequenceIndex:
+    """
+    letter_sequence 的 n-gram 倒排索引
+
+    候选生成只使用查询中最稀有的 max_probe_grams 个 gram（倒排表长度不超过 max_postings），
+    再用完整 gram 集合的交集为少量候选精确打分，查询耗时与库大小基本无关。
+    """
+
+    def __init__(self, max_postings=500, max_probe_grams=48, max_candidates=8):
+        self.max_postings = max_postings
+        self.max_probe_grams = max_probe_grams
+        self.max_candidates = max_candidates
+        self._postings = {}   # gram -> set(number)
+        self._grams = {}      # number -> frozenset(gram)
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._data_versions = {}   # 线程 id -> 上次核对时该线程连接的 data_version
+        self.last_number = 0
+
+    def __len__(self):
+        return len(self._grams)
+
+    def add(self, number, seq):
+        grams = letter_grams(seq)
+        with self._lock:
+            self._remove_locked(number)
+            if grams:
+                self._grams[number] = grams
+                for gram in grams:
+                    self._postings.setdefault(gram, set()).add(number)
+            self.last_number = max(self.last_number, number)
+
+    def remove(self, number):
+        with self._lock:
+            self._remove_locked(number)
+
+    def _remove_locked(self, number):
+        grams = self._grams.pop(number, None)
+        if not grams:
+            return
+        for gram in grams:
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(number)
+                if not posting:
+                    del self._postings[gram]
+
+    def sync(self, db_manager):
+        """
+        与数据库同步，返回新加载与移除的记录数之和
+
+        首次调用即完成全量构建；录音可能由其他进程写入，因此每次查询前调用：
+        - 每次都增量加载 number 大于 last_number 的新录音
+        - PRAGMA data_version 变化（其他连接提交过写入）时再核对 number 集合，
+          加入恢复的归档记录（原 number 较小），移除已删除 / 归档的记录
+        """
+        with self._sync_lock:
+            rows = db_manager.get_letter_sequences_since(self.last_number)
+            for row in rows:
+                self.add(row['number'], row['letter_sequence'])
+            changed = len(rows)
+
+            # data_version 按连接计数，连接又按线程分配，因此按线程记录
+            thread_id = threading.get_ident()
+            version = db_manager.get_data_version()
+            if self._data_versions.get(thread_id) == version:
+                return changed
+            numbers = db_manager.get_letter_sequence_numbers()
+            with self._lock:
+                indexed = set(self._grams)
+            for number in indexed - numbers:
+                self.remove(number)
+            missing = numbers - indexed
+            if missing:
+                for row in db_manager.get_letter_sequences(missing):
+                    self.add(row['number'], row['letter_sequence'])
+            self._data_versions[thread_id] = version
+            return changed + len(indexed - numbers) + len(missing)
+
+    def best_match(self, seq, min_containment=0.85, min_overlap=0.5):
+        """
+        查找与 seq 最相近的记录
+
+        Returns:
+            (number, containment, overlap) 或 None
+        """
+        query = letter_grams(seq)
+        if not query:
+            return None
+        with self._lock:
+            postings = [self._postings.get(gram) for gram in query]
+            postings = sorted((p for p in postings if p), key=len)
+            if not postings:
+                return None
+            # 只用最稀有的若干 gram 投票；全是常见 gram 时至少保留最稀有的几个
+            rare = [p for p in postings[:self.max_probe_grams] if len(p) <= self.max_postings]
+            if not rare:
+                rare = postings[:self.max_candidates]
+            votes = Counter()
+            for posting in rare:
+                votes.update(posting)
+
+            best = None
+            for number, _ in votes.most_common(self.max_candidates):
+                grams = self._grams[number]
+                shared = len(query & grams)
+                containment = shared / min(len(query), len(grams))
+                overlap = shared / max(len(query), len(grams))
+                if containment < min_containment or overlap < min_overlap:
+                    continue
+                score = (containment, overlap)
+                if best is None or score > best[1:]:
+                    best = (number, containment, overlap)
+            return best
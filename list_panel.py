@@ -1,17 +1,19 @@
 """
 list_panel.py - 列表面板
 包含: ListPanel, AudioListItem, DateFilterComboBox, ModeSelector
+ListPanel 日期行带搜索框，输入停顿后按相关度显示录音与 Quiz 历史
+ListPanel 按页加载当天录音，滚动接近底部时再加载下一页
 """
-import os
 from datetime import datetime
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
-    QPushButton, QScrollArea, QFrame, QComboBox, QMenu)
+    QPushButton, QScrollArea, QFrame, QComboBox, QMenu, QLineEdit)
 from PyQt6.QtCore import Qt, QTimer, pyqtSignal
 from PyQt6.QtGui import QCursor, QAction
 from PyQt6.QtMultimedia import QMediaPlayer
 from config_loader import app_config
 from widgets import ToggleSwitch, ClickableLabel
-from ui_services import FileCleaner
+from audio_files import remove_number_files, find_audio_file
+from archive_store import restore_recording
 from review_window import ReviewWindow
 
 class DateFilterComboBox(QComboBox):
@@ -312,19 +314,7 @@ class AudioListItem(QWidget):
         try:
             self.list_panel.db_manager.delete_recording(self.number)
             print(f"[Delete] removed record number={self.number}")
-            audio_dir = app_config.save_dir
-            filename = f"{self.number}.wav"
-            file_path = os.path.join(audio_dir, filename)
-            files_to_delete = [file_path]
-            for speed in ['0.5', '0.75']:
-                variant_name = f"{self.number}@{speed}.wav"
-                files_to_delete.append(os.path.join(audio_dir, variant_name))
-            for fpath in files_to_delete:
-                try:
-                    if os.path.exists(fpath):
-                        os.remove(fpath)
-                except Exception as e:
-                    print(f"[Delete] Warning: failed to delete file {os.path.basename(fpath)}, reason: {e}")
+            remove_number_files(self.number)
             self.list_panel.refresh_list(force_ui_update=True)
             # 阶段六：发射删除信号通知复习窗口
             self.list_panel.recording_deleted.emit(deleted_number)
@@ -344,6 +334,8 @@ class ListPanel(QWidget):
         self.is_date_menu_open = False
         # 静默录音模式：自动补录时不自动播放
         self.silent_record_mode = False
+        # mode1 自动播放等待慢速版本生成的录音 number
+        self._pending_variant_play = None
         self.setWindowFlags(Qt.WindowType.FramelessWindowHint | Qt.WindowType.Tool | Qt.WindowType.WindowStaysOnTopHint)
         self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
         self.layout = QVBoxLayout(self)
@@ -416,7 +408,29 @@ class ListPanel(QWidget):
         """)
         self.btn_review.clicked.connect(self.open_review_window)
         self.date_layout.addWidget(self.btn_review)
+        self.search_box = QLineEdit()
+        self.search_box.setPlaceholderText("搜索")
+        self.search_box.setClearButtonEnabled(True)
+        self.search_box.setFixedWidth(app_config.search_box_width)
+        self.search_box.setStyleSheet(f"""
+            QLineEdit {{
+                background-color: rgba(255, 255, 255, 0.1);
+                color: {app_config.ui_text_color};
+                border: none;
+                border-radius: 4px;
+                padding: 2px 5px;
+                font-size: 13px;
+                margin-left: 10px;
+            }}
+        """)
+        self.search_box.textChanged.connect(self.on_search_text_changed)
+        self.date_layout.addWidget(self.search_box)
         self.date_layout.addStretch()
+        # 输入防抖：停顿 search_debounce_ms 后再查询
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(app_config.search_debounce_ms)
+        self.search_timer.timeout.connect(self.run_search)
         self.container_layout.addWidget(self.date_row)
 
         # Separator
@@ -447,11 +461,15 @@ class ListPanel(QWidget):
         self.scroll_layout.setContentsMargins(0, 0, 0, 0)
         self.scroll_layout.addStretch()
         self.scroll.setWidget(self.scroll_content)
+        self.scroll.verticalScrollBar().valueChanged.connect(self._on_scroll)
         self.container_layout.addWidget(self.scroll)
+        # 分页状态：当前日期、已加载的最后一个 number、是否已到末页
+        self._page_date = None
+        self._page_cursor = None
+        self._page_exhausted = True
+        self._loaded_count = 0
         self.layout.addWidget(self.container)
         self.first_load = True
-        self.cleanup_thread = FileCleaner(self.db_manager, self)
-        self.cleanup_thread.start()
         self.review_window = None
         self.refresh_list()
 
@@ -473,8 +491,64 @@ class ListPanel(QWidget):
 
     def on_date_changed(self, text):
         print(f"[DateFilter] Selected: {text}")
+        # 选择日期即退出搜索
+        if self.search_box.text():
+            self.search_box.blockSignals(True)
+            self.search_box.clear()
+            self.search_box.blockSignals(False)
+            self.search_timer.stop()
         self.refresh_list(force_ui_update=True)
 
+    def on_search_text_changed(self, text):
+        self.search_timer.start()
+
+    def run_search(self):
+        query = self.search_box.text().strip()
+        if query:
+            self.show_search_results(query)
+        else:
+            self.refresh_list(force_ui_update=True)
+
+    def show_search_results(self, query):
+        try:
+            limit = app_config.search_result_limit
+            results = self.db_manager.search(query, limit)
+            if app_config.archive_enabled:
+                # 冷存储中的旧录音一并参与搜索，播放时按需恢复
+                results.extend(self.db_manager.search_archive(query, limit))
+                results.sort(key=lambda item: item['rank'])
+                results = results[:limit]
+            print(f"[Search] '{query}': {len(results)} results")
+            self.clear_list()
+            self._page_date = None
+            if not results:
+                self._show_hint(app_config.search_empty_hint_text)
+                return
+            for res in results:
+                if res['source'] == 'recording':
+                    self._add_recording_item(res)
+                elif res['source'] == 'archive':
+                    self._add_recording_item(res, archived=True)
+                else:
+                    text = f"Q {res['date']}  {res['content']}"
+                    if res['sentence_content']:
+                        text += f" — {res['sentence_content']}"
+                    if len(text) > app_config.ui_max_filename_chars:
+                        text = text[:app_config.ui_max_filename_chars] + "..."
+                    item = QLabel(text)
+                    item.setContentsMargins(5, 2, 5, 2)
+                    item.setStyleSheet(f"color: {app_config.empty_list_hint_color}; font-size: {app_config.ui_font_size}px;")
+                    self.scroll_layout.insertWidget(self.scroll_layout.count()-1, item)
+        except Exception as e:
+            print(f"[Search] Error: {e}")
+
+    def _show_hint(self, text):
+        lbl = QLabel(text)
+        lbl.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        lbl.setStyleSheet(f"color: {app_config.empty_list_hint_color}; font-size: {app_config.ui_font_size}px;")
+        self.scroll_layout.insertStretch(0)
+        self.scroll_layout.insertWidget(1, lbl)
+
     def refresh_list(self, force_ui_update=False):
         try:
             dates = self.db_manager.get_all_dates(app_config.max_display_dates)
@@ -504,6 +578,11 @@ class ListPanel(QWidget):
                 else:
                     self.date_combo.setCurrentIndex(0)
             self.date_combo.blockSignals(False)
+            # 搜索框有内容时保持显示搜索结果（新录音 / 删除后同样刷新）
+            query = self.search_box.text().strip()
+            if query:
+                self.show_search_results(query)
+                return
             selected_text = self.date_combo.currentText()
             target_date_str = ""
             if selected_text == "Today":
@@ -514,24 +593,69 @@ class ListPanel(QWidget):
                     target_date_str = dt.strftime("%Y-%m-%d")
                 except:
                     pass
-            recordings = self.db_manager.get_recordings_by_date(target_date_str)
+            # 先查 recording_days 汇总表，空日期无需再查 recordings
+            recordings = []
+            # 刷新同一日期时保留已加载的条数，避免滚动位置之后的条目消失
+            page_size = app_config.list_page_size
+            if target_date_str == self._page_date:
+                page_size = max(page_size, self._loaded_count)
+            if target_date_str and self.db_manager.get_day_count(target_date_str) > 0:
+                recordings = self.db_manager.get_recordings_page(target_date_str, limit=page_size)
             self.clear_list()
+            self._page_date = target_date_str
+            self._page_cursor = None
+            self._page_exhausted = True
+            self._loaded_count = 0
             if not recordings:
-                lbl = QLabel(app_config.empty_list_hint_text)
-                lbl.setAlignment(Qt.AlignmentFlag.AlignCenter)
-
-                lbl.setStyleSheet(f"color: {app_config.empty_list_hint_color}; font-size: {app_config.ui_font_size}px;")
-                self.scroll_layout.insertStretch(0)
-                self.scroll_layout.insertWidget(1, lbl)
+                self._show_hint(app_config.empty_list_hint_text)
             else:
-                for rec in recordings:
-                    item = AudioListItem(rec, self.player, self)
-                    item.play_requested.connect(self.on_play_requested)
-                    item.game_requested.connect(self.game_requested.emit)
-                    self.scroll_layout.insertWidget(self.scroll_layout.count()-1, item)
+                self._append_page(recordings, page_size)
         except Exception as e:
             print(f"Error refreshing list: {e}")
 
+    def _add_recording_item(self, rec, archived=False):
+        item = AudioListItem(rec, self.player, self)
+        if archived:
+            item.play_requested.connect(self.on_archived_play_requested)
+        else:
+            item.play_requested.connect(self.on_play_requested)
+        item.game_requested.connect(self.game_requested.emit)
+        self.scroll_layout.insertWidget(self.scroll_layout.count()-1, item)
+
+    def _append_page(self, recordings, page_size):
+        for rec in recordings:
+            self._add_recording_item(rec)
+        self._loaded_count += len(recordings)
+        self._page_cursor = recordings[-1]['number']
+        self._page_exhausted = len(recordings) < page_size
+        # 内容不足一屏时没有滚动事件，布局完成后再检查一次
+        if not self._page_exhausted:
+            QTimer.singleShot(0, self._on_scroll)
+
+    def _on_scroll(self, value=None):
+        if self._page_exhausted or not self._page_date:
+            return
+        bar = self.scroll.verticalScrollBar()
+        if bar.maximum() - bar.value() > app_config.list_load_more_threshold:
+            return
+        self.load_next_page()
+
+    def load_next_page(self):
+        """加载当前日期的下一页录音"""
+        try:
+            page_size = app_config.list_page_size
+            recordings = self.db_manager.get_recordings_page(
+                self._page_date, before_number=self._page_cursor, limit=page_size
+            )
+            if not recordings:
+                self._page_exhausted = True
+                return
+            print(f"[ListPanel] Loaded page: {len(recordings)} items before #{self._page_cursor}")
+            self._append_page(recordings, page_size)
+        except Exception as e:
+            self._page_exhausted = True
+            print(f"[ListPanel] Error loading page: {e}")
+
     def on_silent_record_start(self):
         """
         处理静默录音模式开始信号
@@ -586,16 +710,55 @@ class ListPanel(QWidget):
 
             # 自动播放指定的录音
             if target_number is not None:
+                if self._waiting_for_variants(target_number):
+                    # mode1 先播慢速版本：等 VARIANTS:{number} 到达（或超时）再播放
+                    self._pending_variant_play = target_number
+                    QTimer.singleShot(app_config.play_variant_wait_ms,
+                                      lambda n=target_number: self._play_pending_variant(n))
+                    print(f"[ListPanel] Waiting for slow versions of #{target_number}")
+                    return
                 # 播放消息中指定的录音
                 self.player.auto_play(target_number)
             else:
                 # 兼容旧逻辑：如果没有指定 number，播放列表第一条
                 today_str = datetime.now().strftime("%Y-%m-%d")
-                recordings = self.db_manager.get_recordings_by_date(today_str)
+                recordings = self.db_manager.get_recordings_page(today_str, limit=1)
                 if recordings:
                     newest = recordings[0]
                     self.player.auto_play(newest['number'])
 
+    def _waiting_for_variants(self, number):
+        """mode1 且慢速版本尚未全部生成时返回 True（mode2 只需 1x 文件）"""
+        if app_config.play_last_mode != 'mode1' or not app_config.slow_generate_versions:
+            return False
+        if app_config.slow_on_demand:
+            # 按需模式由 AudioPlayer 自行生成慢速版本
+            return False
+        return any(find_audio_file(number, speed) is None for speed in app_config.slow_speeds)
+
+    def on_variants_ready(self, number):
+        """慢速版本生成完成（VARIANTS:{number}）"""
+        print(f"[ListPanel] Slow versions ready for #{number}")
+        self._play_pending_variant(number)
+
+    def _play_pending_variant(self, number):
+        if self._pending_variant_play != number:
+            return
+        self._pending_variant_play = None
+        self.player.auto_play(number)
+
+    def on_archived_play_requested(self, number):
+        """播放归档录音：先从冷存储恢复到主库（日期改为今天），再播放"""
+        try:
+            restored = restore_recording(self.db_manager, number)
+        except Exception as e:
+            print(f"[Archive] Restore failed for #{number}: {e}")
+            return
+        if restored is None:
+            return
+        self.refresh_list(force_ui_update=True)
+        self.on_play_requested(restored)
+
     def on_play_requested(self, number):
         self.player.handle_play_request(number)
         if self.ball_widget:
@@ -15,6 +15,9 @@ import alt_trigger
 import ctrl_trigger
 import quiz_trigger
 import emoji_trigger
+from capture_service import get_capture_service
+from capture_spool import recover_spools
+from db_manager import DatabaseManager
 from config_loader import app_config as config
 
 def get_screen_size():
@@ -67,6 +70,12 @@ class MainApp:
         self.drag_distance_threshold = config.click_drag_distance_threshold
         self.triple_click_to_alt_enabled = config.click_triple_click_to_alt_enabled
 
+        # 启动共享的系统声音采集服务（设备初始化不再发生在触发路径上）
+        get_capture_service()
+
+        # 补完上次异常退出时仍在磁盘暂存中的录音
+        threading.Thread(target=recover_spools, args=(DatabaseManager(),), daemon=True).start()
+
         # 启动 Alt 键监听器
         self.alt_listener = alt_trigger.AltTriggerListener()
         self.alt_listener.start()
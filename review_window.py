@@ -4,7 +4,6 @@ review_window.py - Leitner复习窗口
 包含: ReviewWindow, ReviewToggleSwitch
 新增: 修饰键模拟功能 - 鼠标悬浮在单词区域时自动按下可配置的修饰键(默认Ctrl)
 """
-import os
 from datetime import date, timedelta
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
     QPushButton, QStyleOption, QStyle)
@@ -14,7 +13,8 @@ from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput
 from config_loader import app_config
 from style_manager import StyleManager
 from widgets import ToggleSwitch
-from text_processor import is_valid_word
+from audio_files import find_audio_file
+from archive_store import restore_recording
 
 # 尝试导入 pynput，如果失败则使用 ctypes 作为备选
 try:
@@ -324,7 +324,7 @@ class ReviewWindow(QWidget):
             self._stop_playback()
             word_data = self.words[self.current_index]
             word = word_data['word']
-            number = word_data['number']
+            number = self._restore_if_archived(word_data)
             current_box = word_data.get('box_level', 1) or 1
             current_remember = word_data.get('remember', 0) or 0
             current_forget = word_data.get('forget', 0) or 0
@@ -355,7 +355,7 @@ class ReviewWindow(QWidget):
             self._stop_playback()
             word_data = self.words[self.current_index]
             word = word_data['word']
-            number = word_data['number']
+            number = self._restore_if_archived(word_data)
             current_remember = word_data.get('remember', 0) or 0
             current_forget = word_data.get('forget', 0) or 0
 
@@ -384,13 +384,13 @@ class ReviewWindow(QWidget):
         if self.current_index >= len(self.words):
             return
         word_data = self.words[self.current_index]
-        number = word_data.get('number')
+        number = self._restore_if_archived(word_data)
         if not number:
             print(f"[ReviewWindow] 单词 {word_data['word']} 没有对应的音频编号")
             return
-        audio_path = os.path.join(app_config.save_dir, f"{number}.wav")
-        if not os.path.exists(audio_path):
-            print(f"[ReviewWindow] 音频文件不存在: {audio_path}")
+        audio_path = find_audio_file(number)
+        if audio_path is None:
+            print(f"[ReviewWindow] 音频文件不存在: #{number}")
             return
         self.target_play_count = self.loop_count
         self.current_play_count = 0
@@ -422,8 +422,8 @@ class ReviewWindow(QWidget):
             word_data = self.words[self.current_index]
             number = word_data.get('number')
             if number:
-                audio_path = os.path.join(app_config.save_dir, f"{number}.wav")
-                if os.path.exists(audio_path):
+                audio_path = find_audio_file(number)
+                if audio_path:
                     self._play_audio(audio_path)
 
     def _trigger_auto_play(self):
@@ -477,20 +477,33 @@ class ReviewWindow(QWidget):
         self._release_modifier()
         super().hideEvent(event)
 
+    def _restore_if_archived(self, word_data):
+        """已归档的单词在播放或更新复习进度前先从冷存储恢复，返回主库中的 number"""
+        if word_data.get('archived'):
+            try:
+                restored = restore_recording(self.db_manager, word_data['number'])
+            except Exception as e:
+                print(f"[ReviewWindow] 恢复归档单词失败: {e}")
+                return word_data['number']
+            if restored is not None:
+                word_data['number'] = restored
+            word_data['archived'] = False
+        return word_data['number']
+
     def _load_words_to_review(self):
         try:
             records = self.db_manager.get_words_to_review()
             words = []
+            # get_words_to_review 已在 SQL 中按 is_word 过滤
             for rec in records:
-                content = rec['content']
-                if is_valid_word(content):
-                    words.append({
-                        'word': content,
-                        'number': rec['number'],
-                        'box_level': rec['box_level'] or 1,
-                        'remember': rec['remember'] or 0,
-                        'forget': rec['forget'] or 0
-                    })
+                words.append({
+                    'word': rec['content'],
+                    'number': rec['number'],
+                    'box_level': rec['box_level'] or 1,
+                    'remember': rec['remember'] or 0,
+                    'forget': rec['forget'] or 0,
+                    'archived': bool(rec['archived'])
+                })
             print(f"[ReviewWindow] 加载了 {len(words)} 个待复习单词")
             return words
         except Exception as e:
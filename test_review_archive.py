@@ -0,0 +1,75 @@
+"""
+test_review_archive.py - 归档后到期单词仍进入复习的检查
+
+在临时目录中建库：保存一个到期单词并归档到 archive.db，
+期望：get_words_to_review 仍返回它（archived = 1），恢复后复习进度保留并回到主库；
+归档库已有同 number 的行时再次归档，全文索引不残留旧条目。
+
+运行: python test_review_archive.py
+"""
+import os
+import tempfile
+from datetime import date, timedelta
+from config_loader import app_config
+from db_manager import DatabaseManager
+from archive_store import restore_recording
+
+def make_db(tmp_dir):
+    app_config.config.set('Database', 'db_path', os.path.join(tmp_dir, 'data.db'))
+    app_config.config.set('Cleanup', 'archive_db_path', os.path.join(tmp_dir, 'archive.db'))
+    app_config.config.set('Cleanup', 'archive_dir', os.path.join(tmp_dir, 'archive'))
+    app_config.config.set('Paths', 'save_dir', os.path.join(tmp_dir, 'audio'))
+    db = DatabaseManager()
+    db.local_writes = True
+    db.init_db()
+    return db
+
+def save_due_word(db, word, box_level=3):
+    old_date = (date.today() - timedelta(days=30)).isoformat()
+    number, _ = db.save_recording(word, old_date)
+    db.update_word_box(number, box_level, date.today().isoformat(), 2, 1, old_date)
+    return number
+
+def test_archived_due_word_is_reviewed():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = make_db(tmp_dir)
+        number = save_due_word(db, "archipelago")
+        assert db.archive_recordings([number]) == 1
+        assert db.get_recording_by_number(number) is None
+
+        due = [row for row in db.get_words_to_review() if row['number'] == number]
+        assert len(due) == 1 and due[0]['archived'] == 1, [dict(row) for row in due]
+        assert db.get_review_stats()['pending'] == 1
+
+        restored = restore_recording(db, number)
+        assert restored == number
+        row = db.get_recording_by_number(number)
+        assert row['box_level'] == 3 and row['remember'] == 2 and row['forget'] == 1
+        assert [(row['number'], row['archived']) for row in db.get_words_to_review()] == [(number, 0)]
+        db.close()
+
+def test_rearchive_keeps_fts_consistent():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = make_db(tmp_dir)
+        number = save_due_word(db, "archipelago")
+        db.archive_recordings([number])
+        # 主库与归档库同时存在该 number（归档库为内容不同的旧行），再次归档时旧行的全文索引应一并删除
+        cols = DatabaseManager.RECORDING_COLUMNS
+        conn = db.connection
+        conn.execute(f"INSERT INTO main.recordings ({cols}) SELECT {cols} FROM archive.recordings WHERE number = ?",
+                     (number,))
+        conn.execute("DELETE FROM archive.recordings WHERE number = ?", (number,))
+        stale = cols.replace("content,", "'peninsula',", 1)
+        conn.execute(f"INSERT INTO archive.recordings ({cols}) SELECT {stale} FROM main.recordings WHERE number = ?",
+                     (number,))
+        db.connection.commit()
+        db.archive_recordings([number])
+        assert db.search_archive("peninsula") == []
+        results = db.search_archive("archipelago")
+        assert [r['number'] for r in results] == [number], results
+        db.close()
+
+if __name__ == "__main__":
+    for test in (test_archived_due_word_is_reviewed, test_rearchive_keeps_fts_consistent):
+        test()
+        print(f"[ReviewArchive] {test.__name__}: OK")
@@ -0,0 +1,55 @@
+"""
+test_vad.py - 自适应 VAD 的合成样本检查
+
+合成样本：3 秒立体声，全程约 -34 dB 的白噪声（高于固定阈值 -40 dB，模拟底噪较高的环境），
+0.5~1.3 秒与 1.8~2.4 秒两段带音节起伏的谐波"语音"。
+期望：分段找到两段语音；裁剪范围贴近语音，而固定阈值的逐样本包络会把噪声尾巴一起保留。
+
+运行: python test_vad.py
+"""
+import numpy as np
+from vad import PauseModel, detect_segments, detect_speech_bounds, TRIM_MARGIN_MS
+from capture_spool import find_loud_bounds
+
+SAMPLERATE = 48000
+SPEECH = [(0.5, 1.3), (1.8, 2.4)]
+
+def make_fixture(seconds=3.0, noise_rms=0.02, seed=7):
+    rng = np.random.default_rng(seed)
+    n = int(seconds * SAMPLERATE)
+    t = np.arange(n) / SAMPLERATE
+    signal = rng.normal(0, noise_rms, size=n)
+    voiced = sum(np.sin(2 * np.pi * 150 * k * t) / k for k in range(1, 8))
+    syllables = 0.6 + 0.4 * np.sin(2 * np.pi * 4 * t)
+    for start, end in SPEECH:
+        mask = (t >= start) & (t < end)
+        signal[mask] += 0.2 * voiced[mask] * syllables[mask]
+    return np.stack([signal, signal], axis=1).astype(np.float32)
+
+def test_segments_match_fixture():
+    segments = detect_segments(make_fixture(), SAMPLERATE, pause_model=PauseModel(1.5),
+                               threshold_db=-40, snr_db=10, hangover_ms=200)
+    assert len(segments) == len(SPEECH), segments
+    for (start, end), (exp_start, exp_end) in zip(segments, SPEECH):
+        assert abs(start - exp_start) <= 0.1, (start, exp_start)
+        # 分段按 0.1 秒块报告，结束含 hangover
+        assert exp_end <= end <= exp_end + 0.4, (end, exp_end)
+
+def test_trim_uses_adaptive_floor():
+    samples = make_fixture()
+    first, end = detect_speech_bounds(samples, SAMPLERATE, threshold_db=-40, snr_db=10, hangover_ms=200)
+    tolerance = (TRIM_MARGIN_MS + 40) / 1000
+    assert abs(first / SAMPLERATE - SPEECH[0][0]) <= tolerance, first / SAMPLERATE
+    assert abs(end / SAMPLERATE - SPEECH[-1][1]) <= tolerance, end / SAMPLERATE
+    # 固定阈值包络在这种底噪下几乎不裁剪
+    loud_first, loud_last = find_loud_bounds(samples, 10 ** (-40 / 20))
+    assert loud_last / SAMPLERATE > SPEECH[-1][1] + 0.3
+
+def test_silence_has_no_bounds():
+    noise = make_fixture() * 0
+    assert detect_speech_bounds(noise, SAMPLERATE, threshold_db=-40) is None
+
+if __name__ == "__main__":
+    for test in (test_segments_match_fixture, test_trim_uses_adaptive_floor, test_silence_has_no_bounds):
+        test()
+        print(f"[VAD] {test.__name__}: OK")
@@ -0,0 +1,156 @@
+"""
+time_stretch.py - 进程内 WSOLA 变速（不变调）
+包含: wsola_stretch, stretch_all, log_spectral_distance, benchmark
+
+慢速版本不再需要为每个速度启动 FFmpeg 子进程：直接对 AudioRecorder 手里的
+float32 缓冲区做 WSOLA（波形相似重叠相加），一次调用渲染全部 slow_speeds。
+
+WSOLA：按合成步长 Hs 输出加 Hann 窗的帧，输入读取位置按 Hs * speed 前进；
+每帧在 ±tolerance 范围内寻找与上一帧"自然延续"最相似的位置，避免相位断裂。
+相似度搜索在降采样的单声道信号上进行，所有声道使用同一对齐位置。
+"""
+import time
+import numpy as np
+
+# 帧长 / 搜索容差（毫秒）
+FRAME_MS = 40
+TOLERANCE_MS = 10
+# 相似度搜索使用的目标采样率（降采样只用于搜索，不影响输出）
+SEARCH_RATE = 12000
+
+class _Prepared:
+    """多个速度共享的预处理结果：补零后的信号、降采样单声道、窗函数"""
+
+    def __init__(self, samples, samplerate):
+        samples = np.asarray(samples, dtype=np.float32)
+        if samples.ndim == 1:
+            samples = samples[:, None]
+        self.frame = int(samplerate * FRAME_MS / 1000) & ~1
+        self.hop = self.frame // 2
+        self.tolerance = int(samplerate * TOLERANCE_MS / 1000)
+        self.decimate = max(1, samplerate // SEARCH_RATE)
+        self.length = len(samples)
+        pad = self.frame + self.tolerance
+        self.pad = pad
+        self.x = np.pad(samples, ((pad, pad + self.frame * 2), (0, 0)))
+        self.mono = self.x.mean(axis=1)[::self.decimate].astype(np.float32)
+        self.window = np.hanning(self.frame).astype(np.float32)[:, None]
+
+def _best_offset(prep, natural_start, nominal):
+    """在 nominal ± tolerance 中寻找与 natural_start 处自然延续最相似的帧起点"""
+    d = prep.decimate
+    n = prep.frame // d
+    template = prep.mono[natural_start // d: natural_start // d + n]
+    lo = max(0, (nominal - prep.tolerance) // d)
+    region = prep.mono[lo: lo + n + 2 * prep.tolerance // d]
+    if len(template) < n or len(region) < n or not template.any():
+        return nominal
+    corr = np.correlate(region, template, mode='valid')
+    return min(max(lo * d + int(np.argmax(corr)) * d, 0), len(prep.x) - prep.frame)
+
+def _stretch(prep, speed):
+    hs = prep.hop
+    ha = hs * speed
+    out_len = int(np.ceil(prep.length / speed))
+    frames = int(np.ceil((out_len + prep.frame) / hs)) + 1
+    out = np.zeros(((frames + 1) * hs + prep.frame, prep.x.shape[1]), dtype=np.float32)
+    norm = np.zeros(len(out), dtype=np.float32)
+    w = prep.window
+    pos = 0
+    max_pos = len(prep.x) - prep.frame
+    for k in range(frames):
+        pos = min(pos, max_pos)
+        o = k * hs
+        out[o:o + prep.frame] += prep.x[pos:pos + prep.frame] * w
+        norm[o:o + prep.frame] += w[:, 0]
+        nominal = int(round((k + 1) * ha))
+        pos = _best_offset(prep, pos + hs, nominal)
+    norm[norm < 1e-3] = 1.0
+    out /= norm[:, None]
+    # 去掉前置补零对应的输出
+    start = int(round(prep.pad / speed))
+    return out[start:start + out_len]
+
+def wsola_stretch(samples, speed, samplerate):
+    """
+    把 samples 变为 speed 倍速（speed < 1 变慢），音高不变
+
+    Args:
+        samples: (frames, channels) 或一维 float 数组
+
+    Returns:
+        与输入声道数相同的 float32 数组，长度约为 len(samples) / speed
+    """
+    return stretch_all(samples, [speed], samplerate)[speed]
+
+def stretch_all(samples, speeds, samplerate):
+    """一次预处理，渲染全部速度，返回 {speed: samples}"""
+    prep = _Prepared(samples, samplerate)
+    results = {}
+    for speed in speeds:
+        out = _stretch(prep, float(speed))
+        results[speed] = out[:, 0] if np.ndim(samples) == 1 else out
+    return results
+
+def log_spectral_distance(a, b, samplerate, frame_ms=32):
+    """
+    两段音频的对数谱距离（dB，越小越接近），按较短长度对齐
+
+    用于与 FFmpeg 输出比较质量。
+    """
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    if a.ndim == 2:
+        a = a.mean(axis=1)
+    if b.ndim == 2:
+        b = b.mean(axis=1)
+    n = int(samplerate * frame_ms / 1000)
+    length = (min(len(a), len(b)) // n) * n
+    if length == 0:
+        return float('nan')
+    window = np.hanning(n)
+    spec_a = np.abs(np.fft.rfft(a[:length].reshape(-1, n) * window, axis=1)) ** 2 + 1e-10
+    spec_b = np.abs(np.fft.rfft(b[:length].reshape(-1, n) * window, axis=1)) ** 2 + 1e-10
+    diff = 10 * np.log10(spec_a) - 10 * np.log10(spec_b)
+    # 只统计有声帧，避免静音段的数值噪声主导结果
+    loud = 10 * np.log10(spec_b.mean(axis=1)) > 10 * np.log10(spec_b.mean(axis=1).max()) - 50
+    return float(np.mean(np.sqrt(np.mean(diff[loud] ** 2, axis=1))))
+
+def benchmark(input_path, speeds=(0.5, 0.75)):
+    """
+    对一个 WAV 文件比较 NumPy WSOLA 与 FFmpeg（rubberband / atempo）的耗时与质量
+
+    打印每个速度的耗时、时长误差，以及两者之间的对数谱距离。
+    """
+    import soundfile as sf
+    import tempfile
+    import os
+    from audio_processor import ffmpeg_stretch_files
+
+    samples, samplerate = sf.read(input_path, dtype='float32', always_2d=True)
+    started = time.perf_counter()
+    ours = stretch_all(samples, speeds, samplerate)
+    numpy_seconds = time.perf_counter() - started
+    print(f"[Benchmark] NumPy WSOLA: {numpy_seconds * 1000:.0f} ms for {len(speeds)} speeds "
+          f"({len(samples) / samplerate:.1f}s input)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        outputs = {speed: os.path.join(tmp, f"ffmpeg@{speed}.wav") for speed in speeds}
+        started = time.perf_counter()
+        generated = ffmpeg_stretch_files(input_path, outputs)
+        ffmpeg_seconds = time.perf_counter() - started
+        print(f"[Benchmark] FFmpeg: {ffmpeg_seconds * 1000:.0f} ms")
+        for speed in speeds:
+            expected = len(samples) / speed
+            line = f"[Benchmark] {speed}x: length error {abs(len(ours[speed]) - expected) / samplerate * 1000:.1f} ms"
+            if outputs[speed] in generated:
+                reference, _ = sf.read(outputs[speed], dtype='float32', always_2d=True)
+                line += f", LSD vs FFmpeg {log_spectral_distance(ours[speed], reference, samplerate):.2f} dB"
+            print(line)
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) < 2:
+        print("Usage: python time_stretch.py input.wav [speed ...]")
+    else:
+        benchmark(sys.argv[1], [float(s) for s in sys.argv[2:]] or (0.5, 0.75))
@@ -1,20 +1,29 @@
 """
 ui_services.py - UI服务线程
-包含: CommandServer, ConsistencyChecker, FileCleaner
+包含: CommandServer, MaintenanceScheduler, MaintenanceJob
+维护任务: consistency_check_job, cleanup_job, question_archive_job,
+          checkpoint_job, optimize_job, vacuum_job
 """
 import os
 import time
 import socket
 import shutil
+import threading
 from PyQt6.QtCore import QThread, pyqtSignal
 from PyQt6.QtMultimedia import QMediaPlayer
 from config_loader import app_config
+from audio_files import scan_audio_dir, remove_audio_files, find_audio_file
+from archive_store import archive_date
+from variant_cache import variant_prefetch_job
 
 class CommandServer(QThread):
     file_saved_signal = pyqtSignal(str)
     stop_playback_signal = pyqtSignal()
     play_request_signal = pyqtSignal(int, int)  # number, count
     silent_record_signal = pyqtSignal()  # 静默录音模式信号
+    recording_signal = pyqtSignal(bool)  # 录音开始 / 结束
+    activity_signal = pyqtSignal(str)  # 任意命令到达，供空闲检测使用
+    variants_ready_signal = pyqtSignal(int)  # 慢速版本生成完成
 
     def run(self):
         server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
@@ -29,6 +38,7 @@ class CommandServer(QThread):
                         data = conn.recv(1024)
                         if data:
                             message = data.decode('utf-8')
+                            self.activity_signal.emit(message)
                             if message == "STOP_PLAYBACK":
                                 self.stop_playback_signal.emit()
                             elif message.startswith("PLAY:"):
@@ -43,6 +53,13 @@ class CommandServer(QThread):
                                 # 静默录音模式：自动补录触发，通知 ListPanel 进入静默模式
                                 print("[CommandServer] Received SILENT_RECORD_START")
                                 self.silent_record_signal.emit()
+                            elif message in ("RECORDING_START", "RECORDING_END"):
+                                self.recording_signal.emit(message == "RECORDING_START")
+                            elif message.startswith("VARIANTS:"):
+                                try:
+                                    self.variants_ready_signal.emit(int(message.split(":")[1]))
+                                except ValueError:
+                                    print(f"Invalid VARIANTS command: {message}")
                             else:
                                 self.file_saved_signal.emit(message)
                 except Exception as e:
@@ -50,134 +67,262 @@ class CommandServer(QThread):
         except Exception as e:
             print(f"Socket Bind Error: {e}")
 
-class ConsistencyChecker(QThread):
-    finished = pyqtSignal()
+# ==================== 维护任务 ====================
+# 每个任务都是生成器函数：每 yield 一次表示完成一小步，调度器在步与步之间
+# 检查空闲状态与时间预算，不满足时暂停，下次空闲时从断点继续。
+
+def consistency_check_job(db_manager):
+    """数据库与音频目录一致性检查：删除缺文件的记录与无记录的文件"""
+    records = db_manager.get_all_recordings_for_consistency_check()
+    db_numbers = {r['number'] for r in records}
+    yield
+    audio_dir = app_config.save_dir
+    if not os.path.exists(audio_dir):
+        os.makedirs(audio_dir)
+    # 单次 scandir 建立 number -> 文件 索引，供孤儿检测和删除共用
+    file_index = scan_audio_dir(audio_dir)
+    file_numbers = {num for num, item in file_index.items() if item['main']}
+    yield
+    # 录音先写库后写文件：删除前再确认一次文件确实不存在
+    orphans_db = {
+        num for num in db_numbers - file_numbers
+        if find_audio_file(num, save_dir=audio_dir) is None
+    }
+    removed_records = 0
+    if orphans_db:
+        print(f"[Maintenance] Consistency check: removing {len(orphans_db)} orphan records: {sorted(orphans_db)}")
+        removed_records = db_manager.delete_recordings(orphans_db)
+        yield
+    # 记录快照之后新写入的录音不算孤儿文件：删除前逐个回查数据库
+    orphans_file = sorted(
+        num for num in file_numbers - db_numbers
+        if db_manager.get_recording_by_number(num) is None
+    )
+    removed_files = 0
+    for i in range(0, len(orphans_file), 50):
+        chunk = orphans_file[i:i + 50]
+        print(f"[Maintenance] Consistency check: removing orphan files for numbers: {chunk}")
+        remove_audio_files(chunk, audio_dir, index=file_index)
+        removed_files += len(chunk)
+        yield
+    print(f"[Maintenance] Consistency check completed, removed {removed_records} records and {removed_files} files")
+    project_root = os.path.dirname(os.path.abspath(__file__))
+    text_dir = os.path.join(project_root, 'text')
+    if os.path.exists(text_dir):
+        print(f"[Maintenance] Removing legacy text folder: {text_dir}")
+        shutil.rmtree(text_dir, ignore_errors=True)
+
+def cleanup_job(db_manager):
+    """超出 max_display_dates 的旧日期录音移入冷存储（archive_enabled=false 时删除），每个日期一步"""
+    limit = app_config.max_display_dates
+    dates_to_remove = db_manager.get_dates_exceeding_limit(limit)
+    if not dates_to_remove:
+        return
+    print(f"[Cleanup] Cleanup started, found {len(dates_to_remove)} dates exceeding limit of {limit}")
+    if app_config.archive_enabled:
+        index = scan_audio_dir()
+        archived_count = 0
+        for date_str in dates_to_remove:
+            yield
+            archived, _ = yield from archive_date(db_manager, date_str, index)
+            archived_count += archived
+        print(f"Cleanup completed, archived {archived_count} records")
+        return
+    removed_count = 0
+    for date_str in dates_to_remove:
+        yield
+        numbers = [rec['number'] for rec in db_manager.get_recordings_by_date_list([date_str])]
+        # 先删记录（一个事务），再单次遍历目录删除文件
+        removed_count += db_manager.delete_recordings(numbers)
+        removed_files = remove_audio_files(numbers)
+        print(f"Cleanup: removed records for date {date_str}, {removed_files} files deleted")
+    print(f"Cleanup completed, removed {removed_count} records")
+
+def question_archive_job(db_manager):
+    """将超过保留期的已答 Quiz 记录分批移入归档表"""
+    retention_days = app_config.maintenance_question_retention_days
+    total = 0
+    while True:
+        moved = db_manager.archive_answered_questions(retention_days)
+        total += moved
+        if moved == 0:
+            break
+        yield
+    if total:
+        print(f"[Maintenance] Archived {total} answered questions older than {retention_days} days")
+
+def checkpoint_job(db_manager):
+    """WAL checkpoint；PASSIVE 全部完成时再 TRUNCATE 截断 WAL 文件"""
+    busy, log_frames, checkpointed = db_manager.wal_checkpoint("PASSIVE")
+    yield
+    if not busy and log_frames > 0 and checkpointed == log_frames:
+        db_manager.wal_checkpoint("TRUNCATE")
+    print(f"[Maintenance] WAL checkpoint: {checkpointed}/{log_frames} frames")
+
+def optimize_job(db_manager):
+    db_manager.optimize()
+    yield
+    print("[Maintenance] PRAGMA optimize done")
+
+def vacuum_job(db_manager):
+    """按页分步回收空闲页；非增量模式的旧库只提示，转换需手动执行（完整 VACUUM 不可中断）"""
+    free_pages = db_manager.get_freelist_count()
+    if free_pages < app_config.maintenance_vacuum_min_free_pages:
+        return
+    if db_manager.get_auto_vacuum() != 2:
+        print(f"[Maintenance] {free_pages} free pages, but database is not in incremental vacuum mode; "
+              f"run 'python db_manager.py vacuum' with the UI closed to convert it")
+        return
+    print(f"[Maintenance] Incremental vacuum: {free_pages} free pages")
+    while free_pages > 0:
+        yield
+        free_pages = db_manager.incremental_vacuum(app_config.maintenance_vacuum_pages_per_step)
+
+class MaintenanceJob:
+    def __init__(self, name, func, interval, initial_delay=0):
+        self.name = name
+        self.func = func
+        self.interval = interval          # 秒
+        self.initial_delay = initial_delay  # 启动后至少等待的秒数
+        self.last_run = None              # time.time()，持久化在 maintenance_state
+        self.generator = None             # 进行中（被暂停）的任务
+
+    def is_due(self, now, uptime):
+        if self.generator is not None:
+            return True
+        if uptime < self.initial_delay:
+            return False
+        return self.last_run is None or now - self.last_run >= self.interval
+
+class MaintenanceScheduler(QThread):
+    """
+    空闲维护调度器
+
+    无播放、无录音、且 idle_seconds 内没有收到任何触发命令时视为空闲，
+    依次执行到期的维护任务。每次最多连续执行 job_budget_ms，一旦不再空闲
+    立即暂停，下次空闲时从断点继续。
+    """
+    job_finished = pyqtSignal(str)
 
     def __init__(self, db_manager):
         super().__init__()
         self.db_manager = db_manager
+        self.jobs = []
+        self.running = True
+        self._paused = False
+        self._playing = False
+        self._recording_since = None
+        self._last_activity = time.monotonic()
+        self._started_at = time.monotonic()
+        self._wake = threading.Event()
+        self._register_default_jobs()
+
+    def _register_default_jobs(self):
+        hour = 3600
+        self.register("consistency_check", consistency_check_job,
+                      app_config.maintenance_consistency_interval_hours * hour)
+        self.register("cleanup", cleanup_job,
+                      app_config.maintenance_cleanup_interval_hours * hour,
+                      initial_delay=app_config.cleanup_delay_seconds)
+        self.register("question_archive", question_archive_job,
+                      app_config.maintenance_question_archive_interval_hours * hour)
+        self.register("wal_checkpoint", checkpoint_job,
+                      app_config.maintenance_checkpoint_interval_minutes * 60)
+        self.register("optimize", optimize_job,
+                      app_config.maintenance_optimize_interval_hours * hour)
+        if app_config.maintenance_vacuum_enabled:
+            self.register("vacuum", vacuum_job,
+                          app_config.maintenance_vacuum_interval_hours * hour)
+        if app_config.slow_generate_versions and app_config.slow_on_demand:
+            self.register("variant_prefetch", variant_prefetch_job,
+                          app_config.slow_prefetch_interval_minutes * 60)
+
+    def register(self, name, func, interval, initial_delay=0):
+        """注册维护任务；func(db_manager) 须为生成器函数"""
+        self.jobs.append(MaintenanceJob(name, func, interval, initial_delay))
+
+    # ---------- 状态输入（在 UI 线程中通过信号调用） ----------
+    def note_activity(self, reason=None):
+        self._last_activity = time.monotonic()
+
+    def on_playback_state(self, state):
+        self._playing = state == QMediaPlayer.PlaybackState.PlayingState
+        self.note_activity()
+
+    def on_recording(self, active):
+        self._recording_since = time.monotonic() if active else None
+        self.note_activity()
+
+    def pause(self):
+        self._paused = True
+
+    def resume(self):
+        self._paused = False
+        self._wake.set()
 
+    def stop(self):
+        self.running = False
+        self._wake.set()
+
+    def is_idle(self):
+        if self._paused or self._playing:
+            return False
+        if self._recording_since is not None:
+            # 防止丢失 RECORDING_END 后永远不空闲
+            if time.monotonic() - self._recording_since < app_config.max_recording_duration + 60:
+                return False
+            self._recording_since = None
+        return time.monotonic() - self._last_activity >= app_config.maintenance_idle_seconds
+
+    # ---------- 调度线程 ----------
     def run(self):
-        print("Consistency check started")
-        try:
-            records = self.db_manager.get_all_recordings_for_consistency_check()
-            db_numbers = {r['number'] for r in records}
-            audio_dir = app_config.save_dir
-            if not os.path.exists(audio_dir):
-                os.makedirs(audio_dir)
-            files = os.listdir(audio_dir)
-            file_numbers = set()
-            file_map = {}
-            for f in files:
-                if not f.endswith('.wav'): continue
-                if '@' in f: continue
-                try:
-                    name_part = os.path.splitext(f)[0]
-                    if name_part.isdigit():
-                        num = int(name_part)
-                        file_numbers.add(num)
-                        file_map[num] = f
-                except ValueError:
-                    pass
-            orphans_db = db_numbers - file_numbers
-            removed_records = 0
-            for num in orphans_db:
-                print(f"Consistency check: removing orphan record number={num}")
-                try:
-                    self.db_manager.delete_recording(num)
-                    removed_records += 1
-                except Exception as e:
-                    print(f"Consistency check warning: failed to remove record {num}, reason: {e}")
-            orphans_file = file_numbers - db_numbers
-            removed_files = 0
-            for num in orphans_file:
-                fname = file_map[num]
-                print(f"Consistency check: removing orphan file {fname}")
-                try:
-                    self._delete_file_set(os.path.join(audio_dir, fname))
-                    removed_files += 1
-                except Exception as e:
-                    print(f"Consistency check warning: failed to remove file {fname}, reason: {e}")
-            print(f"Consistency check completed, removed {removed_records} records and {removed_files} files")
+        for job in self.jobs:
             try:
-                project_root = os.path.dirname(os.path.abspath(__file__))
-                text_dir = os.path.join(project_root, 'text')
-                if os.path.exists(text_dir):
-                    print(f"Consistency check: Removing legacy text folder: {text_dir}")
-                    shutil.rmtree(text_dir, ignore_errors=True)
+                job.last_run = self.db_manager.get_maintenance_last_run(job.name)
             except Exception as e:
-                print(f"Consistency check warning: failed to remove text folder: {e}")
+                print(f"[Maintenance] Failed to load state for {job.name}: {e}")
+        print(f"[Maintenance] Scheduler started with jobs: {[job.name for job in self.jobs]}")
+        while self.running:
+            in_progress = any(job.generator is not None for job in self.jobs)
+            # 有被预算打断的任务时尽快继续，否则按 poll_seconds 检查
+            self._wake.wait(0.05 if in_progress else app_config.maintenance_poll_seconds)
+            self._wake.clear()
+            if not self.running or not self.is_idle():
+                continue
+            now = time.time()
+            uptime = time.monotonic() - self._started_at
+            job = next((j for j in self.jobs if j.is_due(now, uptime)), None)
+            if job:
+                self._run_slice(job)
+        self.db_manager.close()
+
+    def _run_slice(self, job):
+        deadline = time.monotonic() + app_config.maintenance_job_budget_ms / 1000.0
+        if job.generator is None:
+            print(f"[Maintenance] Job started: {job.name}")
+            job.generator = job.func(self.db_manager)
+        try:
+            while True:
+                next(job.generator)
+                if not self.running:
+                    return
+                if not self.is_idle():
+                    print(f"[Maintenance] Job paused (no longer idle): {job.name}")
+                    return
+                if time.monotonic() >= deadline:
+                    return
+        except StopIteration:
+            self._finish(job)
+            self.job_finished.emit(job.name)
         except Exception as e:
-            print(f"Consistency check failed: {e}")
-        self.finished.emit()
-
-    def _delete_file_set(self, file_path):
-        dirname = os.path.dirname(file_path)
-        filename = os.path.basename(file_path)
-        name_without_ext = os.path.splitext(filename)[0]
-        files_to_delete = [file_path]
-        for speed in ['0.5', '0.75']:
-            variant_name = f"{name_without_ext}@{speed}.wav"
-            files_to_delete.append(os.path.join(dirname, variant_name))
-        for fpath in files_to_delete:
-            if os.path.exists(fpath):
-                os.remove(fpath)
-
-class FileCleaner(QThread):
-    def __init__(self, db_manager, list_panel):
-        super().__init__()
-        self.db_manager = db_manager
-        self.list_panel = list_panel
-        self.running = True
+            print(f"[Maintenance] Job failed: {job.name}: {e}")
+            # 失败同样记为已执行，等下个周期再试，避免空闲时反复重试
+            self._finish(job)
 
-    def run(self):
-        delay = app_config.cleanup_delay_seconds
-        print(f"[Cleanup] Scheduled in {delay} seconds")
-        for _ in range(delay):
-            if not self.running: return
-            time.sleep(1)
-        while self.running:
-            is_playing = self.list_panel.player.player.playbackState() == QMediaPlayer.PlaybackState.PlayingState
-            if not is_playing:
-                self.perform_cleanup()
-                break
-            else:
-                print("[Cleanup] Waiting for idle state...")
-                time.sleep(5)
-
-    def perform_cleanup(self):
+    def _finish(self, job):
+        job.generator = None
+        job.last_run = time.time()
         try:
-            limit = app_config.max_display_dates
-            dates_to_remove = self.db_manager.get_dates_exceeding_limit(limit)
-            if dates_to_remove:
-                print(f"[Cleanup] Cleanup started, found {len(dates_to_remove)} dates exceeding limit of {limit}")
-                recordings_to_remove = self.db_manager.get_recordings_by_date_list(dates_to_remove)
-                removed_count = 0
-                for rec in recordings_to_remove:
-                    number = rec['number']
-                    date_str = rec['date']
-                    try:
-                        self._delete_files_for_number(number)
-                        self.db_manager.delete_recording(number)
-                        print(f"Cleanup: removed record number={number} for date {date_str}")
-                        removed_count += 1
-                    except Exception as e:
-                        print(f"Cleanup warning: failed to delete record {number}, reason: {e}")
-                print(f"Cleanup completed, removed {removed_count} records")
+            self.db_manager.set_maintenance_last_run(job.name, job.last_run)
         except Exception as e:
-            print(f"[Cleanup] Error: {e}")
-
-    def _delete_files_for_number(self, number):
-        audio_dir = app_config.save_dir
-        filename = f"{number}.wav"
-        file_path = os.path.join(audio_dir, filename)
-        files_to_delete = [file_path]
-        for speed in ['0.5', '0.75']:
-            variant_name = f"{number}@{speed}.wav"
-            files_to_delete.append(os.path.join(audio_dir, variant_name))
-        for fpath in files_to_delete:
-            if os.path.exists(fpath):
-                try:
-                    os.remove(fpath)
-                except Exception as e:
-                    print(f"Cleanup warning: failed to delete file {os.path.basename(fpath)}, reason: {e}")
\ No newline at end of file
+            print(f"[Maintenance] Failed to save state for {job.name}: {e}")
@@ -0,0 +1,260 @@
+"""
+vad.py - 自适应语音活动检测（VAD）
+包含: PauseModel, VoiceActivityDetector, ThresholdDetector, create_detector, detect_segments,
+      detect_speech_bounds
+
+固定阈值（silence_threshold_db 与单块 RMS 比较）+ 固定 1.5 秒结束静音的问题：
+- 每次保存都要多等 1.5 秒
+- 底噪较高的输出设备上一直判定为"有声"，录音停不下来
+
+VoiceActivityDetector 把每个 0.1 秒块再切成 20 毫秒帧，逐帧（NumPy 向量化）计算：
+- 能量（dB）与自适应噪声底比较：阈值 = max(silence_threshold_db, 噪声底 + snr_db)
+- 频谱平坦度：白噪声 / 底噪接近 1，语音明显更低；能量略高但频谱平坦的帧不算语音
+噪声底只在非语音帧上更新（下降快、上升慢），语音结束后 hangover 时间内不更新。
+
+结束判定：静音时长达到 end_timeout 即视为一句结束。end_timeout 由 PauseModel
+从 TTS 语音中观察到的句内停顿学习（进程内共享），样本不足时使用 end_silence_duration。
+
+所有检测器接口一致：update(block) -> 本块是否有语音；silence_time；utterance_ended()；
+speech_bounds() -> 首个 / 最后一个语音帧的样本范围（按输入累计计数），录音保存时据此裁剪首尾，
+与分段使用同一自适应噪声底，底噪较高时不会把噪声尾巴留在录音里。
+detect_segments / detect_speech_bounds 可对录好的音频离线运行，便于用固定样本调参（见 test_vad.py）。
+"""
+import threading
+from collections import deque
+import numpy as np
+from config_loader import app_config
+
+# 语音帧长（毫秒）
+FRAME_MS = 20
+# 能量下限，避免数字静音取对数得到 -inf
+MIN_DB = -120.0
+# 裁剪时在首尾语音帧外各保留的时长（毫秒），保住低于阈值的起音与衰减
+TRIM_MARGIN_MS = 60
+
+class PauseModel:
+    """
+    TTS 句内停顿长度的滑动样本，推算结束静音超时
+
+    end_timeout = clamp(停顿 95 分位 * margin + 0.1, min_timeout, max_timeout)
+    """
+
+    def __init__(self, max_timeout, min_timeout=0.4, margin=1.3, min_samples=5, history=64):
+        self.max_timeout = max_timeout
+        self.min_timeout = min(min_timeout, max_timeout)
+        self.margin = margin
+        self.min_samples = min_samples
+        self._pauses = deque(maxlen=history)
+        self._lock = threading.Lock()
+
+    def add(self, pause_seconds):
+        with self._lock:
+            self._pauses.append(pause_seconds)
+
+    @property
+    def sample_count(self):
+        return len(self._pauses)
+
+    @property
+    def end_timeout(self):
+        with self._lock:
+            if len(self._pauses) < self.min_samples:
+                return self.max_timeout
+            p95 = float(np.percentile(np.fromiter(self._pauses, dtype=np.float64), 95))
+        return min(self.max_timeout, max(self.min_timeout, p95 * self.margin + 0.1))
+
+_pause_model = None
+_pause_model_lock = threading.Lock()
+
+def get_pause_model():
+    """进程内共享的停顿模型（录音和 CtrlTrigger 的检测共同学习）"""
+    global _pause_model
+    with _pause_model_lock:
+        if _pause_model is None:
+            _pause_model = PauseModel(app_config.end_silence_duration, app_config.vad_min_end_silence)
+        return _pause_model
+
+class VoiceActivityDetector:
+    def __init__(self, samplerate, threshold_db=None, snr_db=None, flatness_max=0.5,
+                 loud_margin_db=15.0, hangover_ms=None, pause_model=None):
+        self.samplerate = samplerate
+        self.frame_len = int(samplerate * FRAME_MS / 1000)
+        self.frame_seconds = self.frame_len / samplerate
+        self.threshold_db = app_config.silence_threshold_db if threshold_db is None else threshold_db
+        self.snr_db = app_config.vad_snr_db if snr_db is None else snr_db
+        self.flatness_max = flatness_max
+        self.loud_margin_db = loud_margin_db
+        hangover_ms = app_config.vad_hangover_ms if hangover_ms is None else hangover_ms
+        self.hangover_frames = int(round(hangover_ms / FRAME_MS))
+        self.pause_model = pause_model or get_pause_model()
+        # 初始噪声底使初始阈值等于固定阈值
+        self.noise_floor_db = self.threshold_db - self.snr_db
+        self.has_speech = False
+        self.silence_time = 0.0
+        self._since_speech = None  # 距上一语音帧的帧数，None 表示尚无语音
+        self._window = np.hanning(self.frame_len).astype(np.float32)
+        self._remainder = None
+        # 下一个待分析帧的起始样本（按 update 输入累计），以及语音帧范围 [first, last)
+        self._frame_pos = 0
+        self._first_speech = None
+        self._last_speech = None
+
+    @property
+    def speech_threshold_db(self):
+        return max(self.threshold_db, self.noise_floor_db + self.snr_db)
+
+    @property
+    def end_timeout(self):
+        return self.pause_model.end_timeout
+
+    def frame_features(self, mono):
+        """
+        对整数个帧长的单声道数据计算逐帧能量（dB）与频谱平坦度
+
+        Returns:
+            (energy_db, flatness) 两个长度为帧数的数组
+        """
+        frames = mono.reshape(-1, self.frame_len)
+        energy_db = 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-12)
+        np.maximum(energy_db, MIN_DB, out=energy_db)
+        power = np.abs(np.fft.rfft(frames * self._window, axis=1)[:, 1:]) ** 2 + 1e-12
+        flatness = np.exp(np.mean(np.log(power), axis=1)) / np.mean(power, axis=1)
+        return energy_db, flatness
+
+    def update(self, block):
+        """
+        输入一块音频（(frames, channels) 或一维），返回本块是否包含语音（含 hangover）
+        """
+        mono = block.mean(axis=1) if block.ndim == 2 else block
+        mono = np.asarray(mono, dtype=np.float32)
+        if self._remainder is not None:
+            mono = np.concatenate([self._remainder, mono])
+            self._remainder = None
+        usable = len(mono) - len(mono) % self.frame_len
+        if usable < len(mono):
+            self._remainder = mono[usable:]
+        if usable == 0:
+            return self._active()
+
+        energy_db, flatness = self.frame_features(mono[:usable])
+        block_speech = False
+        for i, (e, f) in enumerate(zip(energy_db.tolist(), flatness.tolist())):
+            threshold = self.speech_threshold_db
+            speech = e > threshold and (f < self.flatness_max or e > threshold + self.loud_margin_db)
+            if speech:
+                frame_start = self._frame_pos + i * self.frame_len
+                if self._first_speech is None:
+                    self._first_speech = frame_start
+                self._last_speech = frame_start + self.frame_len
+                if self._since_speech is not None and self._since_speech > self.hangover_frames:
+                    # 句内停顿结束：记录停顿长度供学习
+                    self.pause_model.add(self._since_speech * self.frame_seconds)
+                self._since_speech = 0
+                self.has_speech = True
+                block_speech = True
+                continue
+            if self._since_speech is not None:
+                self._since_speech += 1
+            if self._since_speech is None or self._since_speech > self.hangover_frames:
+                # 非语音帧更新噪声底：下降快、上升慢
+                rate = 0.3 if e < self.noise_floor_db else 0.02
+                self.noise_floor_db += rate * (e - self.noise_floor_db)
+        self._frame_pos += usable
+        self.silence_time = 0.0 if self._since_speech is None else self._since_speech * self.frame_seconds
+        return block_speech or self._active()
+
+    def _active(self):
+        return self._since_speech is not None and self._since_speech <= self.hangover_frames
+
+    def speech_bounds(self):
+        """
+        语音帧的样本范围 (first, end)，前后各放宽 TRIM_MARGIN_MS；尚无语音时返回 None
+
+        样本位置按 update() 累计输入计数（从 0 开始），end 为开区间，调用方按总长截断。
+        """
+        if self._first_speech is None:
+            return None
+        margin = int(self.samplerate * TRIM_MARGIN_MS / 1000)
+        return max(0, self._first_speech - margin), self._last_speech + margin
+
+    def utterance_ended(self):
+        return self.has_speech and self.silence_time >= self.end_timeout
+
+class ThresholdDetector:
+    """原有的固定阈值检测：整块 RMS 与 silence_threshold_db 比较，结束静音固定"""
+
+    def __init__(self, samplerate, threshold_db=None, end_timeout=None):
+        self.samplerate = samplerate
+        self.threshold_db = app_config.silence_threshold_db if threshold_db is None else threshold_db
+        self.end_timeout = app_config.end_silence_duration if end_timeout is None else end_timeout
+        self.has_speech = False
+        self.silence_time = 0.0
+        self._silent_blocks = None
+
+    def update(self, block):
+        rms = np.sqrt(np.mean(block ** 2))
+        db = 20 * np.log10(rms + 1e-9)
+        if db > self.threshold_db:
+            self.has_speech = True
+            self._silent_blocks = None
+            self.silence_time = 0.0
+            return True
+        # 与原逻辑一致：从第一个静音块开始计时
+        if self._silent_blocks is None:
+            self._silent_blocks = 0
+        else:
+            self._silent_blocks += 1
+        self.silence_time = self._silent_blocks * len(block) / self.samplerate
+        return False
+
+    def utterance_ended(self):
+        return self.has_speech and self.silence_time >= self.end_timeout
+
+    def speech_bounds(self):
+        """固定阈值模式不跟踪语音帧，调用方使用逐样本包络裁剪"""
+        return None
+
+def create_detector(samplerate):
+    """按 [Audio] vad_enabled 创建自适应 VAD 或原固定阈值检测器"""
+    if app_config.vad_enabled:
+        return VoiceActivityDetector(samplerate)
+    return ThresholdDetector(samplerate)
+
+def detect_segments(samples, samplerate, block_seconds=0.1, **kwargs):
+    """
+    离线运行 VAD，返回语音段列表 [(start_s, end_s), ...]
+
+    Args:
+        samples: (frames, channels) 或一维音频
+        kwargs: 传给 VoiceActivityDetector（可传入独立的 PauseModel 避免影响进程共享模型）
+    """
+    detector = VoiceActivityDetector(samplerate, **kwargs)
+    block = int(samplerate * block_seconds)
+    segments = []
+    start = None
+    for offset in range(0, len(samples), block):
+        speech = detector.update(samples[offset:offset + block])
+        t = offset / samplerate
+        if speech and start is None:
+            start = t
+        elif not speech and start is not None:
+            segments.append((start, t))
+            start = None
+    if start is not None:
+        segments.append((start, len(samples) / samplerate))
+    return segments
+
+def detect_speech_bounds(samples, samplerate, block_frames=48000, **kwargs):
+    """
+    离线分块运行 VAD，返回语音的样本范围 (first, end)（已按长度截断），无语音时返回 None
+
+    samples 可以是内存映射视图，逐块读取。kwargs 同 detect_segments。
+    """
+    kwargs.setdefault('pause_model', PauseModel(app_config.end_silence_duration))
+    detector = VoiceActivityDetector(samplerate, **kwargs)
+    for offset in range(0, len(samples), block_frames):
+        detector.update(np.asarray(samples[offset:offset + block_frames], dtype=np.float32))
+    bounds = detector.speech_bounds()
+    if bounds is None:
+        return None
+    return bounds[0], min(bounds[1], len(samples))
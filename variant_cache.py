@@ -0,0 +1,198 @@
+"""
+variant_cache.py - 慢速版本按需生成与磁盘预算缓存
+包含: VariantCache, get_variant_cache, variant_prefetch_job
+
+[SlowAudio] on_demand 开启后，录音只保存原速文件；慢速版本 {number}@{speed}.{ext}
+视为可随时重建的缓存：
+- mode1 首次播放某条录音时生成（后台线程，完成后回调）
+- 空闲维护时为最近的录音预生成（variant_prefetch_job）
+- 每次访问更新文件 mtime 作为最近使用时间；总大小超过 cache_budget_mb 时
+  按 mtime 从旧到新淘汰，原速文件不受影响
+"""
+import os
+import time
+import queue
+import threading
+from datetime import datetime
+from config_loader import app_config
+from audio_files import parse_audio_filename, audio_path, find_audio_file
+from audio_processor import generate_slow_audio, slow_output_paths
+
+class VariantCache:
+    def __init__(self, save_dir=None, budget_bytes=None, speeds=None):
+        self.save_dir = save_dir or app_config.save_dir
+        self.budget_bytes = app_config.slow_cache_budget_mb * 1024 * 1024 if budget_bytes is None else budget_bytes
+        self.speeds = sorted(speeds or app_config.slow_speeds)
+        self._queue = queue.Queue()
+        self._pending = {}   # number -> [callback]
+        self._lock = threading.Lock()
+        # 按需生成线程与空闲预生成作业共用，避免同一条录音被同时渲染（写同一个 .tmp）
+        self._generate_lock = threading.Lock()
+        self._worker = None
+        self.hits = 0
+        self.misses = 0
+
+    def variant_paths(self, number):
+        """{speed: path}，按速度从慢到快；已存在的取现有文件（任意格式），缺失的与原速文件同格式"""
+        source = find_audio_file(number, save_dir=self.save_dir) or audio_path(number, save_dir=self.save_dir)
+        return {speed: find_audio_file(number, speed, self.save_dir) or path
+                for speed, path in slow_output_paths(source, self.speeds).items()}
+
+    def get_variants(self, number, touch=True):
+        """
+        返回已缓存的慢速版本路径（从慢到快），缺失的不包含
+
+        touch 为 True 时更新命中文件的最近使用时间。
+        """
+        found = []
+        for path in self.variant_paths(number).values():
+            if os.path.exists(path):
+                found.append(path)
+                if touch:
+                    try:
+                        os.utime(path)
+                    except OSError:
+                        pass
+        return found
+
+    def is_complete(self, number):
+        return all(os.path.exists(p) for p in self.variant_paths(number).values())
+
+    def is_pending(self, number):
+        """number 是否已在按需生成队列中"""
+        with self._lock:
+            return number in self._pending
+
+    def request(self, number, callback=None):
+        """
+        确保 number 的全部慢速版本存在
+
+        已全部缓存时立即调用 callback(number) 并返回 True；否则排队后台生成，
+        生成结束后在工作线程中调用 callback(number)，返回 False。
+        """
+        if self.is_complete(number):
+            self.hits += 1
+            self.get_variants(number)
+            if callback:
+                callback(number)
+            return True
+        self.misses += 1
+        with self._lock:
+            callbacks = self._pending.get(number)
+            if callbacks is not None:
+                if callback:
+                    callbacks.append(callback)
+                return False
+            self._pending[number] = [callback] if callback else []
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="VariantCache", daemon=True)
+                self._worker.start()
+        self._queue.put(number)
+        return False
+
+    def _run(self):
+        while True:
+            number = self._queue.get()
+            self.generate(number)
+            with self._lock:
+                callbacks = self._pending.pop(number, [])
+            for callback in callbacks:
+                try:
+                    callback(number)
+                except Exception as e:
+                    print(f"[VariantCache] Callback error for #{number}: {e}")
+
+    def generate(self, number):
+        """
+        同步生成缺失的慢速版本，完成后按预算淘汰，返回生成的文件数
+
+        生成过程串行执行；等锁期间另一方已生成的版本不会重复生成。
+        淘汰时保留本次生成的 number，预算很小时也不会删掉正等待播放的版本。
+        """
+        with self._generate_lock:
+            source = find_audio_file(number, save_dir=self.save_dir)
+            if source is None:
+                return 0
+            missing = [speed for speed, path in self.variant_paths(number).items() if not os.path.exists(path)]
+            if not missing:
+                return 0
+            started = time.time()
+            generated = generate_slow_audio(source, missing) or []
+            print(f"[VariantCache] Generated {len(generated)} variants for #{number} in {time.time() - started:.2f}s")
+            self.evict(keep={number})
+            return len(generated)
+
+    def usage(self):
+        """
+        Returns:
+            (总字节数, [(mtime, size, path, number), ...]) 只统计慢速版本
+        """
+        entries = []
+        total = 0
+        if not os.path.isdir(self.save_dir):
+            return 0, entries
+        speed_names = {str(s) for s in self.speeds}
+        with os.scandir(self.save_dir) as it:
+            for entry in it:
+                parsed = parse_audio_filename(entry.name, speed_names)
+                if parsed is None or parsed[1] is None or not entry.is_file():
+                    continue
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path, parsed[0]))
+                total += stat.st_size
+        return total, entries
+
+    def evict(self, keep=()):
+        """
+        超出预算时按最近使用时间淘汰慢速版本，返回删除的文件数
+
+        Args:
+            keep: 不淘汰的 number 集合（如刚为播放请求生成的录音）
+        """
+        total, entries = self.usage()
+        if total <= self.budget_bytes:
+            return 0
+        removed = 0
+        for _, size, path, number in sorted(entries):
+            if number in keep:
+                continue
+            if total <= self.budget_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                removed += 1
+            except FileNotFoundError:
+                total -= size
+            except OSError as e:
+                # 正在播放的文件在 Windows 上无法删除，跳过
+                print(f"[VariantCache] Warning: failed to evict {os.path.basename(path)}: {e}")
+        print(f"[VariantCache] Evicted {removed} variant files, cache now {total / 1024 / 1024:.1f} MB")
+        return removed
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_variant_cache():
+    """进程内唯一的慢速版本缓存（UI 进程）"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = VariantCache()
+        return _cache
+
+def variant_prefetch_job(db_manager):
+    """空闲时为今天最近的 prefetch_recent 条录音预生成慢速版本，每条一步"""
+    count = app_config.slow_prefetch_recent
+    if count <= 0:
+        return
+    cache = get_variant_cache()
+    today = datetime.now().strftime("%Y-%m-%d")
+    generated = 0
+    for rec in db_manager.get_recordings_page(today, limit=count):
+        if cache.is_complete(rec['number']) or cache.is_pending(rec['number']):
+            continue
+        yield
+        generated += cache.generate(rec['number'])
+    if generated:
+        print(f"[Maintenance] Prefetched {generated} slow variants")